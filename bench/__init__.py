@@ -0,0 +1 @@
+"""基准测试(在仓库根目录下以 python -m bench.<模块> 运行)"""
@@ -0,0 +1,310 @@
+"""端到端基准测试：在 example/ 的测试题上无界面地运行各种攻击方式
+
+用法:
+  python -m bench.e2e --output bench-results.json
+  python -m bench.e2e --standin --repeat 3 --compare baseline.json
+
+场景由示例压缩包自动生成(顺序固定)：
+  rank        进程内的可行性评估(不启动 bkcrack)
+  matrix      所有加密条目 × 签名库明文(与 cli.py 的矩阵攻击相同)
+  best        可行性评估排第一的单个攻击
+  known-file  加密条目与示例中某个未加密条目 CRC、大小相同时，用后者的原始数据做 -p 明文
+  sweep       同 known-file，但在偏移 0..3 上并行扫描
+  recover     用找到的密钥恢复密码(替身默认执行；真实 bkcrack 需 --recover 指定长度)
+外层未加密、只是包着加密 ZIP 的测试题会先解出内层压缩包。
+
+系统中有 bkcrack 时使用它，否则(或指定 --standin 时)使用 bench/standin_bkcrack.py，
+它的工作量完全确定，适合在 CI 中比较 bkcrack-gui 自身的开销。每个场景记录墙钟时间、
+本进程和子进程的 CPU 时间以及子进程峰值内存，结果写成一个 JSON 文件；
+--compare 与之前的结果比较，超过 --threshold 的退步会使退出码为 1。
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from core.backend import get_backend, resolve_bkcrack
+from core.commands import build_matrix_jobs, build_recovery_jobs
+from core.feasibility import rank_entries
+from core.ledger import Ledger
+from core.runner import AttemptGroup, BatchRunner
+from core.threads import assign_threads
+from core.zipmeta import load_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_DIR = os.path.join(ROOT, "example")
+STANDIN = os.path.join(ROOT, "bench", "standin_bkcrack.py")
+SWEEP_OFFSETS = range(0, 4)
+_ledger_ids = itertools.count()
+# 比较结果时参与判断的指标
+METRICS = ('wall', 'cpu_self', 'cpu_children', 'peak_rss')
+
+
+def standin_command(work_dir):
+    """替身的可执行路径；Windows 下生成一个调用当前 Python 的 .cmd 包装"""
+    if os.name != 'nt':
+        return STANDIN
+    wrapper = os.path.join(work_dir, "bkcrack-standin.cmd")
+    with open(wrapper, 'w', encoding='utf-8') as f:
+        f.write(f'@"{sys.executable}" "{STANDIN}" %*\r\n')
+    return wrapper
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def read_raw(index, entry):
+    with open(index.path, 'rb') as f:
+        f.seek(index.data_offset(entry.index))
+        return f.read(entry.compress_size)
+
+
+def collect_archives(example_dir, work_dir):
+    """示例中的加密压缩包 [(名称, 路径)] 和所有未加密条目 [(名称, index, entry)]
+
+    没有加密条目的压缩包视为外层包装，解出其中存储的 .zip 继续查找(最多两层)。
+    """
+    archives, plains = [], []
+    pending = [(name, os.path.join(example_dir, name), 0)
+               for name in sorted(os.listdir(example_dir)) if name.lower().endswith('.zip')]
+    while pending:
+        name, path, depth = pending.pop(0)
+        index = load_index(path)
+        entries = [entry for entry in index if not entry.is_dir]
+        if any(entry.encrypted for entry in entries):
+            archives.append((name, path))
+        for entry in entries:
+            if entry.encrypted:
+                continue
+            plains.append((f"{name}/{entry.name}", index, entry))
+            if entry.method == 0 and entry.name.lower().endswith('.zip') and depth < 2:
+                inner = os.path.join(work_dir, "inner", f"{len(pending) + len(archives)}-{os.path.basename(entry.name)}")
+                os.makedirs(os.path.dirname(inner), exist_ok=True)
+                with open(inner, 'wb') as f:
+                    f.write(read_raw(index, entry))
+                pending.append((f"{name}/{os.path.basename(entry.name)}", inner, depth + 1))
+    return archives, plains
+
+
+def known_file_plains(index, plains, work_dir):
+    """加密条目与未加密条目的 CRC、压缩方式和数据大小都相同时，后者的原始数据就是已知明文"""
+    result = []
+    for entry in index:
+        if entry.is_dir or not entry.encrypted:
+            continue
+        for label, plain_index, plain in plains:
+            if (plain.crc, plain.method, plain.compress_size) == (entry.crc, entry.method, entry.compress_size - 12):
+                path = os.path.join(work_dir, "plain", f"{entry.crc:08x}-{plain.compress_size}.bin")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(read_raw(plain_index, plain))
+                result.append((entry.name, label, path))
+                break
+    return result
+
+
+def with_threads(attempts, bkcrack, workers, threads):
+    """指定了 --threads 时为尝试追加 -j，按同时运行的进程数 min(workers, 尝试数) 分核"""
+    if not threads:
+        return attempts
+    return assign_threads(attempts, min(workers, len(attempts)), threads, bkcrack)
+
+
+def build_scenarios(archives, plains, bkcrack, threads, work_dir, workers=1):
+    """[(场景名, 压缩包名, 类型, 尝试列表或 None, 命中标记)]，bkcrack 为 Backend
+
+    threads 为单个进程的线程数上限，每个场景按自己的尝试数分配。
+    """
+    scenarios = []
+    for name, path in archives:
+        base = bkcrack.command("-C", path)
+        scenarios.append((f"{name} rank", name, "rank", path, None))
+        ranking = [result for result in rank_entries(path) if result['feasible']]
+        matrix = [(label, command) for label, command, _, _ in build_matrix_jobs(path, bkcrack=bkcrack)]
+        if matrix:
+            scenarios.append((f"{name} matrix", name, "matrix", with_threads(matrix, bkcrack, workers, threads),
+                              "Keys:"))
+        if ranking:
+            best = ranking[0]
+            attempts = [(f"{best['name']} × {best['plain']}", base + ["-c", best['name'], *best['args']])]
+            scenarios.append((f"{name} best", name, "best", with_threads(attempts, bkcrack, workers, threads),
+                              "Keys:"))
+        for entry_name, label, plain_path in known_file_plains(load_index(path), plains, work_dir):
+            command = base + ["-c", entry_name, "-p", plain_path]
+            attempts = [(label, command + ["-o", "0"])]
+            scenarios.append((f"{name} known-file {entry_name}", name, "known-file",
+                              with_threads(attempts, bkcrack, workers, threads), "Keys:"))
+            attempts = [(str(offset), command + ["-o", str(offset)]) for offset in SWEEP_OFFSETS]
+            scenarios.append((f"{name} sweep {entry_name}", name, "sweep",
+                              with_threads(attempts, bkcrack, workers, threads), "Keys:"))
+    return scenarios
+
+
+def measure(run):
+    """执行 run()，返回 (结果, 墙钟秒数, 本进程 CPU 秒数, 子进程 CPU 秒数)"""
+    before = os.times()
+    started = time.perf_counter()
+    result = run()
+    wall = time.perf_counter() - started
+    after = os.times()
+    cpu_self = (after.user - before.user) + (after.system - before.system)
+    cpu_children = (after.children_user - before.children_user) + (after.children_system - before.children_system)
+    return result, wall, cpu_self, cpu_children
+
+
+def run_attempts(attempts, hit_marker, workers, ledger):
+    group = AttemptGroup(0, attempts, hit_marker)
+    BatchRunner(workers, ledger=ledger).run([group])
+    return group
+
+
+def run_scenario(scenario, workers, work_dir, repeat):
+    """运行一个场景 repeat 次，各指标取中位数"""
+    name, archive, kind, payload, hit_marker = scenario
+    samples = []
+    for i in range(repeat):
+        ledger = Ledger(os.path.join(work_dir, "ledger", f"{next(_ledger_ids)}.jsonl"))
+        if kind == "rank":
+            result, wall, cpu_self, cpu_children = measure(lambda: rank_entries(payload))
+            sample = {'status': 'ranked',
+                      'winner': next((entry['name'] for entry in result if entry['feasible']), None)}
+        else:
+            group, wall, cpu_self, cpu_children = measure(
+                lambda: run_attempts(payload, hit_marker, workers, ledger))
+            records = ledger.records()
+            peaks = [record['peak_rss'] for record in records if record.get('peak_rss')]
+            keys = next((record['keys'] for record in records if record.get('keys')), None)
+            sample = {'status': 'found' if group.winner is not None else 'not_found', 'winner': group.winner,
+                      'keys': keys, 'processes': len(records), 'peak_rss': max(peaks) if peaks else None,
+                      'stages': next((record['stages'] for record in records
+                                      if record.get('label') == group.winner), None)}
+        sample.update(wall=wall, cpu_self=cpu_self, cpu_children=cpu_children)
+        samples.append(sample)
+
+    result = {'name': name, 'archive': archive, 'kind': kind, 'attempts': 0 if kind == "rank" else len(payload),
+              'repeat': repeat}
+    result.update({key: value for key, value in samples[-1].items() if key not in METRICS})
+    for metric in METRICS:
+        values = [sample[metric] for sample in samples if sample.get(metric) is not None]
+        result[metric] = round(statistics.median(values), 4) if values else None
+    return result
+
+
+def compare(results, baseline, threshold, metrics=METRICS, floor=0.05):
+    """与之前的结果逐场景比较，返回 (输出行, 退步数)；短于 floor 秒的时间不参与退步判断"""
+    previous = {scenario['name']: scenario for scenario in baseline.get('scenarios', [])}
+    lines, regressions = [], 0
+    for scenario in results:
+        old = previous.get(scenario['name'])
+        if not old:
+            lines.append(f"{scenario['name']}: 新场景")
+            continue
+        parts = []
+        for metric in metrics:
+            new_value, old_value = scenario.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = new_value / old_value - 1
+            flag = ""
+            # 太短的时间抖动很大，不参与退步判断
+            if change > threshold and (metric == 'peak_rss' or old_value >= floor):
+                flag = " !"
+                regressions += 1
+            parts.append(f"{metric} {change:+.0%}{flag}")
+        if old.get('status') != scenario.get('status'):
+            parts.append(f"状态 {old.get('status')} -> {scenario.get('status')} !")
+            regressions += 1
+        lines.append(f"{scenario['name']}: " + ", ".join(parts))
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="bkcrack-gui 端到端基准测试")
+    parser.add_argument("--bkcrack", help="bkcrack 可执行文件路径，默认依次查找环境变量 BKCRACK_PATH、程序目录和 PATH")
+    parser.add_argument("--standin", action="store_true", help="使用确定性的 bkcrack 替身")
+    parser.add_argument("--scale", type=float, default=1.0, help="替身的工作量倍数")
+    parser.add_argument("--examples", default=EXAMPLE_DIR, help="示例压缩包目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并发 bkcrack 进程数")
+    parser.add_argument("--threads", type=int, help="单个 bkcrack 进程的线程数(-j)")
+    parser.add_argument("--repeat", type=int, default=1, help="每个场景运行的次数，指标取中位数")
+    parser.add_argument("--scenario", action="append", default=[], help="只运行名称包含该文本的场景，可多次指定")
+    parser.add_argument("--recover", help="找到密钥后恢复密码的长度范围(替身默认 ..8)")
+    parser.add_argument("--charset", default="?p", help="密码恢复的字符集")
+    parser.add_argument("--output", help="结果文件(JSON)，默认输出到标准输出")
+    parser.add_argument("--compare", help="与之前的结果文件比较")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为退步的相对增幅")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="bkcrack-bench-")
+    try:
+        path = None if args.standin else resolve_bkcrack(args.bkcrack)
+        backend = "bkcrack" if path else "standin"
+        if not path:
+            path = standin_command(work_dir)
+            os.environ["BKCRACK_STANDIN_SCALE"] = str(args.scale)
+        bkcrack = get_backend(path)
+        recover_length = args.recover or ("..8" if backend == "standin" else None)
+        threads = args.threads
+
+        archives, plains = collect_archives(args.examples, work_dir)
+        scenarios = build_scenarios(archives, plains, bkcrack, threads, work_dir, args.workers)
+        if args.scenario:
+            scenarios = [s for s in scenarios if any(text in s[0] for text in args.scenario)]
+
+        results = []
+        keys = None
+        for scenario in scenarios:
+            result = run_scenario(scenario, args.workers, work_dir, args.repeat)
+            print(f"{result['name']}: {result['status']}，{result['wall']:.3f}s", file=sys.stderr)
+            keys = keys or result.get('keys')
+            results.append(result)
+        if keys and recover_length:
+            jobs = with_threads(build_recovery_jobs(keys.split(), recover_length, args.charset, bkcrack),
+                                bkcrack, args.workers, threads)
+            result = run_scenario(("recover", None, "recover", jobs, "Password"), args.workers, work_dir,
+                                  args.repeat)
+            print(f"{result['name']}: {result['status']}，{result['wall']:.3f}s", file=sys.stderr)
+            results.append(result)
+
+        report = {
+            'meta': {'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'revision': git_revision(), 'backend': backend,
+                     'bkcrack': bkcrack.banner, 'scale': args.scale if backend == "standin" else None,
+                     'workers': args.workers, 'threads': threads, 'repeat': args.repeat,
+                     'python': platform.python_version(), 'platform': platform.platform(),
+                     'cpu_count': os.cpu_count()},
+            'scenarios': results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=1)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            if baseline.get('meta', {}).get('backend') != backend:
+                print(f"注意: 基准结果使用的是 {baseline.get('meta', {}).get('backend')}", file=sys.stderr)
+            lines, regressions = compare(results, baseline, args.threshold)
+            print("\n".join(lines), file=sys.stderr)
+            return 1 if regressions else 0
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
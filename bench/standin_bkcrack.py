@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""用于基准测试的 bkcrack 替身
+
+命令行参数和输出格式与 bkcrack 一致(横幅、Z 值约简、"\\r" 刷新的进度、
+"Keys:"、密码恢复结果、SIGINT 时的 --continue-attack 检查点)，但不做真正的
+攻击：工作量只取决于已知明文的连续字节数(或密码长度)，每次运行的计算量完全
+确定，可以在没有 bkcrack 的 CI 环境中测量 bkcrack-gui 自身的调度和解析开销。
+
+替身不校验明文是否正确，参数合法的攻击总会"找到"同一组密钥，即密码
+STANDIN_PASSWORD 对应的内部密钥；用这组密钥做密码恢复会得到该密码。
+BKCRACK_STANDIN_SCALE 环境变量按倍数调整工作量。
+"""
+import os
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.zipcrypto import keys_from_password  # noqa: E402
+from core.zipmeta import load_index  # noqa: E402
+
+VERSION = "bkcrack 1.7.0 - 2024-05-26 (stand-in)"
+STANDIN_PASSWORD = "bench!"
+STANDIN_KEYS = keys_from_password(STANDIN_PASSWORD)
+CHARSET_SIZES = {'?l': 26, '?u': 26, '?d': 10, '?s': 33, '?a': 62, '?p': 95, '?b': 256}
+
+USAGE = """usage: bkcrack [options]
+Options:
+ -c, --cipher-file <file>       Zip entry or file on disk containing ciphertext
+ -C, --cipher-zip <archive>     Zip archive containing the ciphertext entry
+ -p, --plain-file <file>        Zip entry or file on disk containing plaintext
+ -P, --plain-zip <archive>      Zip archive containing the plaintext entry
+ -o, --offset <offset>          Known plaintext offset relative to ciphertext
+ -x, --extra <offset> <data>    Additional plaintext in hexadecimal starting at the given offset
+ -k, --keys <X> <Y> <Z>         Internal password representation as three 32-bits integers
+ -r, --recover-password [ <min>..<max> | <max> ] <charset>
+ -j, --jobs <count>             Number of threads to use
+ -d, --decipher <file>          File to write the deciphered data
+ -D, --decrypt <archive>        Create a copy of the encrypted zip archive with decrypted entries
+ -U, --change-password <archive> <password>
+     --continue-attack <checkpoint>
+     --continue-recovery <checkpoint>
+     --version                  Print version information
+ -h, --help                     Show this help and exit"""
+
+
+class StandinError(Exception):
+    pass
+
+
+def scale():
+    try:
+        return max(0.0, float(os.environ.get("BKCRACK_STANDIN_SCALE", "1")))
+    except ValueError:
+        return 1.0
+
+
+def stamp():
+    return time.strftime("[%H:%M:%S]")
+
+
+def spin(units, block=b"\xa5" * 64):
+    """确定的计算量：units 次 CRC-32"""
+    crc = 0
+    for _ in range(units):
+        crc = zlib.crc32(block, crc)
+    return crc
+
+
+def progress(done, total):
+    sys.stdout.write(f"\r{done * 100.0 / total:5.1f} % ({done} / {total})")
+    sys.stdout.flush()
+
+
+def parse_args(argv):
+    options = {'extra': []}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        values = argv[i + 1:]
+        if arg in ('-h', '--help', '--version'):
+            options['version' if arg == '--version' else 'help'] = True
+            i += 1
+            continue
+        counts = {'-x': 2, '-k': 3, '-r': 2, '-U': 2}
+        count = counts.get(arg, 1)
+        if len(values) < count:
+            raise StandinError(f"missing argument for option {arg}")
+        if arg == '-x':
+            options['extra'].append((values[0], values[1]))
+        elif arg in ('-C', '-c', '-p', '-P', '-o', '-j', '-d', '-D', '--continue-attack', '--continue-recovery'):
+            options[arg] = values[0]
+        elif arg in ('-k', '-r', '-U'):
+            options[arg] = values[:count]
+        else:
+            raise StandinError(f"unknown option {arg}")
+        i += 1 + count
+    return options
+
+
+def read_raw(zip_path, name):
+    """条目的原始数据(压缩数据，加密条目包含加密头)和条目信息"""
+    index = load_index(zip_path)
+    i = index.find(name)
+    if i < 0:
+        raise StandinError(f"cannot find entry {name} in {zip_path}")
+    entry = index.entry(i)
+    with open(zip_path, 'rb') as f:
+        f.seek(index.data_offset(i))
+        return f.read(entry.compress_size), entry
+
+
+def known_plaintext(options, data_size):
+    """按 -p/-P/-o/-x 计算已知明文，返回 (连续已知字节数, 总已知字节数)"""
+    known = {}
+    offset = int(options.get('-o', 0))
+    if '-p' in options:
+        if '-P' in options:
+            plain, _ = read_raw(options['-P'], options['-p'])
+        else:
+            with open(options['-p'], 'rb') as f:
+                plain = f.read()
+        for position in range(offset, min(offset + len(plain), data_size)):
+            known[position] = True
+    for extra_offset, data in options['extra']:
+        extra_offset = int(extra_offset)
+        try:
+            length = len(bytes.fromhex(data))
+        except ValueError:
+            raise StandinError(f"invalid hexadecimal data {data}")
+        if extra_offset < 0:
+            extra_offset += data_size
+        for position in range(extra_offset, extra_offset + length):
+            known[position] = True
+    contiguous, run, previous = 0, 0, None
+    for position in sorted(known):
+        run = run + 1 if previous is not None and position == previous + 1 else 1
+        contiguous = max(contiguous, run)
+        previous = position
+    return contiguous, len(known)
+
+
+def attack(options):
+    if '-C' not in options or '-c' not in options:
+        raise StandinError("ciphertext is not specified")
+    data, entry = read_raw(options['-C'], options['-c'])
+    if not entry.encrypted:
+        raise StandinError(f"entry {entry.name} is not encrypted")
+    contiguous, known = known_plaintext(options, len(data) - 12)
+    if contiguous < 8:
+        raise StandinError("not enough contiguous plaintext (8 bytes required)")
+    if known < 12:
+        raise StandinError("not enough plaintext (12 bytes required)")
+
+    factor = scale()
+    print(f"{stamp()} Z reduction using {contiguous - 7} bytes of known plaintext", flush=True)
+    steps = contiguous - 7
+    for step in range(1, steps + 1):
+        spin(int(200 * factor))
+        progress(step, steps)
+    print(flush=True)
+
+    # 连续已知字节越多，剩下的 Z 值越少
+    total = max(64, 1 << max(0, 22 - 2 * (contiguous - 8)))
+    done = int(options.get('--continue-attack', 0))
+    print(f"{stamp()} Attack on {total} Z values at index {max(0, contiguous - 12)}", flush=True)
+    units = max(1, int(4 * factor))
+    update = max(1, total // 100)
+    try:
+        while done < total:
+            spin(units)
+            done += 1
+            if done % update == 0:
+                progress(done, total)
+    except KeyboardInterrupt:
+        print(f"\nOperation interrupted by user.\nYou may resume the attack with the option: "
+              f"--continue-attack {done}", flush=True)
+        return 2
+    keys = " ".join(f"{key:08x}" for key in STANDIN_KEYS)
+    print(f"\nKeys: {keys}", flush=True)
+    print(f"{stamp()} Keys\n{keys}", flush=True)
+    return 0
+
+
+def parse_length(text):
+    if '..' in text:
+        low, high = text.split('..', 1)
+        return int(low) if low else 0, int(high) if high else 12
+    return 0, int(text)
+
+
+def recover(options):
+    keys = tuple(int(key, 16) for key in options['-k'])
+    low, high = parse_length(options['-r'][0])
+    charset = CHARSET_SIZES.get(options['-r'][1], 95)
+    target = len(STANDIN_PASSWORD) if keys == STANDIN_KEYS else None
+    factor = scale()
+    print(f"{stamp()} Recovering password", flush=True)
+    for length in range(low, high + 1):
+        print(f"length {length}...", flush=True)
+        total = min(charset ** min(length, 2), 2000)
+        update = max(1, total // 100)
+        try:
+            for done in range(1, total + 1):
+                spin(max(1, int(8 * factor)))
+                if done % update == 0:
+                    progress(done, total)
+        except KeyboardInterrupt:
+            print(f"\nOperation interrupted by user.\nYou may resume the password recovery with the option: "
+                  f"--continue-recovery {length:02x}", flush=True)
+            return 2
+        print(flush=True)
+        if length == target:
+            print(f"{stamp()} Password", flush=True)
+            print(f"as bytes: {STANDIN_PASSWORD.encode().hex(' ')}", flush=True)
+            print(f"as text: {STANDIN_PASSWORD}", flush=True)
+            return 0
+    print(f"{stamp()} Could not recover password", flush=True)
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    print(VERSION, flush=True)
+    try:
+        options = parse_args(argv)
+        if options.get('help') or not argv:
+            print(USAGE)
+            return 0
+        if options.get('version'):
+            return 0
+        if '-r' in options:
+            if '-k' not in options:
+                raise StandinError("keys are required to recover the password")
+            return recover(options)
+        if '-k' in options:
+            raise StandinError("deciphering is not supported by the stand-in")
+        return attack(options)
+    except (StandinError, OSError, ValueError) as e:
+        print(f"Error: {e}", flush=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""冷启动基准测试：每个场景都在新的 Python 进程中运行
+
+用法:
+  python -m bench.startup --output startup.json
+  python -m bench.startup --repeat 10 --compare startup.json
+
+场景(顺序固定)：
+  python              空解释器的启动时间，作为其余场景的参照
+  import <模块>       导入 core 及其常用子模块、cli；同时检查导入后没有加载任何 Qt 模块
+  cli --help          命令行模式从启动到输出帮助
+  gui                 python main.py 从启动到主窗口第一次事件循环(未安装 PySide6 时跳过)，
+                      通过 BKCRACK_GUI_STARTUP_BENCH 让程序输出各阶段耗时后退出
+每个场景记录外部测得的墙钟时间(wall)和进程内测得的导入耗时(import)，GUI 场景另有
+建窗口(window)和首次显示(shown)的耗时，多次运行取中位数。core 加载了 Qt 时退出码为 1；
+--compare 与之前的结果比较，超过 --threshold 的退步同样使退出码为 1。
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.e2e import ROOT, compare, git_revision
+
+CORE_MODULES = ('core', 'core.zipmeta', 'core.commands', 'core.zipcrypto', 'core.runner', 'cli')
+QT_PACKAGES = ('PySide6', 'shiboken6', 'qfluentwidgets', 'ui')
+METRICS = ('wall', 'import', 'window', 'shown')
+# 在子进程中计时的导入语句；计时前不导入任何其他模块，避免提前加载被测模块的依赖
+IMPORT_PROBE = """import time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+import sys
+print(elapsed, *sorted(m for m in sys.modules if m.split('.')[0] in {qt!r}))
+"""
+
+
+def run_process(command, env):
+    """运行命令，返回 (标准输出, 返回码, 墙钟秒数)"""
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, encoding='utf-8',
+                            errors='replace')
+    wall = time.perf_counter() - started
+    return result.stdout, result.returncode, wall
+
+
+def probe_python(env):
+    _, returncode, wall = run_process([sys.executable, "-c", "pass"], env)
+    return {'status': 'ok' if returncode == 0 else 'failed', 'wall': wall}
+
+
+def probe_import(module, env):
+    code = IMPORT_PROBE.format(module=module, qt=QT_PACKAGES)
+    stdout, returncode, wall = run_process([sys.executable, "-c", code], env)
+    fields = stdout.split()
+    if returncode != 0 or not fields:
+        return {'status': 'failed', 'wall': wall}
+    qt = fields[1:]
+    return {'status': 'qt' if qt else 'ok', 'wall': wall, 'import': float(fields[0]), 'qt_modules': qt}
+
+
+def probe_cli_help(env):
+    _, returncode, wall = run_process([sys.executable, "cli.py", "--help"], env)
+    return {'status': 'ok' if returncode == 0 else 'failed', 'wall': wall}
+
+
+def probe_gui(env):
+    if importlib.util.find_spec("PySide6") is None:
+        return {'status': 'skipped'}
+    env = dict(env, BKCRACK_GUI_STARTUP_BENCH="1")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    stdout, returncode, wall = run_process([sys.executable, "main.py"], env)
+    lines = [line for line in stdout.splitlines() if line.startswith("{")]
+    if returncode != 0 or not lines:
+        return {'status': 'failed', 'wall': wall}
+    timings = json.loads(lines[-1])
+    return {'status': 'ok', 'wall': wall, 'import': timings['imports'], 'window': timings['window'],
+            'shown': timings['shown']}
+
+
+def scenarios():
+    """[(场景名, 运行一次的函数)]"""
+    result = [("python", probe_python)]
+    result.extend((f"import {module}", lambda env, module=module: probe_import(module, env))
+                  for module in CORE_MODULES)
+    result.append(("cli --help", probe_cli_help))
+    result.append(("gui", probe_gui))
+    return result
+
+
+def run_scenario(name, probe, env, repeat):
+    """运行一个场景 repeat 次，各指标取中位数，另记录墙钟时间的最小值"""
+    samples = [probe(env) for _ in range(repeat)]
+    result = {'name': name, 'repeat': repeat}
+    result.update({key: value for key, value in samples[-1].items() if key not in METRICS})
+    for metric in METRICS:
+        values = [sample[metric] for sample in samples if sample.get(metric) is not None]
+        result[metric] = round(statistics.median(values), 4) if values else None
+    walls = [sample['wall'] for sample in samples if sample.get('wall') is not None]
+    result['wall_min'] = round(min(walls), 4) if walls else None
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="bkcrack-gui 冷启动基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景运行的次数，指标取中位数")
+    parser.add_argument("--scenario", action="append", default=[], help="只运行名称包含该文本的场景，可多次指定")
+    parser.add_argument("--output", help="结果文件(JSON)，默认输出到标准输出")
+    parser.add_argument("--compare", help="与之前的结果文件比较")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为退步的相对增幅")
+    args = parser.parse_args(argv)
+
+    # 使用临时数据目录，GUI 场景不读写用户的密钥缓存和日志
+    home = tempfile.mkdtemp(prefix="bkcrack-startup-")
+    env = dict(os.environ, BKCRACK_GUI_HOME=home)
+    try:
+        results = []
+        for name, probe in scenarios():
+            if args.scenario and not any(text in name for text in args.scenario):
+                continue
+            result = run_scenario(name, probe, env, args.repeat)
+            wall = f"{result['wall']:.3f}s" if result.get('wall') is not None else "-"
+            print(f"{name}: {result['status']}，{wall}", file=sys.stderr)
+            if result.get('qt_modules'):
+                print(f"  加载了 Qt 模块: {', '.join(result['qt_modules'])}", file=sys.stderr)
+            results.append(result)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    report = {
+        'meta': {'time': time.strftime("%Y-%m-%dT%H:%M:%S"), 'revision': git_revision(), 'repeat': args.repeat,
+                 'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpu_count': os.cpu_count()},
+        'scenarios': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=1)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = sum(1 for result in results if result['status'] in ('qt', 'failed'))
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        # 启动时间本身很短，10 毫秒以下的抖动不算退步
+        lines, regressions = compare(results, baseline, args.threshold, METRICS, floor=0.01)
+        print("\n".join(lines), file=sys.stderr)
+        failed += regressions
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""bkcrack-gui 的命令行批量模式(无需 PySide6)
+
+用法示例:
+  python cli.py a.zip b.zip --workers 8 --output results.ndjson
+  python cli.py --manifest jobs.jsonl --workers 16
+  python cli.py --ledger --ledger-by plain
+
+直接给出的压缩包使用矩阵攻击(所有加密条目 × plains 目录及 --plain 指定的明文)。
+清单文件为 JSON Lines(每行一条)或 JSON 数组，字段见 core.commands.build_spec_attempts。
+每个任务结束后向输出写入一行 JSON 结果。
+--ledger 按策略汇总界面和命令行的历史运行记录(成功率、耗时、峰值内存)。
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from core.backend import get_backend
+from core.checkpoint import CheckpointStore
+from core.commands import (AttackSpecError, build_spec_attempts,
+                           parse_keys_line, parse_recovery_output)
+from core.feasibility import rank_entries
+from core.keystore import KeyStore
+from core.ledger import GROUP_FIELDS, Ledger, format_summary, summarize
+from core.runner import AttemptGroup, BatchRunner
+from core.threads import ThreadSettings, assign_threads, calibrate
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def group_record(group):
+    """把执行完的任务整理为一条结果记录"""
+    spec = group.spec
+    record = {
+        "id": group.job_id,
+        "archive": spec.get("archive"),
+        "mode": spec.get("mode", "matrix"),
+        "status": "found" if group.winner is not None else "not_found",
+        "winner": group.winner,
+        "elapsed": round(group.elapsed, 3),
+        "attempts": sorted(group.results, key=lambda r: r["label"]),
+    }
+    if group.winner is not None:
+        if group.hit_marker == "Password":
+            password, hex_repr = parse_recovery_output(group.winner_lines)
+            record["password"] = password
+            record["password_hex"] = hex_repr
+        else:
+            keys = next((parse_keys_line(line) for line in group.winner_lines if "Keys:" in line), None)
+            record["keys"] = keys
+    return record
+
+
+def lookup_cache(key_store, spec):
+    """查询密钥缓存，命中时返回要写入结果的字段"""
+    if not key_store:
+        return None
+    try:
+        if spec.get("mode", "matrix") == "recover":
+            password = key_store.password_for_keys(" ".join(str(spec.get("keys", "")).split()).lower())
+            return {"password": password} if password else None
+        archive = spec.get("archive")
+        if archive and os.path.isfile(archive):
+            return key_store.lookup(archive)
+    except (OSError, sqlite3.Error):
+        pass
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="bkcrack 批量明文攻击(无界面)")
+    parser.add_argument("archives", nargs="*", help="要攻击的加密压缩包(矩阵攻击)")
+    parser.add_argument("--manifest", help="攻击清单文件(JSON Lines 或 JSON 数组)")
+    parser.add_argument("--plain", action="append", default=[], help="额外的明文文件，可多次指定")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并发 bkcrack 进程数")
+    parser.add_argument("--output", help="结果输出文件(NDJSON)，默认输出到标准输出")
+    parser.add_argument("--bkcrack", help="bkcrack 可执行文件路径，默认依次查找环境变量 BKCRACK_PATH、程序目录和 PATH")
+    parser.add_argument("--backend", action="store_true", help="显示 bkcrack 的路径、版本和支持的参数后退出")
+    parser.add_argument("--no-cache", action="store_true", help="不读取也不写入密钥缓存")
+    parser.add_argument("--no-resume", action="store_true", help="不从检查点继续，也不保存检查点")
+    parser.add_argument("--threads", type=int, help="单个 bkcrack 进程的线程数(-j)，默认使用测定值或CPU核数；"
+                                                    "并发进程的线程数之和不超过CPU核数")
+    parser.add_argument("--calibrate", action="store_true", help="测定本机最佳线程数并保存后退出")
+    parser.add_argument("--rank", action="store_true", help="只输出各压缩包加密条目的攻击可行性排序，不执行攻击")
+    parser.add_argument("--no-ledger", action="store_true", help="不写入运行记录")
+    parser.add_argument("--ledger", action="store_true", help="汇总历史运行记录后退出，可用压缩包参数筛选")
+    parser.add_argument("--ledger-by", choices=GROUP_FIELDS, default="strategy", help="运行记录的汇总字段")
+    parser.add_argument("--ledger-days", type=float, help="只汇总最近若干天的运行记录")
+    parser.add_argument("--json", action="store_true", help="--ledger 的结果按行输出为 JSON")
+    args = parser.parse_args(argv)
+
+    thread_settings = ThreadSettings()
+    if args.backend:
+        backend = get_backend(args.bkcrack)
+        print(json.dumps({"path": backend.path, "available": backend.available, "banner": backend.banner,
+                          "version": backend.version,
+                          "options": sorted(backend.options) if backend.options is not None else None},
+                         ensure_ascii=False))
+        return 0 if backend.available else 1
+    if args.calibrate:
+        best, results = calibrate(args.bkcrack,
+                                  on_result=lambda threads, rate: print(f"{threads} 线程: {rate:,.0f} /秒",
+                                                                        file=sys.stderr))
+        if best is None and not results:
+            print(f"当前 bkcrack 不支持 -j 参数: {get_backend(args.bkcrack).describe()}", file=sys.stderr)
+            return 1
+        if best is None:
+            print("测定失败：bkcrack 没有输出进度", file=sys.stderr)
+            return 1
+        thread_settings.save(best, results, args.bkcrack)
+        print(json.dumps({"threads": best, "results": results}))
+        return 0
+    if args.rank:
+        if not args.archives:
+            parser.error("--rank 需要指定压缩包")
+        for path in args.archives:
+            try:
+                print(json.dumps({"archive": path, "entries": rank_entries(path, args.plain)}, ensure_ascii=False))
+            except (OSError, ValueError) as e:
+                print(json.dumps({"archive": path, "error": str(e)}, ensure_ascii=False))
+        return 0
+    if args.ledger:
+        ledger = Ledger()
+        since = time.time() - args.ledger_days * 86400 if args.ledger_days else None
+        records = []
+        for archive in args.archives or [None]:
+            records.extend(ledger.records(since=since, archive=archive))
+        rows = summarize(records, args.ledger_by)
+        if args.json:
+            for row in rows:
+                print(json.dumps(row, ensure_ascii=False))
+        else:
+            print("\n".join(format_summary(rows)) or "没有运行记录")
+        return 0
+    if args.threads is not None and args.threads <= 0:
+        parser.error("--threads 必须为正整数")
+    if not get_backend(args.bkcrack).available:
+        print(f"{get_backend(args.bkcrack).describe()}，请用 --bkcrack 或环境变量 BKCRACK_PATH 指定路径", file=sys.stderr)
+        return 1
+    max_threads = args.threads or thread_settings.load(args.bkcrack)
+
+    specs = [{"archive": path, "mode": "matrix", "plains": args.plain} for path in args.archives]
+    if args.manifest:
+        specs.extend(load_manifest(args.manifest))
+    if not specs:
+        parser.error("请指定压缩包或 --manifest")
+
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    write_lock = threading.Lock()
+    failures = 0
+
+    key_store = None if args.no_cache else KeyStore()
+
+    def write(record):
+        with write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    def finish(group):
+        record = group_record(group)
+        if key_store and record["status"] == "found":
+            try:
+                if record.get("keys"):
+                    key_store.save_keys(group.spec["archive"], " ".join(record["keys"].split()).lower())
+                elif record.get("password"):
+                    key_store.save_password(" ".join(str(group.spec["keys"]).split()).lower(), record["password"])
+            except (OSError, sqlite3.Error) as e:
+                record["cache_error"] = str(e)
+        write(record)
+
+    groups = []
+    for index, spec in enumerate(specs):
+        job_id = spec.get("id", index)
+        cached = lookup_cache(key_store, spec)
+        if cached:
+            write(dict({"id": job_id, "archive": spec.get("archive"), "mode": spec.get("mode", "matrix"),
+                        "status": "cached"}, **cached))
+            continue
+        try:
+            attempts, hit_marker = build_spec_attempts(spec, args.bkcrack)
+        except (AttackSpecError, ValueError, OSError) as e:
+            failures += 1
+            write({"id": job_id, "archive": spec.get("archive"), "mode": spec.get("mode", "matrix"),
+                   "status": "error", "error": str(e)})
+            continue
+        groups.append(AttemptGroup(job_id, attempts, hit_marker, spec))
+
+    # 所有任务共用 workers 个进程，按实际同时运行的进程数分配线程(清单中指定了 threads 的除外)
+    concurrent = min(args.workers, sum(len(group.attempts) for group in groups))
+    for group in groups:
+        if "threads" not in group.spec:
+            group.attempts = assign_threads(group.attempts, concurrent, max_threads, args.bkcrack)
+
+    runner = BatchRunner(args.workers, checkpoints=None if args.no_resume else CheckpointStore(),
+                         ledger=None if args.no_ledger else Ledger(fingerprint=key_store.fingerprint if key_store else None))
+    try:
+        runner.run(groups, on_group_done=finish)
+    except KeyboardInterrupt:
+        # 子进程已被中断并写出检查点，再次运行相同清单即可继续
+        return 130
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""bkcrack-gui 的无界面核心逻辑
+
+这里的模块不依赖 Qt，图形界面(main.py)和命令行(cli.py)共用同一套
+命令构建、参数校验和输出解析逻辑。
+
+导入 core 本身几乎没有开销：下面列出的名称在第一次访问时才导入所在的子模块，
+只用到 zipmeta 的程序不会为 sqlite3、subprocess 等付出启动时间。
+"""
+import importlib
+
+_EXPORTS = {
+    'backend': ('BKCRACK', 'Backend', 'format_command', 'get_backend', 'resolve_bkcrack'),
+    'checkpoint': ('CheckpointRecorder', 'CheckpointStore', 'parse_checkpoint_line'),
+    'commands': ('PLAINS_DIR', 'AttackSpecError', 'build_attack_command', 'build_matrix_jobs',
+                 'build_recovery_jobs', 'parse_keys_line', 'parse_offset_range', 'plain_candidates',
+                 'parse_recovery_output', 'plan_recovery_shards',
+                 'build_spec_attempts', 'require_option', 'validate_entry'),
+    'feasibility': ('format_ranking', 'rank_entries', 'score_entry'),
+    'hexview': ('LineIndex', 'MappedFile', 'hex_rows', 'parse_offset', 'parse_pattern'),
+    'inflate': ('extract_entry_to', 'inflate_entry_file', 'inflate_to', 'iter_inflated'),
+    'inspection': ('InspectionCache', 'inspect_archive', 'parse_listing'),
+    'keystore': ('KeyStore', 'archive_fingerprint'),
+    'ledger': ('Ledger', 'RunRecord', 'format_summary', 'summarize', 'wait_child'),
+    'logbuffer': ('LogBuffer', 'RotatingLog', 'default_log_path'),
+    'nested': ('guess_inner_names', 'is_nested_zip', 'nested_zip_fragments'),
+    'progress': ('ProgressParser', 'ProgressTracker', 'format_eta'),
+    'runner': ('AttemptGroup', 'BatchRunner'),
+    'signatures': ('Signature', 'SignatureDB', 'SignatureError', 'load_signatures', 'suggest_offset'),
+    'threads': ('ThreadSettings', 'assign_threads', 'calibrate', 'split_threads', 'thread_args'),
+    'zipcrypto': ('check_entry', 'decrypt_entry_to', 'iter_decrypted', 'keys_from_password', 'parse_keys',
+                  'verify_candidates', 'verify_entry', 'verify_keys', 'write_decrypted_archive'),
+    'zipmeta': ('Entry', 'EntryIndex', 'EntryIndexCache', 'describe_version', 'detect_zip_creator', 'load_index',
+                'zip_os_name'),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
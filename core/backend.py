@@ -0,0 +1,190 @@
+"""bkcrack 可执行文件的定位与能力探测
+
+不同平台、不同版本的 bkcrack 文件名和支持的参数并不相同(例如较早的版本没有
+-j 和 --continue-attack)。Backend 负责找到可执行文件，并在第一次使用时运行
+bkcrack -h 解析出版本横幅和支持的参数，结果按 (路径, 大小, 修改时间) 缓存在
+本地数据目录下，换了 bkcrack 后自动重新探测。命令构建函数通过 Backend 生成
+参数列表，只输出已安装版本支持的可选参数；所有子进程都以参数列表启动，
+不经过 shell。
+"""
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from core.paths import data_dir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BKCRACK = "bkcrack.exe" if os.name == 'nt' else "bkcrack"
+# 指定 bkcrack 路径的环境变量
+BKCRACK_ENV = "BKCRACK_PATH"
+PROBE_TIMEOUT = 10
+
+VERSION_RE = re.compile(r'bkcrack\s+v?(\d+)\.(\d+)(?:\.(\d+))?')
+OPTION_RE = re.compile(r'(?:^|,\s*)(--?[A-Za-z][\w-]*)')
+
+
+def resolve_bkcrack(preferred=None):
+    """查找 bkcrack：preferred 或环境变量 BKCRACK_PATH > 程序目录 > PATH，找不到时返回 None"""
+    preferred = preferred or os.environ.get(BKCRACK_ENV)
+    if preferred:
+        if os.path.isfile(preferred):
+            return os.path.abspath(preferred)
+        return shutil.which(preferred)
+    for name in (BKCRACK, os.path.join("bin", BKCRACK)):
+        path = os.path.join(ROOT, name)
+        if os.path.isfile(path) and (os.name == 'nt' or os.access(path, os.X_OK)):
+            return path
+    return shutil.which("bkcrack")
+
+
+def format_command(command):
+    """把参数列表格式化为可以复制到终端执行的命令行"""
+    if os.name == 'nt':
+        return subprocess.list2cmdline([str(arg) for arg in command])
+    return shlex.join(str(arg) for arg in command)
+
+
+def parse_help(text):
+    """从 bkcrack -h 的输出中解析 (版本横幅, 版本号, 参数集合)"""
+    banner, version = None, None
+    options = set()
+    for line in text.splitlines():
+        stripped = line.strip()
+        if banner is None:
+            match = VERSION_RE.search(stripped)
+            if match:
+                banner = stripped
+                version = tuple(int(part or 0) for part in match.groups())
+                continue
+        if stripped.startswith('-'):
+            # " -c, --cipher-file <file>  说明" 只取行首的参数名
+            head = re.split(r'\s+(?=[^-,\s])', stripped, 1)[0]
+            options.update(OPTION_RE.findall(head))
+    return banner, version, options
+
+
+class Backend:
+    """一个 bkcrack 可执行文件及其支持的参数
+
+    options 为 None 表示无法探测(例如文件不存在或输出无法解析)，此时认为所有参数都受支持，
+    与探测功能出现之前的行为一致。
+    """
+
+    def __init__(self, path, banner=None, version=None, options=None):
+        self.path = path
+        self.banner = banner
+        self.version = tuple(version) if version else None
+        self.options = frozenset(options) if options is not None else None
+
+    @property
+    def available(self):
+        return bool(self.path) and os.path.isfile(self.path)
+
+    def supports(self, option):
+        return self.options is None or option in self.options
+
+    def command(self, *args):
+        """完整的参数列表(第一个元素为可执行文件)"""
+        return [self.path or BKCRACK, *(str(arg) for arg in args)]
+
+    def thread_args(self, threads):
+        """线程数参数；不支持 -j 的版本或未指定线程数时为空"""
+        return ["-j", str(threads)] if threads and self.supports("-j") else []
+
+    def describe(self):
+        if not self.path:
+            return "未找到 bkcrack"
+        return f"{self.banner or 'bkcrack(版本未知)'} [{self.path}]"
+
+
+class ProbeCache:
+    """按 (路径, 大小, 修改时间) 保存探测结果的 JSON 文件"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "backend.json")
+
+    def _load_all(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, bkcrack):
+        stat = os.stat(bkcrack)
+        record = self._load_all().get(bkcrack)
+        if record and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return record
+        return None
+
+    def save(self, bkcrack, banner, version, options):
+        stat = os.stat(bkcrack)
+        records = self._load_all()
+        records[bkcrack] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'banner': banner,
+                            'version': list(version) if version else None,
+                            'options': sorted(options) if options is not None else None, 'probed': time.time()}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def probe(bkcrack, cache=None):
+    """探测 bkcrack 的版本和支持的参数，返回 Backend"""
+    if not bkcrack or not os.path.isfile(bkcrack):
+        return Backend(bkcrack)
+    cache = cache or ProbeCache()
+    try:
+        record = cache.load(bkcrack)
+    except OSError:
+        record = None
+    if record:
+        return Backend(bkcrack, record['banner'], record['version'], record['options'])
+
+    try:
+        result = subprocess.run([bkcrack, "-h"], capture_output=True, text=True, encoding='utf-8',
+                                errors='replace', timeout=PROBE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return Backend(bkcrack)
+    banner, version, options = parse_help(result.stdout + "\n" + result.stderr)
+    if not options:
+        # 没有解析出参数表时不限制参数，也不缓存，下次重新探测
+        return Backend(bkcrack, banner, version)
+    try:
+        cache.save(bkcrack, banner, version, options)
+    except OSError as e:
+        print(f"无法保存 bkcrack 探测结果: {str(e)}", file=sys.stderr)
+    return Backend(bkcrack, banner, version, options)
+
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def get_backend(bkcrack=None):
+    """bkcrack 可以是 Backend、可执行文件路径/名称或 None(自动查找)；同一路径只探测一次"""
+    if isinstance(bkcrack, Backend):
+        return bkcrack
+    path = resolve_bkcrack(bkcrack) or bkcrack
+    with _lock:
+        backend = _backends.get(path)
+    if backend is not None:
+        return backend
+    # 探测要运行子进程，不能持有锁，否则其他线程查询已探测过的路径也要等待；
+    # 几个线程同时探测同一路径时以先发布的结果为准
+    backend = probe(path)
+    with _lock:
+        return _backends.setdefault(path, backend)
+
+
+def reset_backends():
+    """清空进程内的探测结果(例如换了 bkcrack 之后)"""
+    with _lock:
+        _backends.clear()
@@ -0,0 +1,164 @@
+"""长时间攻击和密码恢复的检查点
+
+bkcrack 被 SIGINT 中断时会输出可以继续的位置，例如
+"You may resume the attack with the option: --continue-attack 17281"，
+密码恢复则是 "--continue-recovery <十六进制>"。这些位置按命令保存在
+本地数据目录下，下次运行同一条命令时追加对应参数即可从检查点继续。
+
+无法正常中断时(例如 Windows 下直接结束进程、程序崩溃)，攻击阶段还会
+根据进度输出定期保存一个保守的检查点(已完成数减去安全余量)。
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from core.backend import get_backend
+from core.paths import data_dir
+
+CONTINUE_FLAGS = {'attack': '--continue-attack', 'recovery': '--continue-recovery'}
+RESUME_RE = re.compile(r'(--continue-attack|--continue-recovery)\s+(\S+)')
+
+
+def parse_checkpoint_line(line):
+    """从 bkcrack 输出行中提取检查点，返回 (类型, 值)，没有时返回 None"""
+    match = RESUME_RE.search(line)
+    if not match:
+        return None
+    kind = 'attack' if match.group(1) == CONTINUE_FLAGS['attack'] else 'recovery'
+    return kind, match.group(2)
+
+
+def _argv(command):
+    return command.split() if isinstance(command, str) else list(command)
+
+
+def strip_continue_flags(command):
+    """去掉命令中已有的继续参数，得到用于识别同一任务的命令"""
+    argv = _argv(command)
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg in CONTINUE_FLAGS.values():
+            skip = True
+            continue
+        result.append(arg)
+    return result
+
+
+def command_key(command):
+    """同一任务的标识；线程数(-j)不影响检查点位置，换线程数后仍可继续"""
+    argv = strip_continue_flags(command)
+    for index in range(len(argv) - 1, -1, -1):
+        if argv[index] == '-j':
+            del argv[index:index + 2]
+    return hashlib.sha1("\0".join(argv).encode('utf-8')).hexdigest()
+
+
+class CheckpointStore:
+    """以 JSON 文件保存每条命令的检查点"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(data_dir(), "checkpoints")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, command):
+        return os.path.join(self.directory, command_key(command) + ".json")
+
+    def load(self, command):
+        try:
+            with open(self._path(command), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, command, kind, value, source='bkcrack'):
+        record = {'command': strip_continue_flags(command), 'kind': kind, 'value': str(value),
+                  'source': source, 'updated': time.time()}
+        path = self._path(command)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return record
+
+    def clear(self, command):
+        try:
+            os.unlink(self._path(command))
+        except OSError:
+            pass
+
+    def resume_command(self, command):
+        """命令有检查点且 bkcrack 支持对应的继续参数时返回 (追加了继续参数的命令, 检查点)，
+        否则返回 (原命令, None)"""
+        record = self.load(command)
+        if not record:
+            return command, None
+        flag = CONTINUE_FLAGS[record['kind']]
+        if not get_backend(_argv(command)[0]).supports(flag):
+            return command, None
+        if isinstance(command, str):
+            resumed = " ".join(strip_continue_flags(command) + [flag, record['value']])
+        else:
+            resumed = strip_continue_flags(command) + [flag, record['value']]
+        return resumed, record
+
+    def records(self):
+        result = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                        result.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return result
+
+
+class CheckpointRecorder:
+    """跟随一个 bkcrack 进程的输出事件记录检查点(在读取输出的线程中调用)"""
+
+    def __init__(self, store, command, interval=5.0, margin=None):
+        self.store = store
+        self.command = command
+        self.interval = interval
+        # 多线程攻击时已完成数并不保证之前的候选全部完成，保留安全余量
+        self.margin = (os.cpu_count() or 1) * 2 if margin is None else margin
+        self.succeeded = False
+        self._stage = None
+        self._official = False
+        self._last_save = 0.0
+        # 从检查点继续时进度从该位置开始，基准不能低于它
+        record = store.load(command)
+        self._floor = int(record['value']) if record and record['kind'] == 'attack' else 0
+
+    def on_event(self, event):
+        try:
+            if event[0] == 'stage':
+                self._stage = event[1]
+                if event[1] in ('keys_found', 'password_found'):
+                    self.succeeded = True
+            elif event[0] == 'line':
+                checkpoint = parse_checkpoint_line(event[1])
+                if checkpoint:
+                    self.store.save(self.command, checkpoint[0], checkpoint[1], 'bkcrack')
+                    self._official = True
+            elif event[0] == 'progress' and self._stage == 'attack' and not self._official:
+                now = time.monotonic()
+                if now - self._last_save >= self.interval:
+                    self._last_save = now
+                    value = max(self._floor, event[1] - self.margin)
+                    if value > self._floor:
+                        self.store.save(self.command, 'attack', value, 'progress')
+        except OSError as e:
+            print(f"保存检查点失败: {str(e)}", file=sys.stderr)
+
+    def finish(self, completed):
+        """进程结束时调用；成功或完整跑完时删除检查点"""
+        if self.succeeded or completed:
+            self.store.clear(self.command)
@@ -0,0 +1,279 @@
+"""bkcrack 命令构建、参数校验与输出解析"""
+import os
+
+from core.backend import get_backend
+from core.nested import is_nested_zip, nested_zip_fragments
+from core.signatures import PLAINS_DIR, extract_args, load_signatures, longest_run, read_head
+from core.zipmeta import ENCRYPTION_ZIPCRYPTO, load_index
+
+
+class AttackSpecError(ValueError):
+    """攻击参数不正确；entries 不为空时附带压缩包内的条目列表以便提示"""
+
+    def __init__(self, message, entries=None, entries_title=None):
+        super().__init__(message)
+        self.entries = entries or []
+        self.entries_title = entries_title
+
+
+def validate_entry(zip_path, entry, role="目标文件", archive_label="加密压缩包"):
+    """确认条目存在于压缩包中，否则抛出 AttackSpecError"""
+    try:
+        index = load_index(zip_path)
+    except Exception as e:
+        raise AttackSpecError(f"无法验证{archive_label}内容: {str(e)}")
+    if entry not in index:
+        raise AttackSpecError(f"错误：{role} '{entry}' 不在{archive_label}中", index.names(),
+                              f"{archive_label}内文件列表:")
+
+
+def require_option(backend, option):
+    """已安装的 bkcrack 不支持 option 时抛出 AttackSpecError"""
+    if not backend.supports(option):
+        raise AttackSpecError(f"当前 bkcrack 不支持 {option} 参数: {backend.describe()}")
+
+
+def build_attack_command(zip_path, target, plain_file=None, plain_zip=None, plain_entry=None,
+                         offset=None, extra=None, bkcrack=None, threads=None):
+    """构建已知明文攻击命令
+
+    明文来源优先级与界面一致：明文压缩包(-P，可选 -p 指定其中的条目) > 明文文件(-p)。
+    extra 为 [(偏移, 十六进制)]，对应多个 -x 参数；只有 -x 时可以不提供明文。
+    threads 为 bkcrack 的线程数(-j)，为空或 bkcrack 不支持 -j 时使用 bkcrack 默认值。
+    bkcrack 为 Backend、可执行文件路径或 None(自动查找)。
+    """
+    if not zip_path:
+        raise AttackSpecError("请先选择加密压缩包(-C)")
+    validate_entry(zip_path, target)
+    backend = get_backend(bkcrack)
+    if extra:
+        require_option(backend, "-x")
+
+    command = backend.command("-C", zip_path, "-c", target)
+    if plain_zip:
+        # 使用明文压缩包(-P)
+        command.extend(["-P", plain_zip])
+        if plain_entry:
+            validate_entry(plain_zip, plain_entry, "明文文件", "明文压缩包")
+            command.extend(["-p", plain_entry])
+    elif plain_file:
+        # 使用单独的明文文件(-p)
+        if not os.path.exists(plain_file):
+            raise AttackSpecError(f"错误：明文文件 '{plain_file}' 不存在")
+        command.extend(["-p", plain_file])
+    elif not extra:
+        raise AttackSpecError("请提供明文文件(-p)或明文压缩包(-P)")
+
+    if offset not in (None, ''):
+        command.extend(["-o", str(offset)])
+    for x_offset, x_pattern in extra or []:
+        command.extend(["-x", str(x_offset).strip(), x_pattern.strip()])
+    command.extend(backend.thread_args(threads))
+    return command
+
+
+def parse_keys_line(line):
+    """从 "Keys: xxxxxxxx yyyyyyyy zzzzzzzz" 行中取出密钥，不是密钥行时返回 None"""
+    if "Keys:" not in line:
+        return None
+    return line.split(":", 1)[1].strip()
+
+
+def parse_offset_range(text):
+    """解析偏移范围，支持 "0..64"、"0..64:4"(步长) 以及 "0,6,64" 三种写法"""
+    offsets = []
+    for part in text.replace('，', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '..' in part:
+            bounds, _, step = part.partition(':')
+            start, end = bounds.split('..', 1)
+            step = int(step) if step.strip() else 1
+            if step <= 0:
+                raise ValueError("步长必须为正数")
+            offsets.extend(range(int(start), int(end) + 1, step))
+        else:
+            offsets.append(int(part))
+    # 去重并保持顺序
+    return list(dict.fromkeys(offsets))
+
+
+def plain_candidates(entry, signatures=None, extra_plains=()):
+    """可用于攻击某个条目的已知明文，按连续已知字节数从多到少排序
+
+    签名库和内层 ZIP 推算只用于存储(Store)条目(压缩条目中是压缩后的数据)；用户提供的明文对所有条目都尝试，
+    对存储条目它也是条目开头的已知字节，按文件头魔数补充条目名匹配不到的签名。
+    不足 12 字节已知明文或 8 字节连续明文(bkcrack 的下限)的组合会被过滤掉。
+    每项为 {'label', 'args', 'offset', 'contiguous', 'known'}，args 为 -p/-o 或 -x 参数。
+    """
+    # 明文对应的是加密数据流(去掉 12 字节加密头)
+    data_size = entry.compress_size - 12 if entry.encrypted else entry.file_size
+    candidates = []
+    heads = []
+    if entry.method == 0:
+        heads = [head for head in map(read_head, extra_plains) if head]
+        signatures = signatures or load_signatures()
+        for match in signatures.match_entry(entry.name, data_size, heads):
+            candidates.append({'label': match['signature'].id, 'args': match['args'],
+                               'offset': match['fragments'][0][0],
+                               'contiguous': match['contiguous'], 'known': match['known']})
+    if is_nested_zip(entry, heads):
+        # 存储的内层 ZIP：文件头和末尾 EOCD 的固定部分，内层只有一个文件时已知字节更多
+        for label, count in (("nested-zip-1", 1), ("nested-zip", None)):
+            fragments = nested_zip_fragments(data_size, count=count)
+            if fragments:
+                candidates.append({'label': label, 'args': extract_args(fragments), 'offset': fragments[0][0],
+                                   'contiguous': longest_run(fragments),
+                                   'known': sum(len(data) for _, data in fragments)})
+    for plain_path in extra_plains:
+        try:
+            plain_size = os.path.getsize(plain_path)
+        except OSError:
+            continue
+        known = min(plain_size, data_size)
+        candidates.append({'label': os.path.basename(plain_path), 'args': ["-p", plain_path],
+                           'offset': 0, 'contiguous': known, 'known': known})
+
+    candidates = [c for c in candidates if c['known'] >= 12 and c['contiguous'] >= 8]
+    candidates.sort(key=lambda c: (-c['contiguous'], -c['known']))
+    return candidates
+
+
+def build_matrix_jobs(zip_path, extra_plains=(), signatures=None, bkcrack=None, threads=None):
+    """枚举 (加密条目 × 已知明文) 组合，过滤掉不可能成功的组合并按预估代价排序
+
+    已知明文来自签名库(按条目名匹配)和用户提供的明文文件；连续已知字节越多攻击越快，
+    因此按连续已知字节数从多到少排序。bkcrack 不支持 -x 时只保留 -p 明文。
+    返回 [(标签, 命令, 条目名, 已知字节数)]。
+    """
+    signatures = signatures or load_signatures()
+    backend = get_backend(bkcrack)
+    candidates = []
+    for entry in load_index(zip_path):
+        # 只攻击传统 ZipCrypto 加密的条目
+        if entry.is_dir or entry.encryption != ENCRYPTION_ZIPCRYPTO:
+            continue
+        for candidate in plain_candidates(entry, signatures, extra_plains):
+            if "-x" in candidate['args'] and not backend.supports("-x"):
+                continue
+            candidates.append((candidate, entry.compress_size, entry.name))
+
+    candidates.sort(key=lambda c: (-c[0]['contiguous'], -c[0]['known'], c[1]))
+    jobs = []
+    for candidate, _, entry in candidates:
+        command = backend.command("-C", zip_path, "-c", entry, *candidate['args'], *backend.thread_args(threads))
+        jobs.append((f"{entry} × {candidate['label']}", command, entry, candidate['known']))
+    return jobs
+
+
+def plan_recovery_shards(length_range):
+    """把密码长度范围拆分为若干分片
+
+    bkcrack 的 -r 只接受长度范围和字符集，无法把同一字符集按位置拆开，
+    因此按长度分片：6 位及以下的长度代价很小，合并为一个分片，
+    更长的每个长度单独一个分片，由短到长排列以便尽早命中短密码。
+    返回 [(标签, -r 参数)]。
+    """
+    text = length_range.strip()
+    if '..' in text:
+        low, high = text.split('..', 1)
+        low = int(low) if low.strip() else 0
+        if not high.strip():
+            # 上限未知时无法拆分
+            return [(f"{low}..", f"{low}..")]
+        high = int(high)
+    else:
+        # bkcrack 中单个数字表示"最长为该长度"
+        low, high = 0, int(text)
+    if low < 0 or high < low:
+        raise ValueError("长度范围不正确")
+
+    shards = []
+    small_high = min(high, 6)
+    if low <= small_high:
+        shards.append((f"{low}..{small_high}", f"{low}..{small_high}"))
+    for length in range(max(low, small_high + 1), high + 1):
+        shards.append((str(length), f"{length}..{length}"))
+    return shards
+
+
+def build_recovery_jobs(key_parts, length_range, charset="?p", bkcrack=None, threads=None):
+    """按长度分片构建密码恢复命令，返回 [(标签, 命令)]"""
+    if len(key_parts) != 3:
+        raise AttackSpecError("密钥格式不正确，应为3个部分")
+    backend = get_backend(bkcrack)
+    require_option(backend, "-r")
+    return [(label, backend.command("-k", *key_parts, "-r", range_arg, charset, *backend.thread_args(threads)))
+            for label, range_arg in plan_recovery_shards(length_range)]
+
+
+def parse_recovery_output(lines):
+    """从 bkcrack -r 的输出中提取密码和十六进制表示"""
+    password = ""
+    hex_repr = ""
+    for line in lines:
+        # 优先从"as text:"行获取完整密码(包含空格)
+        if "as text:" in line:
+            password = line.split(":", 1)[1].strip().strip('"\'')
+        # 其次从"as bytes:"行获取十六进制表示
+        elif "as bytes:" in line:
+            hex_repr = line.split(":", 1)[1].strip()
+        # 最后从"Password:"行获取(如果没有找到其他来源)
+        elif "Password:" in line and not password:
+            password = line.split(":", 1)[1].strip()
+
+    # 确保从十六进制还原密码(最准确)
+    if hex_repr:
+        try:
+            # 从十六进制字符串还原密码(包含空格)
+            password_bytes = bytes.fromhex("".join(hex_repr.split()))
+            password = password_bytes.decode('utf-8', errors='replace')
+        except ValueError:
+            pass
+    return password, hex_repr
+
+
+def build_spec_attempts(spec, bkcrack=None, threads=None):
+    """把一条攻击描述(命令行清单中的一行)展开为互相竞争的命令
+
+    spec 的 mode 字段:
+      attack  - 单次攻击: target + plain / plain_zip(+plain_entry) / extra，可选 offset
+      sweep   - 同 attack，但在 offsets 范围内逐个偏移并行尝试
+      matrix  - 所有加密条目 × 签名库及 plains 字段中的明文
+      recover - 使用 keys 按 length 范围恢复密码，可选 charset
+    spec 中的 threads 字段优先于 threads 参数。
+    返回 ([(标签, 命令)], 命中标记)。
+    """
+    threads = spec.get("threads", threads)
+    mode = spec.get("mode", "matrix")
+    archive = spec.get("archive")
+    if mode in ("attack", "sweep", "matrix") and (not archive or not os.path.isfile(archive)):
+        raise AttackSpecError(f"加密压缩包不存在: {archive}")
+
+    if mode in ("attack", "sweep"):
+        extra = [tuple(pair) for pair in spec.get("extra", [])]
+        base = build_attack_command(archive, spec.get("target", ""), plain_file=spec.get("plain"),
+                                    plain_zip=spec.get("plain_zip"), plain_entry=spec.get("plain_entry"),
+                                    extra=extra, bkcrack=bkcrack, threads=threads)
+        if mode == "attack":
+            command = list(base)
+            if spec.get("offset") not in (None, ''):
+                command.extend(["-o", str(spec["offset"])])
+            return [("attack", command)], "Keys:"
+        offsets = parse_offset_range(str(spec.get("offsets", "")))
+        if not offsets:
+            raise AttackSpecError("偏移范围为空")
+        return [(str(offset), base + ["-o", str(offset)]) for offset in offsets], "Keys:"
+
+    if mode == "matrix":
+        jobs = build_matrix_jobs(archive, spec.get("plains", []), bkcrack=bkcrack, threads=threads)
+        return [(label, command) for label, command, _, _ in jobs], "Keys:"
+
+    if mode == "recover":
+        key_parts = str(spec.get("keys", "")).split()
+        jobs = build_recovery_jobs(key_parts, str(spec.get("length", "")), spec.get("charset", "?p"), bkcrack,
+                                   threads)
+        return jobs, "Password"
+
+    raise AttackSpecError(f"未知的攻击模式: {mode}")
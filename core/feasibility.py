@@ -0,0 +1,77 @@
+"""加密条目的攻击可行性评估
+
+根据中央目录(压缩方式、大小)和已知明文签名库中按条目名匹配的签名，
+估算每个 ZipCrypto 条目可用的连续已知字节数、总已知字节数和相对攻击代价，
+让用户直接选择最容易攻击的条目，而不是逐个猜。
+"""
+from core.commands import plain_candidates
+from core.signatures import load_signatures
+from core.zipmeta import ENCRYPTION_ZIPCRYPTO, load_index
+
+# bkcrack 的攻击要求：至少 12 字节已知明文，其中至少 8 字节连续
+MIN_KNOWN = 12
+MIN_CONTIGUOUS = 8
+# Z 缩减阶段开始时的候选数(2^22)；经验上连续已知字节每多 2 字节剩余候选约减半，
+# 到 2^10 左右后主要受其他阶段限制，不再继续下降
+BASE_CANDIDATES = 1 << 22
+MIN_CANDIDATES = 1 << 10
+
+
+def estimate_candidates(contiguous):
+    """估算 Z 缩减后剩余的候选数，作为攻击代价的近似(已知明文不足时返回 None)"""
+    if contiguous < MIN_CONTIGUOUS:
+        return None
+    return max(MIN_CANDIDATES, BASE_CANDIDATES >> max(0, (contiguous - MIN_KNOWN) // 2))
+
+
+def score_entry(entry, signatures=None, extra_plains=()):
+    """评估单个条目，返回最佳明文对应的评估结果(dict)"""
+    result = {'name': entry.name, 'compression': entry.compression, 'size': entry.file_size,
+              'compress_size': entry.compress_size, 'plain': None, 'offset': 0, 'args': [],
+              'contiguous': 0, 'known': 0, 'cost': None, 'feasible': False, 'reason': ''}
+    if entry.encryption != ENCRYPTION_ZIPCRYPTO:
+        result['reason'] = "未加密" if not entry.encrypted else f"{entry.encryption_name} 加密，无法攻击"
+        return result
+
+    candidates = plain_candidates(entry, signatures, extra_plains)
+    if not candidates:
+        if entry.method != 0:
+            result['reason'] = "压缩条目，签名库不适用，需要已知的压缩后数据"
+        else:
+            result['reason'] = "签名库中没有匹配的格式，或已知字节不足"
+        return result
+
+    best = candidates[0]
+    result.update(plain=best['label'], offset=best['offset'], args=best['args'], contiguous=best['contiguous'],
+                  # 加密头的最后一个字节(CRC 或时间的高字节)也是已知的，bkcrack 会自动使用
+                  known=best['known'] + 1, cost=estimate_candidates(best['contiguous']), feasible=True)
+    return result
+
+
+def rank_entries(zip_path, extra_plains=(), signatures=None):
+    """评估压缩包中所有加密条目，按可行性和代价排序(最适合攻击的在最前)
+
+    相对代价以最佳条目为 1；无法攻击的条目排在最后并给出原因。
+    """
+    signatures = signatures or load_signatures()
+    results = [score_entry(entry, signatures, extra_plains)
+               for entry in load_index(zip_path) if not entry.is_dir and entry.encrypted]
+    results.sort(key=lambda r: (not r['feasible'], r['cost'] or 0, -r['known'], r['compress_size']))
+    best_cost = results[0]['cost'] if results and results[0]['feasible'] else None
+    for result in results:
+        result['relative_cost'] = result['cost'] / best_cost if best_cost and result['cost'] else None
+    return results
+
+
+def format_ranking(results):
+    """把评估结果格式化为多行文本"""
+    lines = []
+    for rank, result in enumerate(results, 1):
+        if result['feasible']:
+            lines.append(f"{rank}. {result['name']} ({result['compression']}, {result['size']} 字节) "
+                         f"- 明文 {result['plain']} 偏移 {result['offset']}，"
+                         f"连续已知 {result['contiguous']} 字节，总已知 {result['known']} 字节，"
+                         f"相对代价 x{result['relative_cost']:.0f}")
+        else:
+            lines.append(f"{rank}. {result['name']} ({result['compression']}, {result['size']} 字节) - {result['reason']}")
+    return lines
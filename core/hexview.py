@@ -0,0 +1,176 @@
+"""大文件的十六进制/文本浏览模型
+
+文件通过 mmap 映射，界面只请求当前可见的若干行，内存占用与文件大小无关。
+文本模式用稀疏的行索引(每个数据块的起始行号)定位任意一行，建立索引时只
+统计换行符数量，不保存每一行的偏移。
+"""
+import array
+import bisect
+import mmap
+import os
+import re
+
+HEX_WIDTH = 16
+# 文本模式单行最多显示的字节数，超长的行截断显示
+MAX_LINE_BYTES = 4096
+# 行索引的块大小：每块只记录起始行号
+INDEX_BLOCK = 1 << 16
+
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7F else 0x2E for b in range(256))
+
+
+class MappedFile:
+    """只读映射的文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # 空文件不能映射
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+
+    def read(self, offset, length):
+        offset = max(0, min(offset, self.size))
+        return self._map[offset:offset + length]
+
+    def find(self, pattern, start=0):
+        """从 start 开始查找字节串，找不到时返回 -1"""
+        if not pattern:
+            return -1
+        return self._map.find(pattern, max(0, start))
+
+    def rfind(self, pattern, end=None):
+        """在 end 之前查找字节串，找不到时返回 -1"""
+        if not pattern:
+            return -1
+        return self._map.rfind(pattern, 0, self.size if end is None else max(0, end))
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def hex_row_count(size, width=HEX_WIDTH):
+    return (size + width - 1) // width
+
+
+def format_hex_row(offset, data, width=HEX_WIDTH):
+    """一行十六进制：偏移、按 8 字节分组的十六进制、可打印字符"""
+    half = width // 2
+    hex_part = data[:half].hex(' ')
+    if len(data) > half:
+        hex_part += '  ' + data[half:].hex(' ')
+    return f"{offset:010x}  {hex_part:<{width * 3}}|{data.translate(_PRINTABLE).decode('ascii')}|"
+
+
+def hex_rows(mapped, first, count, width=HEX_WIDTH):
+    """第 first 行开始的 count 行十六进制文本"""
+    start = first * width
+    data = mapped.read(start, count * width)
+    return [format_hex_row(start + i, data[i:i + width], width) for i in range(0, len(data), width)]
+
+
+class LineIndex:
+    """文本行的稀疏索引：blocks[i] 为第 i 个数据块之前的换行符数量
+
+    建立索引要顺序读完整个文件，可以在后台线程中进行；cancelled 返回真时
+    放弃建立并抛出 InterruptedError。
+    """
+
+    def __init__(self, mapped, block=INDEX_BLOCK, cancelled=None):
+        self.mapped = mapped
+        self.block = block
+        self.blocks = array.array('Q')
+        lines = 0
+        for start in range(0, mapped.size, block):
+            if cancelled and cancelled():
+                raise InterruptedError("建立行索引已取消")
+            self.blocks.append(lines)
+            lines += mapped.read(start, block).count(b"\n")
+        # 最后一行没有换行符时也算一行
+        ends_with_newline = mapped.size == 0 or mapped.read(mapped.size - 1, 1) == b"\n"
+        self.count = lines + (0 if ends_with_newline else 1)
+
+    def line_start(self, n):
+        """第 n 行(从 0 开始)的起始偏移"""
+        if n <= 0:
+            return 0
+        # 第 n 行从第 n 个换行符之后开始
+        i = bisect.bisect_right(self.blocks, n - 1) - 1
+        position = i * self.block
+        remaining = n - self.blocks[i]
+        while remaining:
+            found = self.mapped.find(b"\n", position)
+            if found < 0:
+                return self.mapped.size
+            position = found + 1
+            remaining -= 1
+        return position
+
+    def line_of(self, offset):
+        """偏移所在的行号"""
+        if not self.blocks:
+            return 0
+        offset = max(0, min(offset, self.mapped.size))
+        i = min(offset // self.block, len(self.blocks) - 1)
+        start = i * self.block
+        return self.blocks[i] + self.mapped.read(start, offset - start).count(b"\n")
+
+    def lines(self, first, count, encoding='utf-8'):
+        """第 first 行开始的 count 行文本(超长的行截断)"""
+        rows = []
+        position = self.line_start(first)
+        for _ in range(count):
+            if position >= self.mapped.size:
+                break
+            data = self.mapped.read(position, MAX_LINE_BYTES + 1)
+            end = data.find(b"\n")
+            if end < 0:
+                end = min(len(data), MAX_LINE_BYTES)
+                following = self.mapped.find(b"\n", position + end)
+                next_position = self.mapped.size if following < 0 else following + 1
+                suffix = " …" if next_position - position > end + 1 else ""
+            else:
+                next_position = position + end + 1
+                suffix = ""
+            rows.append(data[:end].rstrip(b"\r").decode(encoding, errors='replace') + suffix)
+            position = next_position
+        return rows
+
+
+def looks_like_text(head):
+    """根据文件开头判断是否为文本(UTF-8 解码成功且没有 NUL)"""
+    if b"\0" in head:
+        return False
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # 结尾被截断的多字节字符不算错误
+        return e.start >= len(head) - 3
+    return True
+
+
+_HEX_RE = re.compile(r'^(?:[0-9a-fA-F]{2}\s*)+$')
+
+
+def parse_pattern(text):
+    """查找内容：引号括起的按文本查找，合法的十六进制按字节查找，其余按 UTF-8 文本查找"""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1].encode('utf-8')
+    if _HEX_RE.match(text):
+        return bytes.fromhex(text)
+    return text.encode('utf-8')
+
+
+def parse_offset(text):
+    """跳转偏移：十进制或 0x 开头的十六进制"""
+    text = text.strip().lower()
+    return int(text, 16) if text.startswith('0x') else int(text)
@@ -0,0 +1,124 @@
+"""解密后的压缩数据流式解压
+
+bkcrack -d 和进程内解密得到的是条目的压缩数据(Deflate 等)，这里用 zlib/bz2
+的增量解压器边读边解压直接写到目标文件，同时计算 CRC-32 并与中央目录比对，
+不需要再用 -U 重新加密整个压缩包交给 7-Zip 解压。每次输出不超过一个块，
+内存占用与文件大小无关。
+"""
+import bz2
+import os
+import zlib
+
+from core.zipcrypto import CHUNK_SIZE, iter_decrypted
+
+METHOD_STORE = 0
+METHOD_DEFLATE = 8
+METHOD_BZIP2 = 12
+SUPPORTED_METHODS = (METHOD_STORE, METHOD_DEFLATE, METHOD_BZIP2)
+
+
+def can_inflate(method):
+    return method in SUPPORTED_METHODS
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """逐块读取文件(例如 bkcrack -d 的输出)"""
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+def _inflate_zlib(chunks, chunk_size):
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    for data in chunks:
+        # 限制每次输出的大小，高压缩比的数据也不会一次展开到内存中
+        while data and not decompressor.eof:
+            try:
+                out = decompressor.decompress(data, chunk_size)
+            except zlib.error as e:
+                raise ValueError(f"Deflate 数据损坏: {e}")
+            if out:
+                yield out
+            data = decompressor.unconsumed_tail
+        if decompressor.eof:
+            return
+    while not decompressor.eof:
+        try:
+            out = decompressor.flush()
+        except zlib.error as e:
+            raise ValueError(f"Deflate 数据损坏: {e}")
+        if not out:
+            break
+        yield out
+    if not decompressor.eof:
+        raise ValueError("Deflate 数据不完整")
+
+
+def _inflate_bz2(chunks, chunk_size):
+    decompressor = bz2.BZ2Decompressor()
+    for data in chunks:
+        while not decompressor.eof:
+            try:
+                out = decompressor.decompress(data, chunk_size)
+            except OSError as e:
+                raise ValueError(f"BZip2 数据损坏: {e}")
+            if out:
+                yield out
+            data = b""
+            if decompressor.needs_input:
+                break
+        if decompressor.eof:
+            return
+    raise ValueError("BZip2 数据不完整")
+
+
+def iter_inflated(chunks, method, crc=None, size=None, chunk_size=CHUNK_SIZE):
+    """把压缩数据块解压为原始数据块；数据损坏或给出的 crc/size 在结束时不一致都抛出 ValueError"""
+    if method == METHOD_STORE:
+        stream = chunks
+    elif method == METHOD_DEFLATE:
+        stream = _inflate_zlib(chunks, chunk_size)
+    elif method == METHOD_BZIP2:
+        stream = _inflate_bz2(chunks, chunk_size)
+    else:
+        raise ValueError(f"不支持的压缩方式: {method}")
+    actual_crc = 0
+    actual_size = 0
+    for data in stream:
+        actual_crc = zlib.crc32(data, actual_crc)
+        actual_size += len(data)
+        yield data
+    if size is not None and actual_size != size:
+        raise ValueError(f"解压后大小不一致: {actual_size} != {size}")
+    if crc is not None and actual_crc != crc:
+        raise ValueError(f"CRC 校验失败: {actual_crc:08x} != {crc:08x}")
+
+
+def inflate_to(chunks, method, output_path, crc=None, size=None):
+    """解压并写到文件，校验失败时不留下输出文件；返回写入的字节数"""
+    written = 0
+    temp_path = output_path + ".part"
+    try:
+        with open(temp_path, 'wb') as out:
+            for data in iter_inflated(chunks, method, crc, size):
+                out.write(data)
+                written += len(data)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return written
+
+
+def inflate_entry_file(entry, raw_path, output_path):
+    """把 bkcrack -d 输出的条目数据解压到 output_path(校验 CRC)，返回写入的字节数"""
+    return inflate_to(read_chunks(raw_path), entry.method, output_path, entry.crc, entry.file_size)
+
+
+def extract_entry_to(index, i, keys, output_path):
+    """在进程内解密并解压第 i 个条目到 output_path(校验 CRC)，返回写入的字节数"""
+    entry = index.entry(i)
+    return inflate_to(iter_decrypted(index, i, keys), entry.method, output_path, entry.crc, entry.file_size)
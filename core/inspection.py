@@ -0,0 +1,109 @@
+"""压缩包检查结果缓存
+
+一次检查包括 bkcrack -L 的输出及解析后的条目表、每个条目的压缩方式、
+条目名列表和创建者信息；bkcrack 不支持 -L 时只使用中央目录中的信息。结果按绝对路径缓存，并记录文件大小和修改时间，
+文件发生变化时自动失效。
+"""
+import collections
+import os
+import re
+import subprocess
+import threading
+
+from core.backend import get_backend
+from core.zipmeta import detect_zip_creator, load_index
+
+# bkcrack -L 的条目行: 序号 加密方式 压缩方式 CRC32 原始大小 打包大小 名称
+LISTING_ROW = re.compile(
+    r'^\s*(\d+)\s+(\S+)\s+(\S+)\s+([0-9A-Fa-f]{8})\s+(\d+)\s+(\d+)\s(.*)$')
+
+
+def parse_listing(stdout):
+    """解析 bkcrack -L 输出的条目表"""
+    entries = []
+    for line in stdout.splitlines():
+        match = LISTING_ROW.match(line)
+        if not match:
+            continue
+        index, encryption, compression, crc, size, packed, name = match.groups()
+        entries.append({
+            'index': int(index),
+            'encryption': encryption,
+            'compression': compression.lower(),
+            'crc': int(crc, 16),
+            'size': int(size),
+            'packed_size': int(packed),
+            'name': name.strip(),
+        })
+    return entries
+
+
+def inspect_archive(zip_path, run=None, bkcrack=None):
+    """检查压缩包，run 为执行命令的函数(默认 subprocess.run，后台任务中可传入 job.run)"""
+    backend = get_backend(bkcrack)
+    if not backend.supports("-L"):
+        result = subprocess.CompletedProcess([], 0, "", "")
+    elif run is None:
+        result = subprocess.run(backend.command("-L", zip_path), capture_output=True, text=True,
+                                encoding='utf-8', errors='replace')
+    else:
+        result = run(backend.command("-L", zip_path), text=True, encoding='utf-8', errors='replace')
+    info = {'returncode': result.returncode, 'stdout': result.stdout, 'stderr': result.stderr,
+            'entries': [], 'compression': {}, 'file_list': None, 'list_error': None,
+            'creator_info': None, 'creator_error': None}
+    if result.returncode != 0:
+        return info
+
+    info['entries'] = parse_listing(result.stdout)
+    info['compression'] = {entry['name']: entry['compression'] for entry in info['entries']}
+
+    try:
+        index = load_index(zip_path)
+        info['file_list'] = index.names()
+        # 以中央目录中的压缩方式为准，bkcrack -L 的解析结果只作补充
+        for entry in index:
+            info['compression'][entry.name] = entry.compression
+    except Exception as e:
+        info['list_error'] = str(e)
+
+    try:
+        info['creator_info'] = detect_zip_creator(zip_path)
+    except Exception as e:
+        info['creator_error'] = str(e)
+    return info
+
+
+class InspectionCache:
+    """按 (路径, 大小, 修改时间) 缓存检查结果，可在多个线程中使用"""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # 绝对路径 -> ((大小, 修改时间), 结果)
+        self._lock = threading.Lock()
+
+    def get(self, zip_path, run=None, bkcrack=None):
+        """返回 (结果, 是否命中缓存)"""
+        key = os.path.abspath(zip_path)
+        stat = os.stat(key)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == stamp:
+                self._entries.move_to_end(key)
+                return cached[1], True
+
+        info = inspect_archive(zip_path, run, bkcrack)
+        if info['returncode'] == 0:
+            with self._lock:
+                self._entries[key] = (stamp, info)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return info, False
+
+    def invalidate(self, zip_path=None):
+        with self._lock:
+            if zip_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(zip_path), None)
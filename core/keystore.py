@@ -0,0 +1,108 @@
+"""已恢复密钥和密码的本地缓存(SQLite)
+
+压缩包以"内容哈希 + 文件大小 + 条目 CRC 列表"作为身份标识，
+同一个压缩包换了路径或文件名也能命中。计算内容哈希需要读完整个文件，
+因此按 (路径, 大小, 修改时间) 记住已经算过的指纹。
+"""
+import contextlib
+import hashlib
+import os
+import sqlite3
+import time
+
+from core.paths import data_dir
+from core.zipmeta import load_index
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    fingerprint TEXT PRIMARY KEY,
+    path TEXT,
+    size INTEGER,
+    keys TEXT,
+    password TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    fingerprint TEXT
+);
+"""
+
+
+def archive_fingerprint(zip_path, chunk_size=1 << 20):
+    """计算压缩包的身份指纹"""
+    content = hashlib.sha256()
+    with open(zip_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            content.update(chunk)
+    size = os.path.getsize(zip_path)
+    try:
+        crcs = ",".join(f"{crc:08x}" for crc in load_index(zip_path).crcs())
+    except ValueError:
+        crcs = ""
+    identity = f"{content.hexdigest()}:{size}:{crcs}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+class KeyStore:
+    """按压缩包指纹保存恢复出的密钥和密码，可在多个线程中使用"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "keys.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """打开连接，块正常结束时提交(出错时回滚)，随后关闭连接"""
+        with contextlib.closing(sqlite3.connect(self.path, timeout=10)) as conn, conn:
+            yield conn
+
+    def fingerprint(self, zip_path):
+        """返回压缩包指纹，文件未改动时直接使用记住的结果"""
+        zip_path = os.path.abspath(zip_path)
+        stat = os.stat(zip_path)
+        with self._connect() as conn:
+            row = conn.execute("SELECT size, mtime_ns, fingerprint FROM fingerprints WHERE path = ?",
+                               (zip_path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        fingerprint = archive_fingerprint(zip_path)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)",
+                         (zip_path, stat.st_size, stat.st_mtime_ns, fingerprint))
+        return fingerprint
+
+    def lookup(self, zip_path):
+        """查询压缩包的缓存记录，返回 {'keys', 'password'}，未命中时返回 None"""
+        fingerprint = self.fingerprint(zip_path)
+        with self._connect() as conn:
+            row = conn.execute("SELECT keys, password FROM archives WHERE fingerprint = ?",
+                               (fingerprint,)).fetchone()
+        if not row or not row[0]:
+            return None
+        return {'keys': row[0], 'password': row[1]}
+
+    def save_keys(self, zip_path, keys):
+        fingerprint = self.fingerprint(zip_path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO archives (fingerprint, path, size, keys, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(fingerprint) DO UPDATE SET path = excluded.path, keys = excluded.keys, "
+                "updated = excluded.updated",
+                (fingerprint, os.path.abspath(zip_path), os.path.getsize(zip_path), keys, time.time()))
+
+    def save_password(self, keys, password):
+        """为所有使用这组密钥的压缩包记录密码"""
+        with self._connect() as conn:
+            conn.execute("UPDATE archives SET password = ?, updated = ? WHERE keys = ?",
+                         (password, time.time(), keys))
+
+    def password_for_keys(self, keys):
+        with self._connect() as conn:
+            row = conn.execute("SELECT password FROM archives WHERE keys = ? AND password IS NOT NULL",
+                               (keys,)).fetchone()
+        return row[0] if row else None
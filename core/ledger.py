@@ -0,0 +1,326 @@
+"""攻击、密码恢复和导出任务的运行记录(JSON Lines)
+
+每个 bkcrack 进程(以及进程内完成的导出)结束后向本地数据目录下的
+ledger.jsonl 追加一行记录：压缩包指纹、目标条目、明文长度、偏移、各阶段
+耗时、子进程峰值内存、返回码和找到的密钥。summarize() 按策略(来源 + 明文
++ 偏移等)汇总成功率和耗时，用来判断哪些攻击方式在实际使用中最划算。
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from core.commands import parse_keys_line, parse_recovery_output
+from core.keystore import archive_fingerprint
+from core.paths import data_dir
+from core.zipmeta import load_index
+
+# ru_maxrss 在 macOS 上以字节为单位，其余 POSIX 系统为 KiB
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+GROUP_FIELDS = ('strategy', 'source', 'fingerprint', 'entry', 'plain', 'offset', 'engine')
+
+
+def default_ledger_path():
+    return os.path.join(data_dir(), "ledger.jsonl")
+
+
+def _windows_peak_rss(process):
+    """Windows 下读取进程句柄的峰值工作集(字节)"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(int(process._handle), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except (AttributeError, OSError, ValueError):
+        pass
+    return None
+
+
+def wait_child(process, timeout=None):
+    """等待子进程结束并回收，返回 (返回码, 峰值内存字节数)
+
+    POSIX 下用 wait4 同时取得子进程的资源占用，Windows 下读取峰值工作集；
+    取不到时峰值内存为 None。timeout 秒后仍未结束时返回 (None, None)。
+    """
+    if not hasattr(os, 'wait4'):
+        try:
+            returncode = process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            return None, None
+        return returncode, _windows_peak_rss(process)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while process.returncode is None:
+        try:
+            pid, status, usage = os.wait4(process.pid, 0 if deadline is None else os.WNOHANG)
+        except ChildProcessError:
+            # 已被其他线程回收(例如 poll())
+            return process.wait(), None
+        if pid:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            return process.returncode, usage.ru_maxrss * RSS_UNIT
+        if time.monotonic() >= deadline:
+            return None, None
+        time.sleep(0.05)
+    return process.returncode, None
+
+
+def communicate_child(process):
+    """读完子进程的 stdout/stderr 后回收，返回 (stdout, stderr, 返回码, 峰值内存)"""
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    reader.start()
+    stdout = process.stdout.read()
+    reader.join()
+    process.stdout.close()
+    process.stderr.close()
+    returncode, peak_rss = wait_child(process)
+    return stdout, stderr[0] if stderr else None, returncode, peak_rss
+
+
+def _plain_length(plain, plain_zip):
+    try:
+        if plain_zip:
+            index = load_index(plain_zip)
+            i = index.find(plain)
+            return index.entry(i).file_size if i >= 0 else None
+        return os.path.getsize(plain) if os.path.isfile(plain) else None
+    except (OSError, ValueError):
+        return None
+
+
+def describe_command(command):
+    """从 bkcrack 命令中提取要记录的参数"""
+    if command is None:
+        return {'engine': 'builtin'}
+    argv = command.split() if isinstance(command, str) else [str(arg) for arg in command]
+    info = {'engine': 'bkcrack', 'archive': None, 'entry': None, 'plain': None, 'plain_length': None,
+            'extra_length': 0, 'offset': None, 'threads': None, 'resumed': False}
+    plain, plain_zip = None, None
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        value = argv[i + 1] if i + 1 < len(argv) else None
+        if arg == '-C':
+            info['archive'] = value
+        elif arg == '-c':
+            info['entry'] = value
+        elif arg == '-p':
+            plain = value
+        elif arg == '-P':
+            plain_zip = value
+        elif arg == '-o':
+            try:
+                info['offset'] = int(value)
+            except (TypeError, ValueError):
+                info['offset'] = value
+        elif arg == '-j':
+            info['threads'] = int(value) if value and value.isdigit() else value
+        elif arg == '-x' and i + 2 < len(argv):
+            info['extra_length'] += len(argv[i + 2]) // 2
+            i += 3
+            continue
+        elif arg == '-r' and i + 2 < len(argv):
+            info['recovery'] = f"{argv[i + 1]} {argv[i + 2]}"
+            i += 3
+            continue
+        elif arg in ('--continue-attack', '--continue-recovery'):
+            info['resumed'] = True
+        elif arg == '-k':
+            i += 4
+            continue
+        elif arg in ('-d', '-D', '-U'):
+            info['output'] = value
+        else:
+            i += 1
+            continue
+        i += 2
+    if plain:
+        info['plain'] = os.path.basename(plain)
+        info['plain_length'] = _plain_length(plain, plain_zip)
+    return info
+
+
+class RunRecord:
+    """跟随一次运行的输出事件收集运行记录(在读取输出的线程中调用)"""
+
+    def __init__(self, command, source, label=None, **fields):
+        self.started = time.time()
+        self.data = {'time': round(self.started, 3), 'source': source, 'label': label}
+        self.data.update(describe_command(command))
+        self.data.update(fields)
+        self.stages = {}
+        self.keys = None
+        self._stage = 'startup'
+        self._stage_started = time.monotonic()
+        self._password_lines = None
+
+    def _close_stage(self, now):
+        self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._stage_started
+        self._stage_started = now
+
+    def on_event(self, event):
+        if event[0] == 'stage':
+            if event[1] == self._stage:
+                return
+            self._close_stage(time.monotonic())
+            self._stage = event[1]
+            if event[1] == 'password_found':
+                self._password_lines = []
+        elif event[0] == 'line':
+            key = parse_keys_line(event[1])
+            if key:
+                self.keys = " ".join(key.split()).lower()
+            if self._password_lines is not None:
+                self._password_lines.append(event[1])
+
+    def finish(self, returncode, peak_rss=None, stopped=False, status=None):
+        """结束记录，返回要写入运行记录的字典"""
+        self._close_stage(time.monotonic())
+        password = parse_recovery_output(self._password_lines)[0] if self._password_lines else ""
+        if status is None:
+            if self.keys or password:
+                status = 'success'
+            elif stopped:
+                status = 'stopped'
+            else:
+                status = 'miss' if returncode == 0 else 'failed'
+        self.data.update(
+            duration=round(time.time() - self.started, 3),
+            stages={name: round(seconds, 3) for name, seconds in self.stages.items()},
+            peak_rss=peak_rss, exit=returncode, status=status, keys=self.keys,
+            password_length=len(password) if password else None)
+        return self.data
+
+
+def strategy_of(record):
+    """攻击策略的简短描述，例如 "attack p=png_plain o=0" """
+    parts = [record.get('source') or '?']
+    if record.get('plain'):
+        parts.append(f"p={record['plain']}")
+    if record.get('extra_length'):
+        parts.append(f"x={record['extra_length']}B")
+    if record.get('offset') is not None:
+        parts.append(f"o={record['offset']}")
+    if record.get('recovery'):
+        parts.append(f"r={record['recovery']}")
+    if record.get('engine') == 'builtin':
+        parts.append("builtin")
+    return " ".join(parts)
+
+
+class Ledger:
+    """以 JSON Lines 追加保存运行记录，可在多个线程中使用
+
+    fingerprint 为计算压缩包指纹的函数(例如 KeyStore.fingerprint)，默认每个文件计算一次。
+    """
+
+    def __init__(self, path=None, fingerprint=None):
+        self.path = path or default_ledger_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._fingerprint = fingerprint or archive_fingerprint
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, zip_path):
+        try:
+            stat = os.stat(zip_path)
+            key = (os.path.abspath(zip_path), stat.st_size, stat.st_mtime_ns)
+            if key not in self._fingerprints:
+                self._fingerprints[key] = self._fingerprint(zip_path)
+            return self._fingerprints[key]
+        except Exception:
+            return None
+
+    def append(self, record):
+        """追加一条记录；写入失败只打印错误，不影响任务本身"""
+        if record.get('archive') and not record.get('fingerprint'):
+            record['fingerprint'] = self.fingerprint(record['archive'])
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            print(f"写入运行记录失败: {str(e)}", file=sys.stderr)
+        return record
+
+    def records(self, since=None, archive=None, source=None):
+        """读取记录；archive 可以是压缩包路径或指纹，损坏的行被跳过"""
+        fingerprint = None
+        if archive and os.path.isfile(archive):
+            fingerprint = self.fingerprint(archive)
+        result = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since is not None and record.get('time', 0) < since:
+                        continue
+                    if source and record.get('source') != source:
+                        continue
+                    if archive and archive not in (record.get('fingerprint'), record.get('archive')) \
+                            and (fingerprint is None or record.get('fingerprint') != fingerprint):
+                        continue
+                    result.append(record)
+        except FileNotFoundError:
+            pass
+        return result
+
+
+def summarize(records, by='strategy'):
+    """按 by 字段(见 GROUP_FIELDS)汇总：运行次数、成功率、耗时和峰值内存
+
+    成功率高、成功时耗时短的排在前面。
+    """
+    if by not in GROUP_FIELDS:
+        raise ValueError(f"不支持的汇总字段: {by}")
+    groups = {}
+    for record in records:
+        key = strategy_of(record) if by == 'strategy' else record.get(by)
+        groups.setdefault(key, []).append(record)
+    rows = []
+    for key, items in groups.items():
+        succeeded = [r for r in items if r.get('status') == 'success']
+        durations = [r['duration'] for r in items if r.get('duration') is not None]
+        success_durations = [r['duration'] for r in succeeded if r.get('duration') is not None]
+        peaks = [r['peak_rss'] for r in items if r.get('peak_rss')]
+        rows.append({
+            'key': key, 'runs': len(items), 'success': len(succeeded),
+            'success_rate': len(succeeded) / len(items),
+            'total_seconds': round(sum(durations), 3),
+            'median_seconds': round(statistics.median(durations), 3) if durations else None,
+            'median_success_seconds': round(statistics.median(success_durations), 3) if success_durations else None,
+            'max_peak_rss': max(peaks) if peaks else None,
+        })
+    rows.sort(key=lambda r: (-r['success_rate'], r['median_success_seconds'] or float('inf'), -r['runs']))
+    return rows
+
+
+def format_summary(rows):
+    """把汇总结果格式化为多行文本"""
+    lines = []
+    for row in rows:
+        median = f"{row['median_seconds']:.1f}s" if row['median_seconds'] is not None else "-"
+        success_median = f"{row['median_success_seconds']:.1f}s" if row['median_success_seconds'] is not None else "-"
+        peak = f"{row['max_peak_rss'] / (1 << 20):.0f}MB" if row['max_peak_rss'] else "-"
+        lines.append(f"{row['key']}: {row['success']}/{row['runs']} 成功 ({row['success_rate']:.0%})，"
+                     f"耗时中位数 {median}，成功耗时中位数 {success_median}，"
+                     f"总耗时 {row['total_seconds']:.0f}s，峰值内存 {peak}")
+    return lines
@@ -0,0 +1,134 @@
+"""输出区域的日志缓冲
+
+界面只保留最近 capacity 行记录(环形缓冲，每行一条记录)，新记录先进入待显示队列，由界面
+定时批量取出绘制；完整日志同时写入本地数据目录下按大小轮转的日志文件，
+长时间运行的攻击不会让界面越来越慢、内存越占越多。
+"""
+import collections
+import os
+import time
+
+from core.paths import data_dir
+
+# 与 logging 模块的级别数值一致
+DEBUG = 10  # 子进程的原始输出
+INFO = 20
+SUCCESS = 25
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", SUCCESS: "SUCCESS", WARNING: "WARNING", ERROR: "ERROR"}
+
+CAPACITY = 5000
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+
+def default_log_path():
+    return os.path.join(data_dir(), "logs", "output.log")
+
+
+class LogRecord:
+    __slots__ = ('time', 'level', 'text', 'color')
+
+    def __init__(self, level, text, color=None):
+        self.time = time.time()
+        self.level = level
+        self.text = text
+        self.color = color
+
+
+class RotatingLog:
+    """按大小轮转的日志文件：output.log 写满后依次改名为 output.log.1、.2 ..."""
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'ab')
+        self._size = self._file.tell()
+        self._stamp = (None, "")
+
+    def _time(self, timestamp):
+        # 同一秒内的记录共用格式化结果
+        second = int(timestamp)
+        if self._stamp[0] != second:
+            self._stamp = (second, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second)))
+        return self._stamp[1]
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, 'wb')
+        self._size = 0
+
+    def write(self, records):
+        """一批记录只写一次文件"""
+        if not records:
+            return
+        data = "".join(f"{self._time(record.time)} {LEVEL_NAMES.get(record.level, record.level)} {record.text}\n"
+                       for record in records).encode('utf-8')
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self):
+        self._file.close()
+
+
+class LogBuffer:
+    """保留最近 capacity 行的日志缓冲，可选写入轮转日志文件
+
+    多行文本按行拆成多条记录，容量和界面的行数上限一致。
+    """
+
+    def __init__(self, capacity=CAPACITY, path=None, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.records = collections.deque(maxlen=capacity)
+        self.pending = []
+        self.dropped = 0
+        self.path = path
+        self._log = RotatingLog(path, max_bytes, backups) if path else None
+
+    def append(self, text, level=INFO, color=None):
+        """追加一段文本(可含多行)，返回最后一行的记录"""
+        return self.extend(text.split("\n"), level, color)
+
+    def extend(self, lines, level=INFO, color=None):
+        """追加多行(每行一条记录)，返回最后一行的记录"""
+        records = [LogRecord(level, line, color) for line in lines]
+        if not records:
+            return None
+        self.dropped += max(0, len(self.records) + len(records) - self.records.maxlen)
+        self.records.extend(records)
+        self.pending.extend(records)
+        return records[-1]
+
+    def flush(self):
+        """取出待显示的记录，同时把它们写入日志文件"""
+        pending, self.pending = self.pending, []
+        if self._log:
+            self._log.write(pending)
+        return pending
+
+    def clear(self):
+        """清空界面上的记录(日志文件保留)"""
+        self.flush()
+        self.records.clear()
+        self.dropped = 0
+
+    def filtered(self, min_level=DEBUG):
+        return [record for record in self.records if record.level >= min_level]
+
+    def close(self):
+        self.flush()
+        if self._log:
+            self._log.close()
+            self._log = None
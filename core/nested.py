@@ -0,0 +1,118 @@
+"""压缩包中存储(Store)的内层 ZIP 的已知明文推算
+
+内层 ZIP 以存储方式放在加密压缩包中时，它自身的结构(本地文件头、中央目录、
+EOCD)大部分是可以推算的：外层中央目录给出了内层 ZIP 的准确大小，EOCD 就位于
+末尾 22 字节处；知道内层文件名后，本地文件头和中央目录中的文件名、长度字段也
+都是已知的。再假定内层 ZIP 由哪种工具生成(决定扩展字段长度)，就能算出中央目录
+的位置和完整的 EOCD。
+
+这里只推算与假设一致时必然成立的字节，输出合并后的 -x 片段。
+"""
+import struct
+
+LOCAL_SIGNATURE = b"PK\x03\x04"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+EOCD_SIGNATURE = b"PK\x05\x06"
+LOCAL_HEADER_SIZE = 30
+CENTRAL_HEADER_SIZE = 46
+EOCD_SIZE = 22
+
+# 生成内层 ZIP 的工具：扩展字段长度及其固定开头，以及中央目录中的 version made by
+#   unknown - 不做假设，只使用签名、文件名和 EOCD 的固定部分
+#   zipfile - Python zipfile、Windows 资源管理器等不写扩展字段的工具
+#   infozip - Linux 上的 zip 命令(Info-ZIP 3.0)，写入 UT 时间戳和 ux 属主扩展字段
+PROFILES = {
+    'unknown': None,
+    'zipfile': {'local_extra': 0, 'local_extra_head': b"", 'central_extra': 0, 'central_extra_head': b"",
+                'made_by': None},
+    'infozip': {'local_extra': 28, 'local_extra_head': b"UT\x09\x00\x03", 'central_extra': 24,
+                'central_extra_head': b"UT\x05\x00\x03", 'made_by': b"\x1e\x03"},
+}
+
+
+def _put(known, offset, data):
+    for i, byte in enumerate(data):
+        known[offset + i] = byte
+
+
+def _runs(known):
+    """把 {偏移: 字节} 合并为按偏移排序的 [(偏移, 字节)]"""
+    fragments = []
+    for offset in sorted(known):
+        if fragments and fragments[-1][0] + len(fragments[-1][1]) == offset:
+            fragments[-1][1].append(known[offset])
+        else:
+            fragments.append((offset, bytearray([known[offset]])))
+    return [(offset, bytes(data)) for offset, data in fragments]
+
+
+def guess_inner_names(outer_name):
+    """根据外层条目名猜测内层文件名，例如 flag.zip -> flag.txt"""
+    stem = outer_name.replace('\\', '/').rstrip('/').rsplit('/', 1)[-1]
+    if stem.lower().endswith('.zip'):
+        stem = stem[:-4]
+    return [f"{stem}.txt"] if stem else []
+
+
+def nested_zip_fragments(size, names=(), count=None, profile='unknown', comment=b""):
+    """推算大小为 size 字节的内层 ZIP 中的已知字节，返回 [(偏移, 字节)]
+
+    names 为内层条目名(按在压缩包中的顺序，第一个条目位于偏移 0)；count 为条目数，
+    给出 names 时默认为其数量。profile 见 PROFILES，未知时不计算中央目录位置。
+    假设内层 ZIP 没有 ZIP64 结构和分卷，压缩包注释为 comment(默认为空)。
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"未知的内层 ZIP 生成工具: {profile}")
+    tool = PROFILES[profile]
+    encoded = [name.encode('utf-8') for name in names]
+    if count is None and encoded:
+        count = len(encoded)
+    eocd_offset = size - EOCD_SIZE - len(comment)
+    if eocd_offset < LOCAL_HEADER_SIZE:
+        return []
+
+    known = {}
+    _put(known, 0, LOCAL_SIGNATURE)
+    if encoded:
+        _put(known, 26, struct.pack('<H', len(encoded[0])))
+        if tool:
+            _put(known, 28, struct.pack('<H', tool['local_extra']))
+            _put(known, LOCAL_HEADER_SIZE + len(encoded[0]), tool['local_extra_head'])
+        _put(known, LOCAL_HEADER_SIZE, encoded[0])
+
+    # EOCD：签名、分卷号(0)、条目数、中央目录大小和偏移、注释长度
+    _put(known, eocd_offset, EOCD_SIGNATURE + b"\x00\x00\x00\x00")
+    if count is not None:
+        _put(known, eocd_offset + 8, struct.pack('<HH', count, count))
+    _put(known, eocd_offset + 20, struct.pack('<H', len(comment)) + comment)
+
+    if tool and encoded and count == len(encoded):
+        cd_size = sum(CENTRAL_HEADER_SIZE + len(name) + tool['central_extra'] for name in encoded)
+        cd_offset = eocd_offset - cd_size
+        if cd_offset < LOCAL_HEADER_SIZE + len(encoded[0]):
+            return []
+        _put(known, eocd_offset + 12, struct.pack('<LL', cd_size, cd_offset))
+        position = cd_offset
+        for i, name in enumerate(encoded):
+            _put(known, position, CENTRAL_SIGNATURE)
+            if tool['made_by']:
+                _put(known, position + 4, tool['made_by'])
+            # 文件名长度、扩展字段长度、注释长度(0)、起始分卷号(0)
+            _put(known, position + 28, struct.pack('<HHHH', len(name), tool['central_extra'], 0, 0))
+            if i == 0:
+                # 第一个条目的本地文件头位于偏移 0
+                _put(known, position + 42, b"\x00\x00\x00\x00")
+            _put(known, position + CENTRAL_HEADER_SIZE, name)
+            _put(known, position + CENTRAL_HEADER_SIZE + len(name), tool['central_extra_head'])
+            position += CENTRAL_HEADER_SIZE + len(name) + tool['central_extra']
+    return _runs(known)
+
+
+def is_nested_zip(entry, heads=()):
+    """条目是否为可推算已知明文的内层 ZIP(存储方式)
+
+    按条目名判断；heads 为已知的条目开头字节，以 ZIP 本地文件头开头时不论条目名如何都算。
+    """
+    if entry.method != 0 or entry.is_dir:
+        return False
+    return entry.name.lower().endswith('.zip') or any(head.startswith(LOCAL_SIGNATURE) for head in heads)
@@ -0,0 +1,9 @@
+"""本地数据目录(缓存、记录等)"""
+import os
+
+
+def data_dir():
+    """返回本地数据目录，可通过环境变量 BKCRACK_GUI_HOME 指定"""
+    path = os.environ.get("BKCRACK_GUI_HOME") or os.path.join(os.path.expanduser("~"), ".bkcrack-gui")
+    os.makedirs(path, exist_ok=True)
+    return path
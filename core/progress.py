@@ -0,0 +1,125 @@
+"""bkcrack 输出流解析
+
+bkcrack 用 "\r" 覆盖同一行来刷新进度，例如 " 33.9 % (183750 / 542303)"。
+ProgressParser 直接处理字节流，把 "\r" 和 "\n" 都视为分段符，
+把进度刷新和普通输出行区分开，并识别各个攻击阶段。
+"""
+import re
+import time
+
+PROGRESS_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*%\s*\(\s*(\d+)\s*/\s*(\d+)\s*\)\s*$')
+
+# (阶段名, 匹配规则, 阶段描述)
+STAGES = (
+    ('z_reduction', re.compile(r'Z reduction using (\d+) bytes'), "Z 值约简"),
+    ('attack', re.compile(r'Attack on (\d+) Z values'), "攻击 Z 值"),
+    ('recovery', re.compile(r'Recovering password'), "恢复密码"),
+    ('recovery_length', re.compile(r'^length (\d+(?:-\d+)?)'), "恢复密码"),
+    ('keys_found', re.compile(r'Keys:'), "找到密钥"),
+    ('password_found', re.compile(r'Password'), "找到密码"),
+)
+
+
+class ProgressParser:
+    """把 bkcrack 的输出字节流解析为事件
+
+    feed() 返回的事件:
+      ('line', 文本)                   普通输出行
+      ('stage', 阶段名, 描述, 文本)     进入新阶段(对应的文本行同时作为 line 事件返回)
+      ('progress', 已完成, 总数)        进度刷新，不会作为 line 事件返回
+    """
+
+    def __init__(self, encoding='utf-8'):
+        self.encoding = encoding
+        self._tail = b''
+
+    def feed(self, data):
+        data = self._tail + data
+        last = max(data.rfind(b'\n'), data.rfind(b'\r'))
+        if last < 0:
+            self._tail = data
+            return []
+        self._tail = data[last + 1:]
+        return self._parse_segments(data[:last + 1])
+
+    def flush(self):
+        data, self._tail = self._tail, b''
+        return self._parse_segments(data) if data else []
+
+    def _parse_segments(self, data):
+        events = []
+        for segment in data.replace(b'\r\n', b'\n').replace(b'\r', b'\n').split(b'\n'):
+            text = segment.decode(self.encoding, errors='replace').strip()
+            if not text:
+                continue
+            match = PROGRESS_RE.match(text)
+            if match:
+                events.append(('progress', int(match.group(2)), int(match.group(3))))
+                continue
+            for name, pattern, description in STAGES:
+                if pattern.search(text):
+                    events.append(('stage', name, description, text))
+                    break
+            events.append(('line', text))
+        return events
+
+
+class ProgressTracker:
+    """根据进度事件计算百分比、速度和剩余时间"""
+
+    def __init__(self, smoothing=0.3, min_interval=0.5):
+        self.smoothing = smoothing
+        self.min_interval = min_interval
+        self.reset()
+
+    def reset(self, stage=None, description=None):
+        self.stage = stage
+        self.description = description
+        self.done = 0
+        self.total = 0
+        self.rate = None
+        self._last_sample = None
+
+    def update(self, done, total, now=None):
+        now = time.perf_counter() if now is None else now
+        if total != self.total or done < self.done:
+            # 同一阶段内总数变化(如密码恢复换了长度)时重新计算速度
+            self.rate = None
+            self._last_sample = None
+        self.done, self.total = done, total
+        if self._last_sample is None:
+            self._last_sample = (now, done)
+        else:
+            last_time, last_done = self._last_sample
+            if now - last_time >= self.min_interval:
+                rate = (done - last_done) / (now - last_time)
+                self.rate = rate if self.rate is None else \
+                    self.smoothing * rate + (1 - self.smoothing) * self.rate
+                self._last_sample = (now, done)
+        return self.snapshot()
+
+    def snapshot(self):
+        percent = 100.0 * self.done / self.total if self.total else 0.0
+        eta = None
+        if self.rate and self.rate > 0 and self.total:
+            eta = (self.total - self.done) / self.rate
+        return {'stage': self.stage, 'description': self.description, 'done': self.done,
+                'total': self.total, 'percent': percent, 'rate': self.rate, 'eta': eta}
+
+    def apply(self, event, now=None):
+        """处理一个解析事件，返回最新进度快照；非进度类事件返回 None"""
+        if event[0] == 'stage':
+            self.reset(event[1], event[2])
+            return self.snapshot()
+        if event[0] == 'progress':
+            return self.update(event[1], event[2], now)
+        return None
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
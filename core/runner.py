@@ -0,0 +1,191 @@
+"""无界面的 bkcrack 并发执行器"""
+import os
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from core.checkpoint import CheckpointRecorder
+from core.ledger import RunRecord, wait_child
+from core.progress import ProgressParser
+
+
+class AttemptGroup:
+    """一组互相竞争的 bkcrack 命令(同一个任务的不同偏移/明文/长度分片)
+
+    组内任一命令输出命中标记后，组内其余命令全部取消。
+    """
+
+    def __init__(self, job_id, attempts, hit_marker="Keys:", spec=None):
+        self.job_id = job_id
+        self.attempts = list(attempts)  # [(标签, 命令)]
+        self.hit_marker = hit_marker
+        self.spec = spec or {}
+        self.winner = None
+        self.winner_lines = []
+        self.results = []  # [{"label", "status", "elapsed", "returncode"}]
+        self.started = None
+        self.elapsed = 0.0
+        self._remaining = len(self.attempts)
+        self._processes = set()
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self, keep=None, interrupt=False):
+        """取消组内所有仍在运行的命令(keep 为命中的进程，保留其继续运行)
+
+        interrupt 为 True 时发送 SIGINT，让 bkcrack 输出检查点后自行退出。
+        """
+        with self._lock:
+            self._cancelled = True
+            processes = [p for p in self._processes if p is not keep]
+        for process in processes:
+            try:
+                if interrupt and os.name == 'posix':
+                    process.send_signal(signal.SIGINT)
+                else:
+                    process.terminate()
+            except OSError:
+                pass
+
+
+class BatchRunner:
+    """用有界线程池并发运行多个 AttemptGroup
+
+    每个线程负责一个子进程，所以 workers 同时也是并发子进程数的上限。
+    on_group_done(group) 在工作线程中调用，调用方需要自行加锁。
+    传入 checkpoints(CheckpointStore) 时，有检查点的命令自动从检查点继续，
+    运行中记录新的检查点；Ctrl+C 会中断所有子进程并等待它们写出检查点。
+    传入 ledger(Ledger) 时每个子进程结束后追加一条运行记录。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    INTERRUPT_GRACE = 3.0
+
+    def __init__(self, workers=None, checkpoints=None, ledger=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.checkpoints = checkpoints
+        self.ledger = ledger
+        self.interrupted = False
+        self._groups = []
+
+    def run(self, groups, on_group_done=None):
+        self._groups = list(groups)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bkcrack-batch")
+        futures = []
+        try:
+            for group in self._groups:
+                if not group.attempts:
+                    group.started = time.perf_counter()
+                    if on_group_done:
+                        on_group_done(group)
+                    continue
+                for label, command in group.attempts:
+                    if self.checkpoints:
+                        command, _ = self.checkpoints.resume_command(command)
+                    futures.append(executor.submit(self._run_attempt, group, label, command, on_group_done))
+            executor.shutdown(wait=True)
+        except KeyboardInterrupt:
+            self.interrupt()
+            # 被中断的 join 不能再依赖 shutdown 等待，直接等待各任务结束
+            wait(futures)
+            raise
+        return self._groups
+
+    def cancel_all(self):
+        for group in self._groups:
+            group.cancel()
+
+    def interrupt(self):
+        """中断所有任务，超过 INTERRUPT_GRACE 秒仍未退出的子进程被强制结束"""
+        self.interrupted = True
+        for group in self._groups:
+            group.cancel(interrupt=True)
+        timer = threading.Timer(self.INTERRUPT_GRACE, self.cancel_all)
+        timer.daemon = True
+        timer.start()
+
+    def _run_attempt(self, group, label, command, on_group_done):
+        started = time.perf_counter()
+        with group._lock:
+            if group.started is None:
+                group.started = started
+        status, returncode, lines = "cancelled", None, []
+        try:
+            if not group.cancelled:
+                status, returncode, lines = self._execute(group, label, command)
+        except OSError as e:
+            status, lines = "error", [str(e)]
+        elapsed = time.perf_counter() - started
+
+        with group._lock:
+            group.results.append({"label": label, "status": status,
+                                  "elapsed": round(elapsed, 3), "returncode": returncode})
+            if label == group.winner:
+                group.winner_lines = lines
+            group._remaining -= 1
+            finished = group._remaining == 0
+            if finished:
+                group.elapsed = time.perf_counter() - group.started
+        if finished and on_group_done:
+            on_group_done(group)
+
+    def _execute(self, group, label, command):
+        # 独立进程组：终端的 Ctrl+C 只发给本进程，由 interrupt() 统一转发
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   start_new_session=(os.name == 'posix'))
+        recorder = CheckpointRecorder(self.checkpoints, command) if self.checkpoints else None
+        run_record = RunRecord(command, "cli:" + group.spec.get("mode", "matrix"), label) if self.ledger else None
+        with group._lock:
+            if group.cancelled:
+                process.terminate()
+            group._processes.add(process)
+
+        lines = []
+        hit = False
+        parser = ProgressParser()
+        while True:
+            chunk = process.stdout.read1(self.CHUNK_SIZE)
+            events = parser.feed(chunk) if chunk else parser.flush()
+            for event in events:
+                if recorder:
+                    recorder.on_event(event)
+                if run_record:
+                    run_record.on_event(event)
+                # 进度刷新不保留，避免长时间运行时输出无限增长
+                if event[0] != 'line':
+                    continue
+                line = event[1]
+                lines.append(line)
+                if not hit and group.hit_marker in line:
+                    with group._lock:
+                        if group.winner is None:
+                            group.winner = label
+                            hit = True
+                    if hit:
+                        group.cancel(keep=process)
+            if not chunk:
+                break
+        process.stdout.close()
+        returncode, peak_rss = wait_child(process)
+        with group._lock:
+            group._processes.discard(process)
+        if run_record:
+            self.ledger.append(run_record.finish(returncode, peak_rss,
+                                                 stopped=self.interrupted or group.winner not in (None, label)))
+        if recorder:
+            # 组内已有命中时其余分片的检查点不再需要
+            recorder.finish(group.winner is not None or (returncode == 0 and not self.interrupted))
+
+        if hit:
+            status = "hit"
+        elif group.cancelled and group.winner != label:
+            status = "cancelled"
+        else:
+            status = "miss" if returncode == 0 else "failed"
+        return status, returncode, lines
@@ -0,0 +1,249 @@
+"""已知明文签名库
+
+plains/signatures.json 记录常见文件格式中固定不变的字节片段(fragments)，
+每个签名由扩展名、条目名(支持通配)和文件头魔数三种规则匹配。片段的偏移
+为负数时相对于文件末尾，匹配时按条目的数据大小换算成绝对偏移，直接生成
+bkcrack 的 -x 参数，不再需要为每种格式准备单独的明文文件。
+
+签名库在第一次使用时加载并建立索引(扩展名、精确条目名、魔数前缀、片段前缀)，
+文件修改后自动重新加载。
+"""
+import fnmatch
+import json
+import os
+import threading
+
+PLAINS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plains")
+SIGNATURES_PATH = os.path.join(PLAINS_DIR, "signatures.json")
+SIGNATURES_VERSION = 1
+
+# 魔数和片段按前几个字节建立索引
+PREFIX_LENGTH = 4
+
+
+class SignatureError(ValueError):
+    """签名库格式不正确"""
+
+
+def _fragment_bytes(fragment):
+    if 'hex' in fragment:
+        return bytes.fromhex(fragment['hex'])
+    if 'text' in fragment:
+        return fragment['text'].encode('utf-8')
+    raise SignatureError(f"片段缺少 hex 或 text: {fragment}")
+
+
+def longest_run(fragments):
+    """已按偏移排序的 [(偏移, 字节)] 中最长的连续已知字节数(相邻片段会合并计算)"""
+    best = 0
+    run_start = run_end = None
+    for offset, data in fragments:
+        if run_end is not None and offset <= run_end:
+            run_end = max(run_end, offset + len(data))
+        else:
+            run_start, run_end = offset, offset + len(data)
+        best = max(best, run_end - run_start)
+    return best
+
+
+class Signature:
+    """一种文件格式的已知明文"""
+
+    __slots__ = ('id', 'name', 'extensions', 'names', 'magic', 'plain', 'fragments')
+
+    def __init__(self, record):
+        try:
+            self.id = record['id']
+            self.name = record.get('name', self.id)
+            match = record.get('match', {})
+            self.extensions = tuple(ext.lower().lstrip('.') for ext in match.get('extensions', ()))
+            self.names = tuple(name.lower() for name in match.get('names', ()))
+            self.magic = bytes.fromhex(match['magic']) if match.get('magic') else b''
+            plain = record.get('plain')
+            # plains 目录下对应的预制明文文件名及其偏移
+            self.plain = (plain['file'], int(plain.get('offset', 0))) if plain else None
+            self.fragments = tuple((int(fragment['offset']), _fragment_bytes(fragment))
+                                   for fragment in record['fragments'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise SignatureError(f"签名 {record.get('id', '?')} 格式不正确: {e}")
+        if not self.fragments:
+            raise SignatureError(f"签名 {self.id} 没有片段")
+
+    def resolve(self, data_size=None):
+        """换算为绝对偏移的 [(偏移, 字节)]，超出数据范围的片段被丢弃
+
+        data_size 未知时无法使用相对末尾的片段。
+        """
+        resolved = []
+        for offset, data in self.fragments:
+            if offset < 0:
+                if data_size is None:
+                    continue
+                offset += data_size
+            if offset < 0 or (data_size is not None and offset + len(data) > data_size):
+                continue
+            resolved.append((offset, data))
+        resolved.sort()
+        return resolved
+
+    def __repr__(self):
+        return f"Signature({self.id!r})"
+
+
+def extract_args(fragments):
+    """[(偏移, 字节)] 对应的 bkcrack -x 参数"""
+    args = []
+    for offset, data in fragments:
+        args.extend(["-x", str(offset), data.hex()])
+    return args
+
+
+class SignatureDB:
+    """带索引的签名库"""
+
+    def __init__(self, signatures, version=SIGNATURES_VERSION, path=None):
+        self.signatures = list(signatures)
+        self.version = version
+        self.path = path
+        self.by_id = {}
+        self.by_extension = {}
+        self.by_name = {}
+        self.name_patterns = []
+        self.by_magic = {}
+        self.by_fragment = {}
+        for signature in self.signatures:
+            self.by_id[signature.id] = signature
+            for ext in signature.extensions:
+                self.by_extension.setdefault(ext, []).append(signature)
+            for name in signature.names:
+                if any(ch in name for ch in '*?['):
+                    self.name_patterns.append((name, signature))
+                else:
+                    self.by_name.setdefault(name, []).append(signature)
+            if signature.magic:
+                self.by_magic.setdefault(signature.magic[:PREFIX_LENGTH], []).append(signature)
+            for offset, data in signature.fragments:
+                if offset >= 0 and len(data) >= PREFIX_LENGTH:
+                    self.by_fragment.setdefault(data[:PREFIX_LENGTH], []).append((signature, offset, data))
+
+    @classmethod
+    def from_file(cls, path=SIGNATURES_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        version = document.get('version')
+        if version != SIGNATURES_VERSION:
+            raise SignatureError(f"不支持的签名库版本: {version}")
+        return cls((Signature(record) for record in document.get('signatures', ())), version, path)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def __iter__(self):
+        return iter(self.signatures)
+
+    def get(self, signature_id):
+        return self.by_id.get(signature_id)
+
+    def for_name(self, entry_name):
+        """按条目名和扩展名匹配的签名(条目名规则优先，不重复)"""
+        base = os.path.basename(entry_name.replace('\\', '/').rstrip('/')).lower()
+        found = list(self.by_name.get(base, ()))
+        found.extend(signature for pattern, signature in self.name_patterns if fnmatch.fnmatchcase(base, pattern))
+        ext = os.path.splitext(base)[1][1:]
+        if ext:
+            found.extend(self.by_extension.get(ext, ()))
+        return list(dict.fromkeys(found))
+
+    def for_content(self, head):
+        """按文件头魔数匹配的签名"""
+        return [signature for signature in self.by_magic.get(bytes(head[:PREFIX_LENGTH]), ())
+                if head.startswith(signature.magic)]
+
+    def locate_plain(self, head):
+        """判断明文文件的内容对应哪个签名片段，返回 [(签名, 偏移)]
+
+        例如以 DOS 存根开头的明文对应 PE 文件偏移 64 处。
+        """
+        found = [(min(len(head), len(data)), signature, offset)
+                 for signature, offset, data in self.by_fragment.get(bytes(head[:PREFIX_LENGTH]), ())
+                 if head.startswith(data[:len(head)]) or data.startswith(head[:len(data)])]
+        found.sort(key=lambda item: -item[0])
+        return [(signature, offset) for _, signature, offset in found]
+
+    def match_entry(self, entry_name, data_size=None, heads=()):
+        """为条目匹配签名，返回按连续已知字节数从多到少排序的结果
+
+        每项为 {'signature', 'fragments', 'contiguous', 'known', 'args'}，
+        data_size 为条目加密数据流(去掉加密头)的大小，用来换算相对末尾的片段和过滤越界片段。
+        heads 为已知的条目开头字节(如用户提供的明文)，按魔数补充条目名匹配不到的签名。
+        """
+        found = self.for_name(entry_name)
+        for head in heads:
+            found.extend(self.for_content(head))
+        matches = []
+        for signature in dict.fromkeys(found):
+            fragments = signature.resolve(data_size)
+            if not fragments:
+                continue
+            matches.append({'signature': signature, 'fragments': fragments,
+                            'contiguous': longest_run(fragments),
+                            'known': sum(len(data) for _, data in fragments),
+                            'args': extract_args(fragments)})
+        matches.sort(key=lambda m: (-m['contiguous'], -m['known']))
+        return matches
+
+
+_db = None
+_db_stamp = None
+_db_lock = threading.Lock()
+
+
+def load_signatures(path=SIGNATURES_PATH):
+    """加载签名库(带缓存，文件修改后重新加载)；签名库不存在时返回空库"""
+    global _db, _db_stamp
+    try:
+        stat = os.stat(path)
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        stamp = (path, None, None)
+    with _db_lock:
+        if _db is None or _db_stamp != stamp:
+            _db = SignatureDB.from_file(path) if stamp[1] is not None else SignatureDB((), path=path)
+            _db_stamp = stamp
+        return _db
+
+
+def read_head(path, size=64):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(size)
+    except OSError:
+        return b''
+
+
+def suggest_offset(path, db=None):
+    """为明文文件推断 -o 偏移量，返回 (偏移, 说明)；无法判断时返回 (None, None)
+
+    依次按内容(与签名片段对照)、签名库中登记的预制明文文件名、扩展名判断；
+    path 也可以是压缩包内的条目名，此时给出该格式预制明文的偏移。
+    """
+    db = db or load_signatures()
+    head = read_head(path) if os.path.isfile(path) else b''
+    if head:
+        located = db.locate_plain(head)
+        if located:
+            signature, offset = located[0]
+            return offset, f"内容与 {signature.name} 偏移 {offset} 处的片段一致"
+
+    base = os.path.basename(path).lower()
+    for signature in db:
+        if signature.plain and signature.plain[0].lower() == base:
+            return signature.plain[1], f"{signature.name} 的预制明文"
+
+    signatures = db.for_name(path)
+    for signature in signatures:
+        if signature.plain:
+            return signature.plain[1], f"{signature.name}，预制明文 {signature.plain[0]}"
+    if signatures:
+        return 0, f"匹配 {signatures[0].name}"
+    return None, None
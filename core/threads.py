@@ -0,0 +1,151 @@
+"""bkcrack 线程数(-j)的设置与自动测定
+
+bkcrack 默认使用全部逻辑核，但超线程、能效核等情况下最快的线程数不一定是
+核数。calibrate() 用几秒钟的密码恢复跑分测出吞吐量最高的线程数，结果按
+bkcrack 路径和核数保存在本地数据目录下。多个 bkcrack 同时运行时用
+split_threads() 把核数分给各进程，避免超额订阅。
+"""
+import json
+import os
+import subprocess
+import threading
+import time
+
+from core.backend import get_backend
+from core.paths import data_dir
+from core.progress import ProgressParser
+
+# 跑分用的密钥不对应任何密码，保证恢复过程会一直运行到被结束
+CALIBRATION_KEYS = ["12345678", "23456789", "34567890"]
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_args(threads, bkcrack=None):
+    """线程数对应的命令行参数，未指定或 bkcrack 不支持 -j 时使用 bkcrack 默认值"""
+    return get_backend(bkcrack).thread_args(threads)
+
+
+def split_threads(concurrent, threads=None, cores=None):
+    """同时运行 concurrent 个 bkcrack 时每个进程的线程数
+
+    threads 为单个进程的最佳线程数(未测定时为核数)，每个进程分到的线程数不超过它。
+    """
+    cores = cores or cpu_count()
+    per_process = max(1, cores // max(1, concurrent))
+    return min(threads or cores, per_process)
+
+
+def assign_threads(attempts, concurrent, threads=None, bkcrack=None):
+    """为 [(标签, 命令)] 追加线程数参数
+
+    concurrent 为实际同时运行的进程数(并发上限与尝试总数的较小者)，只有一两个
+    尝试时不会因为并发上限很大而只分到一个线程。
+    """
+    args = thread_args(split_threads(concurrent, threads), bkcrack)
+    return [(label, list(command) + args) for label, command in attempts]
+
+
+def candidate_threads(cores=None):
+    """测定时尝试的线程数：1, 2, 4, ... 以及核数本身"""
+    cores = cores or cpu_count()
+    candidates = []
+    count = 1
+    while count < cores:
+        candidates.append(count)
+        count *= 2
+    candidates.append(cores)
+    return candidates
+
+
+def measure_throughput(threads, duration=2.0, bkcrack=None):
+    """运行 duration 秒密码恢复，返回每秒完成的进度单位数(没有进度输出时返回 0)"""
+    backend = get_backend(bkcrack)
+    command = backend.command("-k", *CALIBRATION_KEYS, "-r", "8..8", "?p", *backend.thread_args(threads))
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    parser = ProgressParser()
+    started = time.perf_counter()
+    first = None
+    last = None
+    # bkcrack 不输出进度时 read 会一直阻塞，到时间后强制结束
+    timer = threading.Timer(duration + 1.0, process.kill)
+    timer.start()
+    try:
+        fd = process.stdout.fileno()
+        while time.perf_counter() - started < duration:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            for event in parser.feed(chunk):
+                if event[0] == 'progress':
+                    # 以第一次进度为起点，排除进程启动和准备阶段的耗时
+                    point = (time.perf_counter(), event[1])
+                    if first is None:
+                        first = point
+                    last = point
+    finally:
+        timer.cancel()
+        process.kill()
+        process.wait()
+        process.stdout.close()
+    if first is None or last[0] <= first[0]:
+        return 0.0
+    return (last[1] - first[1]) / (last[0] - first[0])
+
+
+def calibrate(bkcrack=None, duration=2.0, candidates=None, on_result=None):
+    """依次测量各线程数的吞吐量，返回 (最佳线程数, {线程数: 吞吐量})
+
+    吞吐量相差不到 5% 时选择较少的线程数，给界面和其他进程留出余量。
+    bkcrack 不支持 -j 时无法调整线程数，直接返回 (None, {})。
+    """
+    backend = get_backend(bkcrack)
+    results = {}
+    if not backend.supports("-j"):
+        return None, results
+    for threads in candidates or candidate_threads():
+        results[threads] = measure_throughput(threads, duration, backend)
+        if on_result:
+            on_result(threads, results[threads])
+    best_rate = max(results.values()) if results else 0.0
+    if best_rate <= 0:
+        return None, results
+    best = min(threads for threads, rate in results.items() if rate >= best_rate * 0.95)
+    return best, results
+
+
+class ThreadSettings:
+    """保存测定结果，以 bkcrack 路径和核数区分(换机器或换版本后需要重新测定)"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(data_dir(), "threads.json")
+
+    def _key(self, bkcrack):
+        return f"{get_backend(bkcrack).path or bkcrack}|{cpu_count()}"
+
+    def _load_all(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, bkcrack=None):
+        """返回保存的最佳线程数，没有测定过时返回 None"""
+        record = self._load_all().get(self._key(bkcrack))
+        return record['threads'] if record else None
+
+    def save(self, threads, results, bkcrack=None):
+        records = self._load_all()
+        records[self._key(bkcrack)] = {'threads': threads, 'updated': time.time(),
+                                       'results': {str(k): round(v, 1) for k, v in results.items()}}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,374 @@
+"""进程内的 ZipCrypto 解密与密钥校验
+
+拿到 bkcrack 恢复出的三个内部密钥后，校验密钥、解密条目、导出无密码压缩包
+都可以直接在本进程中完成，不必再启动 bkcrack 并经过临时文件。纯 Python 的
+解密吞吐量有限，超过 IN_PROCESS_LIMIT 的数据仍建议交给 bkcrack。
+
+密钥流是逐字节依赖前文的，单个数据流无法向量化；安装了 NumPy 时，
+同时校验大量条目(或大量候选密钥)的 12 字节加密头会按列并行计算。
+NumPy 和密钥流查找表都在第一次用到时才导入/计算，导入本模块不产生额外开销。
+"""
+import os
+
+from core.zipmeta import (CENTRAL_SIGNATURE, CENTRAL_STRUCT, ENCRYPTION_ZIPCRYPTO, EOCD_STRUCT, LOCAL_SIGNATURE,
+                          LOCAL_STRUCT, find_eocd, load_index)
+
+HEADER_SIZE = 12
+DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+CHUNK_SIZE = 1 << 20
+# 纯 Python 解密约 1 MB/秒，更大的数据交给 bkcrack 反而更快(启动开销约几十毫秒)
+IN_PROCESS_LIMIT = 2 << 20
+
+
+def _crc_table():
+    table = []
+    for n in range(256):
+        c = n
+        for _ in range(8):
+            c = (c >> 1) ^ 0xEDB88320 if c & 1 else c >> 1
+        table.append(c)
+    return tuple(table)
+
+
+CRC_TABLE = _crc_table()
+_keystream = None
+_np = None
+_np_checked = False
+
+
+def keystream_table():
+    """密钥流字节只取决于 key2 的低 16 位，第一次调用时算好 65536 项的查找表"""
+    global _keystream
+    if _keystream is None:
+        _keystream = bytes(((t | 2) * ((t | 2) ^ 1) >> 8) & 0xFF for t in range(0x10000))
+    return _keystream
+
+
+def _numpy():
+    """已安装时返回 numpy 模块，否则返回 None"""
+    global _np, _np_checked
+    if not _np_checked:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+        _np_checked = True
+    return _np
+
+
+def parse_keys(text):
+    """把 "c4490e28 b414a23d 91404b31" 或三个字符串组成的列表解析为三个整数"""
+    parts = text.split() if isinstance(text, str) else list(text)
+    if len(parts) != 3:
+        raise ValueError("密钥格式不正确，应为3个部分")
+    return tuple(int(part, 16) for part in parts)
+
+
+def keys_from_password(password):
+    """由密码计算初始内部密钥(与 bkcrack 输出的 Keys 相同)"""
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    k0, k1, k2 = 0x12345678, 0x23456789, 0x34567890
+    crc = CRC_TABLE
+    for p in password:
+        k0 = (k0 >> 8) ^ crc[(k0 ^ p) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xFF]
+    return k0, k1, k2
+
+
+def decrypt_block(data, keys):
+    """解密一段数据，返回 (明文, 处理后的密钥)，密钥可继续用于后续数据"""
+    k0, k1, k2 = keys
+    crc = CRC_TABLE
+    stream = keystream_table()
+    out = bytearray(len(data))
+    for i, c in enumerate(data):
+        p = c ^ stream[k2 & 0xFFFF]
+        out[i] = p
+        k0 = (k0 >> 8) ^ crc[(k0 ^ p) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xFF]
+    return out, (k0, k1, k2)
+
+
+def check_byte(entry):
+    """加密头最后一个字节的期望值：CRC 高字节，使用数据描述符时为修改时间高字节"""
+    if entry.flag_bits & 0x8:
+        return (entry.mod_time >> 8) & 0xFF
+    return entry.crc >> 24
+
+
+def check_header(keys, header, expected):
+    """用密钥解密 12 字节加密头并核对最后一个字节(纯计算，约十微秒)"""
+    plain, _ = decrypt_block(header, keys)
+    return plain[-1] == expected
+
+
+def prefer_in_process(size):
+    """解密 size 字节的数据是否应当在进程内完成"""
+    return size <= IN_PROCESS_LIMIT
+
+
+def read_header(index, i):
+    """读取条目的 12 字节加密头"""
+    with open(index.path, 'rb') as f:
+        f.seek(index.data_offset(i))
+        return f.read(HEADER_SIZE)
+
+
+def verify_entry(index, i, keys):
+    """密钥能否解开第 i 个条目"""
+    entry = index.entry(i)
+    if entry.encryption != ENCRYPTION_ZIPCRYPTO or entry.compress_size < HEADER_SIZE:
+        return False
+    return check_header(keys, read_header(index, i), check_byte(entry))
+
+
+def _crc_matches(chunks, entry):
+    """解压(存储条目直接使用)解密后的数据并核对 CRC-32 和大小
+
+    不支持解压的压缩方式无法核对，此时以加密头为准返回 True。
+    """
+    from core.inflate import can_inflate, iter_inflated
+    if not can_inflate(entry.method):
+        return True
+    try:
+        for _ in iter_inflated(chunks, entry.method, entry.crc, entry.file_size):
+            pass
+    except ValueError:
+        return False
+    return True
+
+
+def check_entry(index, i, keys):
+    """完整解密(并解压)第 i 个条目并核对 CRC-32
+
+    加密头只有一个校验字节，错误的密钥约有 1/256 的概率通过，需要确认时用这个函数。
+    """
+    try:
+        return _crc_matches(iter_decrypted(index, i, keys), index.entry(i))
+    except ValueError:
+        return False
+
+
+def _check_headers_numpy(k0, k1, k2, headers, expected):
+    """对多组 (密钥, 加密头) 同时解密，返回最后一个字节是否符合期望的布尔数组"""
+    np = _numpy()
+    crc = np.array(CRC_TABLE, dtype=np.uint32)
+    stream = np.frombuffer(keystream_table(), dtype=np.uint8)
+    k0 = np.array(k0, dtype=np.uint32)
+    k1 = np.array(k1, dtype=np.uint32)
+    k2 = np.array(k2, dtype=np.uint32)
+    multiplier = np.uint32(134775813)
+    for j in range(HEADER_SIZE):
+        p = headers[..., j] ^ stream[k2 & 0xFFFF]
+        k0 = (k0 >> 8) ^ crc[(k0 ^ p) & 0xFF]
+        k1 = (k1 + (k0 & 0xFF)) * multiplier + np.uint32(1)
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xFF]
+    return p == np.asarray(expected, dtype=np.uint8)
+
+
+def verify_keys(index, keys, indices=None, check_crc=False):
+    """校验密钥对哪些 ZipCrypto 条目有效，返回 {条目序号: 是否有效}
+
+    bkcrack 恢复的密钥通常对同一次加密的所有条目都有效；
+    条目较多且安装了 NumPy 时所有加密头一次性并行校验。
+    加密头只核对一个字节，check_crc 为真时再完整解密通过的条目并核对 CRC-32。
+    """
+    if indices is None:
+        indices = range(len(index))
+    targets = []
+    headers = []
+    with open(index.path, 'rb') as f:
+        for i in indices:
+            entry = index.entry(i)
+            if entry.encryption != ENCRYPTION_ZIPCRYPTO or entry.compress_size < HEADER_SIZE:
+                continue
+            f.seek(index.data_offset(i))
+            headers.append(f.read(HEADER_SIZE))
+            targets.append((i, check_byte(entry)))
+    if not targets:
+        return {}
+    np = _numpy() if len(targets) >= 64 else None
+    if np is not None:
+        header_array = np.frombuffer(b"".join(headers), dtype=np.uint8).reshape(len(headers), HEADER_SIZE)
+        matches = _check_headers_numpy(keys[0], keys[1], keys[2], header_array, [c for _, c in targets])
+        valid = {i: bool(match) for (i, _), match in zip(targets, matches)}
+    else:
+        valid = {i: check_header(keys, header, expected) for (i, expected), header in zip(targets, headers)}
+    if check_crc:
+        valid = {i: ok and check_entry(index, i, keys) for i, ok in valid.items()}
+    return valid
+
+
+def verify_candidates(header, expected, candidates):
+    """用同一个加密头批量校验候选密钥，返回每个候选是否通过"""
+    if not candidates:
+        return []
+    np = _numpy() if len(candidates) >= 64 else None
+    if np is not None:
+        columns = np.array(candidates, dtype=np.uint32).T
+        header_array = np.frombuffer(bytes(header), dtype=np.uint8)
+        return [bool(match) for match in _check_headers_numpy(columns[0], columns[1], columns[2],
+                                                             header_array, expected)]
+    return [check_header(keys, header, expected) for keys in candidates]
+
+
+def iter_decrypted(index, i, keys, chunk_size=CHUNK_SIZE):
+    """逐块产生第 i 个条目解密后的数据(去掉加密头，压缩条目仍是压缩数据)
+
+    密钥不能通过加密头校验时抛出 ValueError。
+    """
+    entry = index.entry(i)
+    if entry.encryption != ENCRYPTION_ZIPCRYPTO:
+        raise ValueError(f"条目 '{entry.name}' 不是 ZipCrypto 加密")
+    remaining = entry.compress_size - HEADER_SIZE
+    with open(index.path, 'rb') as f:
+        f.seek(index.data_offset(i))
+        header, state = decrypt_block(f.read(HEADER_SIZE), keys)
+        if len(header) < HEADER_SIZE or header[-1] != check_byte(entry):
+            raise ValueError(f"密钥无法解密条目 '{entry.name}'")
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                raise ValueError(f"条目 '{entry.name}' 的数据不完整")
+            remaining -= len(data)
+            plain, state = decrypt_block(data, state)
+            yield plain
+
+
+def decrypt_entry_to(index, i, keys, output_path):
+    """把解密后的数据写到文件(与 bkcrack -d 的输出相同)，返回写入的字节数"""
+    written = 0
+    temp_path = output_path + ".part"
+    try:
+        with open(temp_path, 'wb') as out:
+            for chunk in iter_decrypted(index, i, keys):
+                out.write(chunk)
+                written += len(chunk)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return written
+
+
+def _read_descriptor(f):
+    """读取条目数据之后的数据描述符(签名可有可无)"""
+    head = f.read(4)
+    return head + f.read(12 if head == DESCRIPTOR_SIGNATURE else 8)
+
+
+def _write_checked(chunks, entry, out):
+    """把解密后的数据写到 out，同时解压核对 CRC-32，返回是否通过"""
+    def written():
+        for chunk in chunks:
+            out.write(chunk)
+            yield chunk
+
+    stream = written()
+    try:
+        matches = _crc_matches(stream, entry)
+        # Deflate 流结束标记之后若还有数据也要照样写出
+        for _ in stream:
+            pass
+    except ValueError:
+        return False
+    return matches
+
+
+def write_decrypted_archive(zip_path, keys, output_path):
+    """生成去掉密码的压缩包副本(与 bkcrack -D 相同)
+
+    密钥能解开的 ZipCrypto 条目被解密并清除加密标志，其余条目连同数据描述符原样复制
+    (仍加密的条目依赖数据描述符标志选择校验字节，不能清除)。加密头只核对一个字节，
+    解密时同时解压核对 CRC-32，不一致的条目回退为原样复制。
+    返回 (解密的条目数, 通过加密头校验但 CRC 不一致的条目名列表)。
+    ZIP64 压缩包不在此处理，抛出 ValueError，调用方可以改用 bkcrack。
+    """
+    index = load_index(zip_path)
+    if index.zip64:
+        raise ValueError("暂不支持 ZIP64 压缩包")
+    valid = verify_keys(index, keys)
+    new_offsets = []
+    new_sizes = []
+    decrypted = set()
+    rejected = []
+    temp_path = output_path + ".part"
+    try:
+        with open(zip_path, 'rb') as src, open(temp_path, 'wb') as out:
+            for i in range(len(index)):
+                entry = index.entry(i)
+                src.seek(entry.header_offset)
+                local = src.read(LOCAL_STRUCT.size)
+                fields = list(LOCAL_STRUCT.unpack(local))
+                if fields[0] != LOCAL_SIGNATURE:
+                    raise ValueError(f"条目 '{entry.name}' 的本地文件头不正确")
+                name_extra = src.read(fields[10] + fields[11])
+
+                start = out.tell()
+                new_offsets.append(start)
+                if valid.get(i, False):
+                    # 大小都写进本地文件头，不再需要数据描述符
+                    plain_fields = list(fields)
+                    plain_fields[3] = entry.flag_bits & ~0x9
+                    plain_fields[7:10] = entry.crc, entry.compress_size - HEADER_SIZE, entry.file_size
+                    out.write(LOCAL_STRUCT.pack(*plain_fields))
+                    out.write(name_extra)
+                    if _write_checked(iter_decrypted(index, i, keys), entry, out):
+                        new_sizes.append(plain_fields[8])
+                        decrypted.add(i)
+                        continue
+                    # CRC 不一致说明密钥只是碰巧通过了加密头校验，撤销写入的内容后原样复制
+                    out.seek(start)
+                    out.truncate()
+                    rejected.append(entry.name)
+                fields[7], fields[8], fields[9] = entry.crc, entry.compress_size, entry.file_size
+                new_sizes.append(entry.compress_size)
+                out.write(LOCAL_STRUCT.pack(*fields))
+                out.write(name_extra)
+                src.seek(index.data_offset(i))
+                remaining = entry.compress_size
+                while remaining > 0:
+                    data = src.read(min(CHUNK_SIZE, remaining))
+                    if not data:
+                        raise ValueError(f"条目 '{entry.name}' 的数据不完整")
+                    out.write(data)
+                    remaining -= len(data)
+                if entry.flag_bits & 0x8:
+                    out.write(_read_descriptor(src))
+
+            # 按原中央目录逐条改写标志、大小和偏移
+            cd_start = out.tell()
+            src.seek(index.cd_offset)
+            directory = src.read(index.cd_size)
+            pos = 0
+            for i in range(len(index)):
+                fields = list(CENTRAL_STRUCT.unpack_from(directory, pos))
+                if fields[0] != CENTRAL_SIGNATURE:
+                    raise ValueError("中央目录不正确")
+                tail_len = fields[12] + fields[13] + fields[14]
+                tail = directory[pos + CENTRAL_STRUCT.size:pos + CENTRAL_STRUCT.size + tail_len]
+                if i in decrypted:
+                    fields[5] &= ~0x9
+                fields[10] = new_sizes[i]
+                fields[18] = new_offsets[i]
+                out.write(CENTRAL_STRUCT.pack(*fields))
+                out.write(tail)
+                pos += CENTRAL_STRUCT.size + tail_len
+            cd_end = out.tell()
+
+            eocd_pos, eocd = find_eocd(src, src.seek(0, 2))
+            src.seek(eocd_pos + EOCD_STRUCT.size)
+            comment = src.read(eocd[7])
+            eocd = list(eocd)
+            eocd[5], eocd[6] = cd_end - cd_start, cd_start
+            out.write(EOCD_STRUCT.pack(*eocd))
+            out.write(comment)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return len(decrypted), rejected
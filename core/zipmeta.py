@@ -0,0 +1,418 @@
+"""ZIP 元数据(条目索引、创建者版本、操作系统)解析
+
+只读取文件末尾的 End Of Central Directory(及 ZIP64 定位器)和中央目录本身，
+不读取条目数据，几 GB 的压缩包也只需要几次 seek。解析结果是一份按压缩包
+共享的条目索引(load_index)，界面和命令构建都从这里查询条目信息。
+"""
+import collections
+import os
+import struct
+import threading
+from array import array
+
+VERSION_MAP = {
+    10: "PKZIP 1.0",
+    20: "Bandizip 7.06 / Windows自带",
+    21: "PKZIP 2.0",
+    25: "PKZIP 2.5",
+    27: "PKZIP 2.7",
+    31: "WinRAR 4.20 / WinRAR 5.70 ",
+    45: "PKZIP 4.5",
+    46: "PKZIP 4.6",
+    50: "PKZIP 5.0",
+    62: "PKZIP 6.2",
+    63: "7-Zip / 360压缩"
+}
+
+OS_MAP = {
+    0: "MS-DOS和OS/2",
+    1: "Amiga",
+    2: "OpenVMS",
+    3: "UNIX",
+    4: "VM/CMS",
+    5: "Atari ST",
+    6: "OS/2 HPFS",
+    7: "Macintosh",
+    8: "Z-System",
+    9: "CP/M",
+    10: "Windows NTFS",
+    11: "MVS",
+    12: "VSE",
+    13: "Acorn Risc",
+    14: "VFAT",
+    15: "Alternate MVS",
+    16: "BeOS",
+    17: "Tandem",
+    18: "OS/400",
+    19: "OS/X (Darwin)"
+}
+
+
+def zip_os_name(os_id):
+    """获取操作系统名称"""
+    return OS_MAP.get(os_id, f"未知系统(0x{os_id:X})")
+
+
+EOCD_SIGNATURE = b'PK\x05\x06'
+EOCD_STRUCT = struct.Struct('<4s4H2LH')
+ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+ZIP64_LOCATOR_STRUCT = struct.Struct('<4sLQL')
+ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+ZIP64_EOCD_STRUCT = struct.Struct('<4sQ2H2L4Q')
+CENTRAL_SIGNATURE = b'PK\x01\x02'
+CENTRAL_STRUCT = struct.Struct('<4s4B4HL2L5H2L')
+LOCAL_SIGNATURE = b'PK\x03\x04'
+LOCAL_STRUCT = struct.Struct('<4s2B4HL2L2H')
+# EOCD 之后最多有 65535 字节的注释
+MAX_TAIL = EOCD_STRUCT.size + 0xFFFF
+
+
+def find_eocd(f, file_size):
+    """从文件末尾查找 EOCD，返回 (EOCD 在文件中的位置, 解析后的字段)"""
+    tail_size = min(file_size, MAX_TAIL)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    pos = tail.rfind(EOCD_SIGNATURE)
+    while pos != -1:
+        if pos + EOCD_STRUCT.size <= len(tail):
+            fields = EOCD_STRUCT.unpack_from(tail, pos)
+            # 注释长度应当正好到达文件末尾，排除注释中出现签名的情况
+            if pos + EOCD_STRUCT.size + fields[7] <= len(tail):
+                return file_size - tail_size + pos, fields
+        pos = tail.rfind(EOCD_SIGNATURE, 0, pos)
+    raise ValueError("未找到 End Of Central Directory，文件可能不是ZIP或已损坏")
+
+
+def _locate_central_directory(f):
+    """返回 (是否 ZIP64, 条目数, 中央目录偏移, 中央目录大小, 前缀字节数)"""
+    file_size = f.seek(0, 2)
+    eocd_pos, eocd = find_eocd(f, file_size)
+    total, cd_size, cd_offset = eocd[4], eocd[5], eocd[6]
+    zip64 = False
+    cd_end = eocd_pos
+
+    locator_pos = eocd_pos - ZIP64_LOCATOR_STRUCT.size
+    if locator_pos >= 0:
+        f.seek(locator_pos)
+        locator = f.read(ZIP64_LOCATOR_STRUCT.size)
+        if locator[:4] == ZIP64_LOCATOR_SIGNATURE:
+            _, _, zip64_eocd_offset, _ = ZIP64_LOCATOR_STRUCT.unpack(locator)
+            # 定位器中的偏移不含前缀，ZIP64 EOCD 通常紧挨在定位器之前
+            zip64_pos = locator_pos - ZIP64_EOCD_STRUCT.size
+            f.seek(zip64_pos)
+            record = f.read(ZIP64_EOCD_STRUCT.size)
+            if record[:4] != ZIP64_EOCD_SIGNATURE:
+                f.seek(zip64_eocd_offset)
+                record = f.read(ZIP64_EOCD_STRUCT.size)
+                zip64_pos = zip64_eocd_offset
+            if record[:4] == ZIP64_EOCD_SIGNATURE:
+                fields = ZIP64_EOCD_STRUCT.unpack(record)
+                total, cd_size, cd_offset = fields[7], fields[8], fields[9]
+                zip64 = True
+                cd_end = zip64_pos
+
+    prefix = cd_end - cd_size - cd_offset
+    if prefix < 0:
+        raise ValueError("中央目录位置不正确，文件可能已损坏")
+    return zip64, total, cd_offset, cd_size, prefix
+
+
+def _zip64_extra(extra, file_size, compress_size, header_offset):
+    """用 ZIP64 扩展字段(0x0001)中的值替换被标记为 0xFFFFFFFF 的字段"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, size = struct.unpack_from('<2H', extra, pos)
+        if tag == 0x0001:
+            values = iter(struct.unpack_from(f'<{size // 8}Q', extra, pos + 4))
+            # 只有原字段为 0xFFFFFFFF 时扩展字段中才有对应的值，顺序固定
+            if file_size == 0xFFFFFFFF:
+                file_size = next(values, file_size)
+            if compress_size == 0xFFFFFFFF:
+                compress_size = next(values, compress_size)
+            if header_offset == 0xFFFFFFFF:
+                header_offset = next(values, header_offset)
+            break
+        pos += 4 + size
+    return file_size, compress_size, header_offset
+
+
+METHOD_NAMES = {0: 'store', 8: 'deflate', 9: 'deflate64', 12: 'bzip2', 14: 'lzma', 93: 'zstd', 99: 'aes'}
+# 条目的加密方式编码
+ENCRYPTION_NONE, ENCRYPTION_ZIPCRYPTO, ENCRYPTION_AES, ENCRYPTION_STRONG = range(4)
+ENCRYPTION_NAMES = ('none', 'zipcrypto', 'aes', 'strong')
+
+
+def _encryption_type(flag_bits, method):
+    if not flag_bits & 0x1:
+        return ENCRYPTION_NONE
+    if method == 99:
+        return ENCRYPTION_AES
+    if flag_bits & 0x40:
+        return ENCRYPTION_STRONG
+    return ENCRYPTION_ZIPCRYPTO
+
+
+class Entry:
+    """EntryIndex 中单个条目的只读视图，按需创建，不保存在索引里
+
+    header_offset 是本地文件头在文件中的绝对位置(已计入前缀)。
+    """
+
+    __slots__ = ('index', 'name', 'method', 'flag_bits', 'crc', 'compress_size', 'file_size',
+                 'header_offset', 'version_made_by', 'encryption', 'mod_time')
+
+    def __init__(self, index, name, method, flag_bits, crc, compress_size, file_size,
+                 header_offset, version_made_by, encryption, mod_time):
+        self.index = index
+        self.name = name
+        self.method = method
+        self.flag_bits = flag_bits
+        self.crc = crc
+        self.compress_size = compress_size
+        self.file_size = file_size
+        self.header_offset = header_offset
+        self.version_made_by = version_made_by
+        self.encryption = encryption
+        self.mod_time = mod_time  # DOS 格式的修改时间
+
+    @property
+    def is_dir(self):
+        return self.name.endswith('/')
+
+    @property
+    def encrypted(self):
+        return self.encryption != ENCRYPTION_NONE
+
+    @property
+    def compression(self):
+        return METHOD_NAMES.get(self.method, f"method{self.method}")
+
+    @property
+    def encryption_name(self):
+        return ENCRYPTION_NAMES[self.encryption]
+
+
+class EntryIndex:
+    """压缩包中央目录的紧凑索引
+
+    数值字段按列保存在 array 中，每个条目只额外占用一个名称字符串，
+    几十万个条目的压缩包也只需要几十 MB 以内的内存。数据偏移需要读取本地文件头，
+    第一次查询时才计算并缓存。
+    """
+
+    __slots__ = ('path', 'stamp', 'zip64', 'prefix', 'cd_offset', 'cd_size', '_names', '_lookup', '_method',
+                 '_flags', '_crc', '_compress_size', '_file_size', '_header_offset', '_data_offset',
+                 '_made_by', '_encryption', '_mod_time')
+
+    def __init__(self, path, stamp=None):
+        self.path = path
+        self.stamp = stamp
+        self.zip64 = False
+        self.prefix = 0
+        self.cd_offset = 0  # 中央目录在文件中的绝对位置
+        self.cd_size = 0
+        self._names = []
+        self._lookup = None
+        self._method = array('H')
+        self._flags = array('H')
+        self._crc = array('I')
+        self._compress_size = array('Q')
+        self._file_size = array('Q')
+        self._header_offset = array('Q')
+        self._data_offset = array('q')
+        self._made_by = array('H')
+        self._encryption = array('B')
+        self._mod_time = array('H')
+
+    @classmethod
+    def from_file(cls, zip_path):
+        stat = os.stat(zip_path)
+        index = cls(zip_path, (stat.st_size, stat.st_mtime_ns))
+        with open(zip_path, 'rb') as f:
+            index.zip64, _, cd_offset, index.cd_size, index.prefix = _locate_central_directory(f)
+            index.cd_offset = cd_offset + index.prefix
+            f.seek(index.cd_offset)
+            data = f.read(index.cd_size)
+
+        pos = 0
+        while pos + CENTRAL_STRUCT.size <= len(data):
+            fields = CENTRAL_STRUCT.unpack_from(data, pos)
+            if fields[0] != CENTRAL_SIGNATURE:
+                break
+            (_, create_version, create_system, _, _, flag_bits, method, mod_time, _,
+             crc, compress_size, file_size, name_len, extra_len, comment_len, _, _, _, header_offset) = fields
+            name_start = pos + CENTRAL_STRUCT.size
+            extra_start = name_start + name_len
+            if 0xFFFFFFFF in (file_size, compress_size, header_offset):
+                file_size, compress_size, header_offset = _zip64_extra(
+                    data[extra_start:extra_start + extra_len], file_size, compress_size, header_offset)
+            # 与 zipfile 一致：bit 11 表示 UTF-8，否则按 cp437 解码
+            index._names.append(data[name_start:extra_start].decode(
+                'utf-8' if flag_bits & 0x800 else 'cp437', errors='replace'))
+            index._method.append(method)
+            index._flags.append(flag_bits)
+            index._crc.append(crc)
+            index._compress_size.append(compress_size)
+            index._file_size.append(file_size)
+            index._header_offset.append(header_offset)
+            index._made_by.append((create_system << 8) | create_version)
+            index._encryption.append(_encryption_type(flag_bits, method))
+            index._mod_time.append(mod_time)
+            pos = extra_start + extra_len + comment_len
+        index._data_offset = array('q', [-1]) * len(index._names)
+        return index
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        return (self.entry(i) for i in range(len(self._names)))
+
+    def __contains__(self, name):
+        return self.find(name) != -1
+
+    def names(self):
+        return list(self._names)
+
+    def find(self, name):
+        """条目名对应的序号，不存在时返回 -1"""
+        if self._lookup is None:
+            # 重名条目以第一个为准
+            lookup = {}
+            for i, entry_name in enumerate(self._names):
+                lookup.setdefault(entry_name, i)
+            self._lookup = lookup
+        return self._lookup.get(name, -1)
+
+    def find_casefold(self, name):
+        """不区分大小写查找，返回匹配的条目名列表"""
+        folded = name.lower()
+        return [entry_name for entry_name in self._names if entry_name.lower() == folded]
+
+    def entry(self, i):
+        return Entry(i, self._names[i], self._method[i], self._flags[i], self._crc[i],
+                     self._compress_size[i], self._file_size[i], self._header_offset[i] + self.prefix,
+                     self._made_by[i], self._encryption[i], self._mod_time[i])
+
+    def get(self, name):
+        i = self.find(name)
+        return self.entry(i) if i != -1 else None
+
+    def compression(self, name):
+        """条目的压缩方式('store'/'deflate'/...)，条目不存在时返回 None"""
+        entry = self.get(name)
+        return entry.compression if entry else None
+
+    def crcs(self):
+        return list(self._crc)
+
+    def version_counts(self):
+        return collections.Counter(self._made_by)
+
+    def data_offset(self, i):
+        """条目数据(加密头之后是压缩数据)在文件中的绝对位置"""
+        if self._data_offset[i] < 0:
+            position = self._header_offset[i] + self.prefix
+            with open(self.path, 'rb') as f:
+                f.seek(position)
+                header = f.read(LOCAL_STRUCT.size)
+            if len(header) < LOCAL_STRUCT.size or header[:4] != LOCAL_SIGNATURE:
+                raise ValueError(f"条目 '{self._names[i]}' 的本地文件头不正确")
+            name_len, extra_len = struct.unpack_from('<2H', header, 26)
+            self._data_offset[i] = position + LOCAL_STRUCT.size + name_len + extra_len
+        return self._data_offset[i]
+
+
+class EntryIndexCache:
+    """按 (路径, 大小, 修改时间) 缓存 EntryIndex，可在多个线程中使用"""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()  # 绝对路径 -> EntryIndex
+        self._lock = threading.Lock()
+
+    def get(self, zip_path):
+        key = os.path.abspath(zip_path)
+        stat = os.stat(key)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached.stamp == stamp:
+                self._entries.move_to_end(key)
+                return cached
+
+        index = EntryIndex.from_file(key)
+        with self._lock:
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def invalidate(self, zip_path=None):
+        with self._lock:
+            if zip_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(zip_path), None)
+
+
+# 界面、命令构建、密钥缓存等共用同一份索引
+INDEX_CACHE = EntryIndexCache()
+
+
+def load_index(zip_path):
+    """返回压缩包的条目索引(文件未变化时直接使用缓存)，不是有效 ZIP 时抛出 ValueError"""
+    return INDEX_CACHE.get(zip_path)
+
+
+def describe_version(version_value):
+    """Version Made By 字段对应的 (操作系统, 压缩软件)"""
+    os_id = version_value >> 8
+    version_number = version_value & 0xFF
+    software = VERSION_MAP.get(version_number, f"未知PKZIP版本 (0x{version_number:02X})")
+    os_name = OS_MAP.get(os_id, f"未知操作系统 (0x{os_id:02X})")
+    return os_name, software
+
+
+def detect_zip_creator(zip_path, max_listed=200):
+    """检测ZIP文件的创建者信息
+
+    所有条目的 Version Made By 都会报告：条目数不超过 max_listed 时逐条列出，
+    否则按取值汇总条目数。
+    """
+    try:
+        index = load_index(zip_path)
+        if not len(index):
+            return "未找到 Central Directory Header"
+
+        # 第一个条目作为整个压缩包的代表
+        version_value = index.entry(0).version_made_by
+        os_name, software = describe_version(version_value)
+
+        info = (
+            f"Version Made By: 0x{version_value:04X}\n"
+            f" - 操作系统: {os_name}\n"
+            f" - 压缩软件(可能): {software}\n"
+            f" - ZIP64格式: {'是' if index.zip64 else '否'}\n"
+        )
+
+        counts = index.version_counts()
+        if len(counts) > 1:
+            info += f"\n注意：条目的 Version Made By 不一致(共 {len(counts)} 种)，压缩包可能被其他软件修改过\n"
+        if len(index) <= max_listed:
+            info += "\n各条目 Version Made By:\n"
+            for entry in index:
+                entry_os, entry_software = describe_version(entry.version_made_by)
+                info += f" - {entry.name}: 0x{entry.version_made_by:04X} ({entry_os}, {entry_software})\n"
+        else:
+            info += f"\n各条目 Version Made By (共 {len(index)} 个条目):\n"
+            for value, count in counts.most_common():
+                entry_os, entry_software = describe_version(value)
+                info += f" - 0x{value:04X} ({entry_os}, {entry_software}): {count} 个条目\n"
+
+        if version_value == 0x001F:
+            info += "\n提示：可以使用左上角工具按钮进行压缩(存储)操作"
+        return info
+    except Exception as e:
+        return f"解析ZIP元数据时出错: {str(e)}"
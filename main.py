@@ -1,347 +1,325 @@
+import time
+
+# 启动计时的起点，bench/startup.py 用它拆分导入和建窗口的耗时
+STARTED = time.perf_counter()
+
 from PySide6 import QtCore
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtWidgets import (QApplication, QWidget, QFileDialog, QMessageBox,
-                               QGroupBox, QDialog, QLabel, QVBoxLayout, QScrollArea,
-                               QTextEdit, QHBoxLayout, QSizePolicy, QListWidget,
-                               QListWidgetItem, QMenu)
-from PySide6.QtGui import (QColor, QDragEnterEvent, QDropEvent, QPixmap, QImage,
-                           QImageReader, QTextDocument, QPainter, QGuiApplication, QAction)
-from qfluentwidgets import PushButton, TextBrowser, PlainTextEdit
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtWidgets import QApplication, QWidget, QFileDialog, QMessageBox, QGroupBox, QHBoxLayout
+from PySide6.QtGui import QColor, QDragEnterEvent, QDropEvent
+from qfluentwidgets import PushButton
 from ui.Ui_main import Ui_Form
+from ui.jobs import JobCancelled, JobQueue
+from core.logbuffer import DEBUG, ERROR, INFO, SUCCESS, WARNING, LogBuffer, default_log_path
 import subprocess
 import sys
 import os
 import tempfile
 import zipfile
-import time
 import binascii
 import shutil
-import struct
-
-
-class CommandThread(QThread):
-    output_signal = Signal(str)
-
-    def __init__(self, command):
+import threading
+import signal
+import collections
+import json
+
+# 输出颜色对应的日志级别(QColor.name())
+COLOR_LEVELS = {
+    QColor("red").name(): ERROR,
+    QColor("orange").name(): WARNING,
+    QColor("lightgreen").name(): SUCCESS,
+}
+
+# 子进程原始输出的颜色
+PROCESS_COLOR = QColor("yellow").name()
+
+
+class ProcessRunner(QThread):
+    """子进程输出的非阻塞读取器
+
+    后台线程按字节块读取子进程输出并切分为行，放入有界缓冲区；
+    界面线程由定时器按时间片一次性取出一批行投递，避免逐行刷新界面。
+    缓冲区写满时读取线程暂停读取，子进程随之在管道上阻塞（背压）。
+    bkcrack 用 "\r" 刷新的进度不会进入行缓冲区，每个时间片只投递最新的进度快照。
+    传入 checkpoint_store 时在读取线程中记录检查点，界面关闭时也不会丢失；
+    传入 ledger 时进程结束后追加一条运行记录(阶段耗时、峰值内存、返回码和密钥)。
+    command 为参数列表，直接启动 bkcrack 而不经过 shell，停止时信号发给 bkcrack 本身。
+    """
+    output_signal = Signal(list)
+    progress_signal = Signal(dict)
+    done_signal = Signal(int)
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, command, interval=50, max_buffered_lines=20000, max_lines_per_tick=2000,
+                 checkpoint_store=None, ledger=None, source=None, label=None):
+        from core.checkpoint import CheckpointRecorder
+        from core.progress import ProgressTracker
         super().__init__()
-        self.command = command
+        self.command = list(command)
         self.process = None
         self.temp_file_path = None
         self._is_running = True
+        self._interrupted = False
+        self._recorder = CheckpointRecorder(checkpoint_store, command) if checkpoint_store else None
+        self._ledger = ledger
+        self._ledger_fields = (source, label)
+        self._run_record = None
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._max_buffered_lines = max_buffered_lines
+        self._max_lines_per_tick = max_lines_per_tick
+        self._tracker = ProgressTracker()
+        self._progress = None  # 尚未投递的最新进度快照
+
+        # 定时器属于界面线程，timeout 时在界面线程中投递批量输出
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._deliver)
+        self.finished.connect(self._on_finished)
+
+    def start(self, *args):
+        self._timer.start()
+        super().start(*args)
 
     def run(self):
-        self.process = subprocess.Popen(
-            self.command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            shell=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-        for line in self.process.stdout:
-            if not self._is_running:
+        from core.ledger import RunRecord, wait_child
+        from core.progress import ProgressParser
+        if self._ledger:
+            self._run_record = RunRecord(self.command, *self._ledger_fields)
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                # 独立进程组，停止时连同 bkcrack 的子线程/子进程一起结束
+                start_new_session=(os.name == 'posix')
+            )
+        except OSError as e:
+            self.process = None
+            self._push([('line', f"无法启动 {self.command[0]}: {str(e)}")])
+            return
+        fd = self.process.stdout.fileno()
+        parser = ProgressParser()
+        while self._is_running:
+            try:
+                chunk = os.read(fd, self.CHUNK_SIZE)
+            except OSError:
                 break
-            self.output_signal.emit(line.strip())
-        self.process.stdout.close()
+            if not chunk:
+                break
+            self._push(parser.feed(chunk))
         if self._is_running:
-            self.process.wait()
+            self._push(parser.flush())
+        self.process.stdout.close()
+        # 停止时已发送 SIGTERM，只等待片刻，仍未退出时不再阻塞
+        _, peak_rss = wait_child(self.process, None if self._is_running else 2.0)
+        if self._run_record:
+            self._ledger.append(self._run_record.finish(self.process.returncode, peak_rss,
+                                                        stopped=not self._is_running or self._interrupted))
+        if self._recorder:
+            completed = self._is_running and not self._interrupted and self.process.returncode == 0
+            self._recorder.finish(completed)
         if self.temp_file_path and os.path.exists(self.temp_file_path):
             try:
                 os.unlink(self.temp_file_path)
             except:
                 pass
 
+    def _push(self, events):
+        lines = []
+        for event in events:
+            if self._recorder:
+                self._recorder.on_event(event)
+            if self._run_record:
+                self._run_record.on_event(event)
+            if event[0] == 'line':
+                lines.append(event[1])
+            else:
+                snapshot = self._tracker.apply(event)
+                with self._cond:
+                    self._progress = snapshot
+        if not lines:
+            return
+        with self._cond:
+            # 缓冲区已满时等待界面线程取走数据
+            while self._is_running and len(self._pending) >= self._max_buffered_lines:
+                self._cond.wait()
+            self._pending.extend(lines)
+
+    def _take(self, limit):
+        with self._cond:
+            count = min(limit, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+            self._cond.notify_all()
+        return batch
+
+    def _take_progress(self):
+        with self._cond:
+            progress, self._progress = self._progress, None
+        return progress
+
+    def _deliver(self):
+        batch = self._take(self._max_lines_per_tick)
+        if batch and self._is_running:
+            self.output_signal.emit(batch)
+        progress = self._take_progress()
+        if progress and self._is_running:
+            self.progress_signal.emit(progress)
+
+    def _on_finished(self):
+        self._timer.stop()
+        while self._is_running:
+            batch = self._take(self._max_lines_per_tick)
+            if not batch:
+                break
+            self.output_signal.emit(batch)
+        progress = self._take_progress()
+        if progress and self._is_running:
+            self.progress_signal.emit(progress)
+        returncode = self.process.returncode if self.process and self.process.returncode is not None else -1
+        self.done_signal.emit(returncode)
+
+    def _signal(self, sig):
+        if os.name == 'posix':
+            os.killpg(self.process.pid, sig)
+        else:
+            self.process.terminate()
+
     def stop(self):
         self._is_running = False
+        with self._cond:
+            self._pending.clear()
+            self._cond.notify_all()
         if self.process:
             try:
-                self.process.terminate()
+                self._signal(signal.SIGTERM)
             except:
                 pass
 
-    def set_temp_file(self, path):
-        self.temp_file_path = path
-
-
-class FilePreviewWindow(QDialog):
-    """文件预览窗口"""
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("文件预览")
-        self.setMinimumSize(600, 500)
-        self.setStyleSheet("""
-            QDialog {
-                background-color: rgb(35, 35, 35);
-            }
-            QLabel {
-                color: white;
-                font-family: Arial;
-                font-size: 12pt;
-            }
-        """)
-
-        self.layout = QVBoxLayout(self)
-        self.current_image = None  # 用于保存当前预览的图像
-
-        self.status_label = QLabel()
-        self.status_label.setAlignment(Qt.AlignCenter)
-        self.layout.addWidget(self.status_label)
-
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-
-        # 使用QTextEdit替代QLabel以支持文本选择和复制
-        self.text_edit = QTextEdit()
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setStyleSheet("""
-            QTextEdit {
-                background-color: rgb(45, 45, 45);
-                color: white;
-                font-family: Consolas;
-                font-size: 10pt;
-                border: none;
-                padding: 10px;
-            }
-        """)
-
-        # 图像预览标签
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignCenter)
-        self.image_label.setStyleSheet("QLabel { padding: 20px; }")
-
-        # 内容堆叠容器
-        self.content_stack = QWidget()
-        self.stack_layout = QVBoxLayout(self.content_stack)
-        self.stack_layout.addWidget(self.text_edit)
-        self.stack_layout.addWidget(self.image_label)
-        self.stack_layout.setContentsMargins(0, 0, 0, 0)
-
-        self.scroll_area.setWidget(self.content_stack)
-        self.layout.addWidget(self.scroll_area)
-
-        # 设置右键菜单
-        self.setup_context_menus()
-
-    def setup_context_menus(self):
-        # 文本编辑器的右键菜单
-        self.text_edit.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.text_edit.customContextMenuRequested.connect(self.show_text_context_menu)
-
-        # 图像标签的右键菜单
-        self.image_label.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.image_label.customContextMenuRequested.connect(self.show_image_context_menu)
-
-    def show_text_context_menu(self, pos):
-        menu = self.text_edit.createStandardContextMenu()
-
-        # 添加全选和复制按钮
-        select_all = QAction("全选", self)
-        select_all.triggered.connect(self.text_edit.selectAll)
-        menu.insertAction(menu.actions()[0], select_all)
-
-        copy_action = QAction("复制", self)
-        copy_action.triggered.connect(self.text_edit.copy)
-        menu.insertAction(menu.actions()[1], copy_action)
+    def interrupt(self, grace=3.0):
+        """请求 bkcrack 输出检查点后退出，超时仍未退出时强制结束
 
-        menu.exec(self.text_edit.mapToGlobal(pos))
-
-    def show_image_context_menu(self, pos):
-        if not self.current_image:
+        POSIX 下发送 SIGINT，bkcrack 会打印 --continue-attack/--continue-recovery 位置；
+        Windows 下无法向子进程发送 Ctrl+C，只能直接结束，依靠按进度保存的检查点。
+        """
+        self._interrupted = True
+        if not self.process or self.process.poll() is not None:
+            return
+        if os.name != 'posix':
+            self.stop()
             return
-
-        menu = QMenu()
-        copy_action = QAction("复制图片", self)
-        copy_action.triggered.connect(self.copy_image_to_clipboard)
-        menu.addAction(copy_action)
-        menu.exec(self.image_label.mapToGlobal(pos))
-
-    def copy_image_to_clipboard(self):
-        if self.current_image:
-            clipboard = QGuiApplication.clipboard()
-            clipboard.setImage(self.current_image)
-
-    def preview_file(self, file_path):
-        try:
-            self.text_edit.clear()
-            self.image_label.clear()
-            self.status_label.clear()
-
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"文件不存在: {file_path}")
-
-            file_size = os.path.getsize(file_path)
-            if file_size > 10 * 1024 * 1024:  # 大于10MB的文件
-                raise ValueError("文件过大，请直接查看")
-
-            ext = os.path.splitext(file_path)[1].lower()
-            supported_image = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
-            supported_text = ('.txt', '.csv', '.xml', '.json', '.html', '.htm')
-
-            if ext in supported_image:
-                self.preview_image(file_path)
-                self.text_edit.hide()
-                self.image_label.show()
-            elif ext in supported_text:
-                self.preview_text(file_path)
-                self.image_label.hide()
-                self.text_edit.show()
-            else:
-                QMessageBox.warning(
-                    self,
-                    "不支持的文件格式",
-                    f"不支持预览 {ext} 格式的文件",
-                    QMessageBox.Ok
-                )
-                self.close()
-                return
-
-            self.status_label.setText(f"正在预览: {os.path.basename(file_path)}")
-            self.status_label.setStyleSheet("color: cyan;")
-
-        except Exception as e:
-            self.show_error(f"预览失败: {str(e)}")
-
-    def preview_image(self, file_path):
         try:
-            reader = QImageReader(file_path)
-            reader.setAutoTransform(True)
-
-            max_size = 1600
-            if reader.size().width() > max_size or reader.size().height() > max_size:
-                reader.setScaledSize(reader.size().scaled(
-                    max_size, max_size, Qt.KeepAspectRatio))
-
-            self.current_image = reader.read()
-            if self.current_image.isNull():
-                raise ValueError(reader.errorString())
-
-            pixmap = QPixmap.fromImage(self.current_image)
-            self.image_label.setPixmap(pixmap)
-            self.image_label.adjustSize()
-
-            info = f"尺寸: {self.current_image.width()}x{self.current_image.height()} 格式: {reader.format()}"
-            self.status_label.setText(info)
-
-        except Exception as e:
-            self.show_error(f"无法加载图片: {str(e)}")
+            self._signal(signal.SIGINT)
+        except OSError:
+            pass
+        timer = threading.Timer(grace, lambda: self.process.poll() is None and self.stop())
+        timer.daemon = True
+        timer.start()
 
-    def preview_text(self, file_path):
-        try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(4096)
+    def set_temp_file(self, path):
+        self.temp_file_path = path
 
-            # 方法1：优先尝试 UTF-8
-            try:
-                text = raw_data.decode('utf-8')
-                self.text_edit.setText(text)
-                self.status_label.setText(f"编码: utf-8 | 大小: {os.path.getsize(file_path)} 字节")
-                return
-            except UnicodeDecodeError:
-                pass
 
-            # 方法2：用 本地记事本打开
-            try:
-                if os.path.exists(file_path):
-                    subprocess.Popen(['notepad', file_path])  # 只调用一次
-                else:
-                    print("文件不存在！")
-            except:
-                pass
+class ProcessPool(QtCore.QObject):
+    """有界并发地运行一组 bkcrack 子进程
 
-            # 方法3：显示十六进制（终极回退方案）
-            hex_data = ' '.join(f'{b:02x}' for b in raw_data[:1000])  # 限制显示前1000字节
-            self.text_edit.setText(f"无法解码为文本，Hex 预览:\n{hex_data}...")
-            self.status_label.setText(f"编码: 二进制 | 大小: {os.path.getsize(file_path)} 字节")
+    任一任务输出命中标记(如 "Keys:")后，其余运行中和排队中的任务全部取消，
+    命中的任务继续运行直到自然结束。每个任务的耗时和结束状态都会记录下来。
+    """
+    output_signal = Signal(str, list)        # 任务标签, 输出行
+    progress_signal = Signal(str, dict)      # 任务标签, 进度快照
+    hit_signal = Signal(str, str)            # 任务标签, 命中行
+    job_done_signal = Signal(str, str, float)  # 任务标签, 状态, 耗时(秒)
+    all_done_signal = Signal()
 
-        except Exception as e:
-            self.show_error(f"读取失败: {str(e)}")
-
-    def show_error(self, message):
-        self.text_edit.setText("")
-        self.status_label.setText(message)
-        self.status_label.setStyleSheet("color: red;")
+    def __init__(self, jobs, max_workers=None, hit_marker="Keys:", parent=None, checkpoint_store=None,
+                 ledger=None, source=None):
+        super().__init__(parent)
+        self.jobs = collections.deque(jobs)  # (标签, 命令)
+        self.checkpoint_store = checkpoint_store
+        self.ledger = ledger
+        self.source = source
+        self.total = len(self.jobs)
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.hit_marker = hit_marker
+        self.winner = None
+        self.results = []  # (标签, 状态, 耗时)
+        self._running = {}  # 标签 -> (ProcessRunner, 开始时间)
+        self._cancelled = False
+
+    def start(self):
+        self._fill()
+
+    def is_running(self):
+        return bool(self._running) or bool(self.jobs)
+
+    def _fill(self):
+        while self.jobs and len(self._running) < self.max_workers and not self._cancelled:
+            label, command = self.jobs.popleft()
+            runner = ProcessRunner(command, checkpoint_store=self.checkpoint_store, ledger=self.ledger,
+                                   source=self.source, label=label)
+            runner.output_signal.connect(lambda lines, label=label: self._on_output(label, lines))
+            runner.progress_signal.connect(lambda progress, label=label: self.progress_signal.emit(label, progress))
+            runner.done_signal.connect(lambda code, label=label: self._on_done(label, code))
+            self._running[label] = (runner, time.perf_counter())
+            runner.start()
+        if not self._running:
+            self.all_done_signal.emit()
+
+    def _on_output(self, label, lines):
+        self.output_signal.emit(label, lines)
+        if self.winner is None:
+            for line in lines:
+                if self.hit_marker in line:
+                    self.winner = label
+                    self.hit_signal.emit(label, line)
+                    self._cancel_others(label)
+                    break
 
+    def _on_done(self, label, returncode):
+        runner, started = self._running.pop(label, (None, time.perf_counter()))
+        elapsed = time.perf_counter() - started
+        if label == self.winner:
+            status = "命中"
+        elif self._cancelled and returncode != 0:
+            status = "已取消"
+        else:
+            status = f"结束(返回码 {returncode})"
+        self.results.append((label, status, elapsed))
+        self.job_done_signal.emit(label, status, elapsed)
+        if runner:
+            runner.wait()
+            runner.deleteLater()
+        self._fill()
+
+    def _cancel_others(self, keep_label):
+        self._cancelled = True
+        self.jobs.clear()
+        for label, (runner, _) in self._running.items():
+            if label != keep_label:
+                runner.stop()
 
-class MultiFilePreviewWindow(QDialog):
-    """多文件预览窗口（修复版）"""
+    def stop(self):
+        """取消全部任务"""
+        self._cancel_others(None)
+
+    def interrupt(self):
+        """取消排队中的任务，运行中的任务中断并保存检查点"""
+        self._cancelled = True
+        self.jobs.clear()
+        for runner, _ in self._running.values():
+            runner.interrupt()
+
+    def wait(self, grace_ms):
+        """等待运行中的任务退出，grace_ms 毫秒后仍未退出的强制结束"""
+        deadline = time.perf_counter() + grace_ms / 1000
+        for runner, _ in list(self._running.values()):
+            remaining = max(0, int((deadline - time.perf_counter()) * 1000))
+            if not runner.wait(remaining):
+                runner.stop()
+                runner.wait()
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("文件预览窗口")
-        self.setMinimumSize(1000, 700)
-
-        # 主布局
-        self.main_layout = QHBoxLayout(self)
-
-        # 左侧文件列表
-        self.file_list = QListWidget()
-        self.file_list.setFixedWidth(250)
-        self.file_list.itemClicked.connect(self.on_file_selected)
-        self.main_layout.addWidget(self.file_list)
-
-        # 右侧预览区域（使用独立的FilePreviewWindow）
-        self.preview_window = FilePreviewWindow()  # 创建独立的预览窗口实例
-        self.preview_window.setMinimumWidth(750)
-        self.main_layout.addWidget(self.preview_window)  # 直接添加整个窗口
-
-        # 状态栏
-        self.status_bar = QLabel()
-        self.status_bar.setAlignment(Qt.AlignCenter)
-        self.main_layout.addWidget(self.status_bar)
-
-        # 设置样式
-        self.setStyleSheet("""
-            QDialog {
-                background-color: rgb(35, 35, 35);
-            }
-            QListWidget {
-                background-color: rgb(45, 45, 45);
-                color: white;
-                border: 1px solid rgb(100, 100, 100);
-                font-size: 11pt;
-            }
-            QListWidget::item {
-                padding: 8px;
-                border-bottom: 1px solid rgb(70, 70, 70);
-            }
-            QListWidget::item:hover {
-                background-color: rgb(60, 60, 60);
-            }
-            QListWidget::item:selected {
-                background-color: rgb(255, 105, 180);
-                color: white;
-            }
-            QLabel#status_bar {
-                border-top: 1px solid gray;
-                padding: 5px;
-                color: white;
-            }
-        """)
-        self.status_bar.setObjectName("status_bar")
-
-    def set_files(self, file_paths):
-        """设置要预览的文件列表"""
-        self.file_list.clear()
-        for path in file_paths:
-            item = QListWidgetItem(os.path.basename(path))
-            item.setData(Qt.UserRole, path)  # 存储完整路径
-            self.file_list.addItem(item)
-
-        # 默认选择第一个文件
-        if self.file_list.count() > 0:
-            self.file_list.setCurrentRow(0)
-            self.on_file_selected(self.file_list.currentItem())
-
-    def on_file_selected(self, item):
-        """当选择文件时更新预览"""
-        file_path = item.data(Qt.UserRole)
-        try:
-            self.preview_window.preview_file(file_path)
-        except Exception as e:
-            self.status_bar.setText(f"预览失败: {str(e)}")
-            self.status_bar.setStyleSheet("color: red;")
 
 class MainWindow(QWidget, Ui_Form):
     def __init__(self):
@@ -349,28 +327,35 @@ class MainWindow(QWidget, Ui_Form):
         self.setupUi(self)
         self.setAcceptDrops(True)
         self.ConvertToHexButton.clicked.connect(self.convert_to_hex)
-        self.extension_offset_map = {
-            'png': '0',
-            'exe': '64',
-            'xml': '0',
-            'pcapng': '6',
-            'svg': '0',
-            'vmdk': '0',
-            'png_plain': '0',
-            'exe_plain': '64',
-            'xml_plain': '0',
-            'pcapng_plain': '6',
-            'svg_plain': '0',
-            'jpg_plain': '0',
-            'license_plain': '0'
-        }
         self.compressedZipPath = ''
         self.plainZipPath = ''
         self.plainFilePath = ''
         self.filesToCompress = []
         self.command_thread = None
-        self.compression_mode = None  # 存储压缩模式: 'store' 或 'deflate'
+        self.parallel_pool = None
+        self.matrix_entries = {}
+        self.recovery_output = {}
+        self.job_queue = JobQueue(parent=self)
+        try:
+            self.OutPutArea.set_buffer(LogBuffer(path=default_log_path()))
+        except OSError as e:
+            print(f"无法打开日志文件: {str(e)}")
+        for level, title in ((DEBUG, "全部"), (INFO, "隐藏进程输出"), (WARNING, "仅警告和错误")):
+            self.LogLevelCombo.addItem(title, level)
+        self.LogLevelCombo.setToolTip(f"完整日志: {self.OutPutArea.buffer.path or '未保存'}")
+        self.LogLevelCombo.currentIndexChanged.connect(
+            lambda: self.OutPutArea.set_min_level(self.LogLevelCombo.currentData()))
+        self.cached_keys = None
+        self.cached_password = None
+        self.recovery_keys = ''
+        # 密钥缓存、检查点、运行记录等在第一次使用时才导入和打开，见 service()
+        self._services = {}
+        self._services_lock = threading.RLock()
         self.bind()
+        # 在后台探测 bkcrack 的版本和支持的参数，之后构建命令时直接使用缓存结果；
+        # 随后在后台打开密钥缓存等，第一次使用时通常已经就绪
+        self.job_queue.submit(self._probe_backend_job, on_done=self.on_backend_probed)
+        self.job_queue.submit(self._open_services_job)
 
         # 添加粉色预览按钮
         self.PreviewButton = PushButton("预览文件")
@@ -400,174 +385,101 @@ class MainWindow(QWidget, Ui_Form):
         if target_file_layout:
             target_file_layout.insertWidget(2, self.PreviewButton)
 
+    def service(self, name, create):
+        """返回名为 name 的共享对象，第一次调用时由 create() 创建(可在后台线程中调用)
+
+        sqlite3、subprocess 等依赖只在这里第一次用到时导入，不拖慢程序启动。
+        """
+        with self._services_lock:
+            if name not in self._services:
+                self._services[name] = create()
+            return self._services[name]
+
+    @property
+    def key_store(self):
+        def create():
+            from core.keystore import KeyStore
+            try:
+                return KeyStore()
+            except Exception as e:
+                print(f"无法打开密钥缓存: {str(e)}")
+                return None
+        return self.service('key_store', create)
+
+    @property
+    def checkpoint_store(self):
+        def create():
+            from core.checkpoint import CheckpointStore
+            try:
+                return CheckpointStore()
+            except OSError as e:
+                print(f"无法打开检查点目录: {str(e)}")
+                return None
+        return self.service('checkpoint_store', create)
+
+    @property
+    def ledger(self):
+        def create():
+            from core.ledger import Ledger
+            key_store = self.key_store
+            try:
+                return Ledger(fingerprint=key_store.fingerprint if key_store else None)
+            except OSError as e:
+                print(f"无法打开运行记录: {str(e)}")
+                return None
+        return self.service('ledger', create)
+
+    @property
+    def inspection_cache(self):
+        def create():
+            from core.inspection import InspectionCache
+            return InspectionCache()
+        return self.service('inspection_cache', create)
+
+    @property
+    def thread_settings(self):
+        def create():
+            from core.threads import ThreadSettings
+            return ThreadSettings()
+        return self.service('thread_settings', create)
+
+    def _probe_backend_job(self, job):
+        from core.backend import get_backend
+        return get_backend()
+
+    def _open_services_job(self, job):
+        """后台线程：提前打开密钥缓存、检查点目录和运行记录"""
+        return self.ledger, self.checkpoint_store
+
     def preview_selected_file(self):
         if not self.compressedZipPath:
             QMessageBox.warning(self, "警告", "请先选择加密压缩包")
             return
 
-        # 检查压缩模式
-        if not self.compression_mode:
-            QMessageBox.warning(self, "警告", "请先查看压缩包信息以确定压缩模式")
-            return
+        # 预览窗口只在第一次使用时导入和创建，不拖慢程序启动
+        from ui.preview import MultiFilePreviewWindow, PreviewSource
 
+        temp_dir = tempfile.mkdtemp(prefix="bkcrack_preview_")
+        print("临时目录路径:", temp_dir)
+        key = self.InputKey.toPlainText().strip()
         try:
-            with zipfile.ZipFile(self.compressedZipPath, 'r') as zip_ref:
-                file_list = zip_ref.namelist()
-                print("压缩包内文件列表:", file_list)
-
-                if not file_list:
-                    QMessageBox.warning(self, "警告", "压缩包中没有文件")
-                    return
-
-                temp_dir = tempfile.mkdtemp(prefix="bkcrack_preview_")
-                print("临时目录路径:", temp_dir)
-
-                temp_files = []
-                key = self.InputKey.toPlainText().strip()
-
-                if self.compression_mode == 'store':
-                    # 存储模式 - 使用原有逻辑
-                    for file in file_list:
-                        temp_path = os.path.join(temp_dir, os.path.basename(file))
-                        print("正在处理文件:", file, "=>", temp_path)
-
-                        if key:
-                            key_parts = key.split()
-                            if len(key_parts) == 3:
-                                command = ["bkcrack.exe", "-C", self.compressedZipPath,
-                                           "-c", file, "-k", *key_parts, "-d", temp_path]
-                                result = subprocess.run(command, capture_output=True, text=True)
-                                print("解密命令输出:", result.stdout)
-                                if result.returncode != 0:
-                                    print("解密失败:", result.stderr)
-                                    continue
-
-                        else:
-                            with zipfile.ZipFile(self.compressedZipPath, 'r') as zip_ref:
-                                zip_ref.extract(file, temp_dir)
-
-                        if os.path.exists(temp_path):
-                            temp_files.append(temp_path)
-                            print("文件提取成功:", temp_path)
-                        else:
-                            print("文件提取失败:", temp_path)
-
-                elif self.compression_mode == 'deflate':
-                    # 压缩模式 - 使用-U命令创建新压缩包，然后用7-Zip解压
-                    output_zip = os.path.join(temp_dir, "1.zip")
-                    password = "1"  # 固定密码
-
-                    # 提示用户
-                    self.append_colored_output(f"\n检测到压缩模式为: {self.compression_mode}", QColor("cyan"))
-                    self.append_colored_output("将自动使用 -U 命令创建新压缩包 (密码:1) ", QColor("cyan"))
-                    self.append_colored_output(f"输出路径: {output_zip}", QColor("cyan"))
-
-                    # 执行-U命令
-                    key_parts = key.split()
-                    if len(key_parts) == 3:
-                        command = ["bkcrack.exe", "-C", self.compressedZipPath,
-                                   "-c", file_list[0], "-k", *key_parts, "-U", output_zip, password]
-                        result = subprocess.run(command, capture_output=True, text=True)
-                        print("U命令输出:", result.stdout)
-
-                        if os.path.exists(output_zip):
-                            # 使用7-Zip解压
-                            seven_zip_path = self.find_7zip()
-                            if seven_zip_path:
-                                extract_dir = temp_dir
-                                seven_zip_command = [
-                                    seven_zip_path,
-                                    "x",
-                                    f"-p{password}",
-                                    output_zip,
-                                    f"-o{extract_dir}",
-                                    "-y"
-                                ]
-
-                                try:
-                                    result = subprocess.run(
-                                        seven_zip_command,
-                                        capture_output=True,
-                                        text=True
-                                    )
-
-                                    if result.returncode == 0:
-                                        # 获取解压后的文件列表
-                                        for root, _, files in os.walk(extract_dir):
-                                            for file in files:
-                                                if file != "1.zip":  # 排除压缩包本身
-                                                    temp_files.append(os.path.join(root, file))
-                                        print("7-Zip解压成功")
-                                    else:
-                                        print("7-Zip解压失败:", result.stderr)
-                                        # 如果7-Zip失败，尝试使用Python的zipfile模块
-                                        try:
-                                            with zipfile.ZipFile(output_zip, 'r') as zip_ref:
-                                                zip_ref.extractall(extract_dir, pwd=password.encode('utf-8'))
-                                            # 再次获取文件列表
-                                            for root, _, files in os.walk(extract_dir):
-                                                for file in files:
-                                                    if file != "1.zip":
-                                                        temp_files.append(os.path.join(root, file))
-                                            print("使用zipfile模块解压成功")
-                                        except Exception as e:
-                                            print("zipfile解压失败:", str(e))
-                                except Exception as e:
-                                    print("7-Zip执行出错:", str(e))
-                            else:
-                                print("未找到7-Zip，尝试使用Python的zipfile模块")
-                                try:
-                                    with zipfile.ZipFile(output_zip, 'r') as zip_ref:
-                                        zip_ref.extractall(temp_dir, pwd=password.encode('utf-8'))
-                                    # 获取解压后的文件列表
-                                    for root, _, files in os.walk(temp_dir):
-                                        for file in files:
-                                            if file != "1.zip":
-                                                temp_files.append(os.path.join(root, file))
-                                    print("使用zipfile模块解压成功")
-                                except Exception as e:
-                                    print("zipfile解压失败:", str(e))
-                        else:
-                            print("U命令执行失败，未生成输出文件")
-
-                if not temp_files:
-                    raise Exception("没有成功提取任何文件")
-
-                print("最终可预览文件列表:", temp_files)
-                preview = MultiFilePreviewWindow(self)
-                preview.set_files(temp_files)
-                preview.exec()
-
+            source = PreviewSource(self.compressedZipPath, key, temp_dir)
         except Exception as e:
-            QMessageBox.critical(self, "错误", f"无法预览文件: {str(e)}")
-        finally:
-            QtCore.QTimer.singleShot(0, lambda: self.cleanup_temp_files(temp_dir))
+            QMessageBox.warning(self, "警告", f"无法预览文件: {str(e)}")
+            self.cleanup_temp_files(temp_dir)
+            return
+        if not source.names():
+            QMessageBox.warning(self, "警告", "压缩包中没有文件")
+            self.cleanup_temp_files(temp_dir)
+            return
 
-    def find_7zip(self):
-        """查找7-Zip可执行文件路径"""
-        # 检查常见安装路径
-        possible_paths = [
-            "C:\\Program Files\\7-Zip\\7z.exe",
-            "C:\\Program Files (x86)\\7-Zip\\7z.exe",
-            "D:\\压缩\\7-Zip\\7z.exe",
-            os.path.join(os.environ.get("ProgramFiles", ""), "7-Zip", "7z.exe"),
-            os.path.join(os.environ.get("ProgramFiles(x86)", ""), "7-Zip", "7z.exe"),
-            os.path.join(os.environ.get("压缩", ""), "7-Zip", "7z.exe"),
-        ]
-
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-
-        # 检查PATH环境变量
         try:
-            result = subprocess.run(["where", "7z"], capture_output=True, text=True)
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
-            pass
-
-        return None
+            # 条目在选中时才解密，窗口立即打开
+            preview = MultiFilePreviewWindow(self)
+            preview.set_source(source)
+            preview.exec()
+        finally:
+            QtCore.QTimer.singleShot(0, lambda: self.cleanup_temp_files(temp_dir))
 
     def cleanup_temp_files(self, temp_dir):
         try:
@@ -590,6 +502,7 @@ class MainWindow(QWidget, Ui_Form):
                     self.UpdateCompressedFilePath(file_path)
                     self.append_colored_output(f"已拖拽选择加密压缩包(-C): {file_path}", QColor("yellow"))
                     self.get_zip_contents(file_path, is_encrypted=True)
+                    self.lookup_cached_key(file_path)
                 else:
                     # 拖拽到其他区域视为明文压缩包
                     self.plainZipPath = file_path
@@ -602,6 +515,21 @@ class MainWindow(QWidget, Ui_Form):
                 self.auto_fill_offset_from_path(file_path)
                 self.PlainTextContent.setPlainText(os.path.basename(file_path))
 
+    def closeEvent(self, event):
+        """关闭窗口时取消后台任务并结束仍在运行的子进程"""
+        self.job_queue.shutdown()
+        # 给 bkcrack 留出输出检查点的时间，超时后强制结束
+        if self.parallel_pool and self.parallel_pool.is_running():
+            self.parallel_pool.interrupt()
+            self.parallel_pool.wait(3500)
+        if self.command_thread and self.command_thread.isRunning():
+            self.command_thread.interrupt()
+            if not self.command_thread.wait(3500):
+                self.command_thread.stop()
+                self.command_thread.wait()
+        self.OutPutArea.close_log()
+        super().closeEvent(event)
+
     def clear_all(self):
         """清除所有输入和输出"""
         # 清除路径变量
@@ -609,7 +537,8 @@ class MainWindow(QWidget, Ui_Form):
         self.plainZipPath = ''
         self.plainFilePath = ''
         self.filesToCompress = []
-        self.compression_mode = None
+        self.cached_keys = None
+        self.cached_password = None
 
         # 清除UI元素
         self.ViewCompressedZip.clear()
@@ -628,28 +557,52 @@ class MainWindow(QWidget, Ui_Form):
         self.CompressPasswordInput.clear()
         self.CompressOutputPath.clear()
         self.PasswordLengthInput.clear()
+        self.ThreadsInput.clear()
+        self.OffsetRangeInput.clear()
+        self.SweepWorkersInput.clear()
+        self.MatrixPlainsInput.clear()
+        self.MatrixWorkersInput.clear()
+        self.RecoveryWorkersInput.clear()
         self.OutPutArea.clear()
+        self.reset_progress()
 
         # 停止正在运行的线程
         if self.command_thread and self.command_thread.isRunning():
             self.command_thread.stop()
             self.command_thread.quit()
             self.command_thread.wait()
+        if self.parallel_pool and self.parallel_pool.is_running():
+            self.parallel_pool.stop()
+        self.job_queue.cancel_all()
 
         self.append_colored_output("已清除所有输入和输出", QColor("cyan"))
 
     def stop_attack(self):
         """停止当前正在进行的攻击"""
+        stopped = False
         if self.command_thread and self.command_thread.isRunning():
-            self.command_thread.stop()
-            self.command_thread.quit()
-            self.command_thread.wait()
-            self.append_colored_output("已停止当前攻击", QColor("red"))
+            # 中断而不是直接结束，bkcrack 会输出检查点供下次继续
+            self.command_thread.interrupt()
+            stopped = True
+        if self.parallel_pool and self.parallel_pool.is_running():
+            self.parallel_pool.interrupt()
+            stopped = True
+        if self.job_queue.cancel_all():
+            stopped = True
+            self.CalibrateThreadsButton.setEnabled(True)
+        if stopped:
+            self.append_colored_output("已停止当前攻击，检查点已保存时下次运行相同命令可继续", QColor("red"))
         else:
             self.append_colored_output("没有正在运行的攻击", QColor("yellow"))
 
     def recover_password(self):
-        """Recover password using bkcrack's -r option"""
+        """Recover password using bkcrack's -r option, sharded across worker processes"""
+        from core.backend import format_command
+        from core.commands import AttackSpecError, build_recovery_jobs
+        if self.parallel_pool and self.parallel_pool.is_running():
+            self.append_colored_output("已有并行任务正在进行中，请先停止", QColor("red"))
+            return
+
         key = self.InputKey.toPlainText()
         if not key:
             self.append_colored_output("请先输入密钥", QColor("red"))
@@ -660,79 +613,90 @@ class MainWindow(QWidget, Ui_Form):
             self.append_colored_output("密钥格式不正确，应为3个部分", QColor("red"))
             return
 
+        self.recovery_keys = " ".join(key_parts).lower()
+        if self.cached_password and self.recovery_keys == self.cached_keys:
+            display_password = self.cached_password.replace(" ", "[空格]")
+            self.append_colored_output(f"\n✅ 缓存中已有该密钥对应的密码: {display_password}，已跳过恢复", QColor("lightgreen"))
+            self.analyze_password(self.cached_password)
+            return
+
         # Get password length range
         length_range = self.PasswordLengthInput.toPlainText().strip()
         if not length_range:
             self.append_colored_output("请输入密码长度范围 (如: 10 或 8..12)", QColor("red"))
             return
-
-        # Build command
-        command = ["bkcrack.exe", "-k", *key_parts, "-r", length_range, "?p"]
-
-        self.append_colored_output("\n正在尝试恢复密码...", QColor("yellow"))
-        self.append_colored_output("执行命令: " + " ".join(command), QColor("yellow"))
-
         try:
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                shell=True
-            )
+            jobs = build_recovery_jobs(key_parts, length_range)
+        except AttackSpecError as e:
+            self.show_spec_error(e)
+            return
+        except ValueError as e:
+            self.append_colored_output(f"密码长度范围格式不正确: {str(e)}", QColor("red"))
+            return
 
-            output_lines = []
-            password = ""
-            hex_repr = ""
+        workers = self.read_worker_count(self.RecoveryWorkersInput)
+        if workers is None:
+            return
+        threads = self.read_thread_count(min(workers, len(jobs)))
+        if threads is None:
+            return
+        jobs = build_recovery_jobs(key_parts, length_range, threads=threads)
 
-            while True:
-                line = process.stdout.readline()
-                if not line:
-                    break
-                output_lines.append(line.strip())
-                self.append_colored_output(line.strip(), QColor("yellow"))
-
-                # 优先从"as text:"行获取完整密码(包含空格)
-                if "as text:" in line:
-                    password = line.split(":", 1)[1].strip().strip('"\'')
-                # 其次从"as bytes:"行获取十六进制表示
-                elif "as bytes:" in line:
-                    hex_repr = line.split(":", 1)[1].strip()
-                # 最后从"Password:"行获取(如果没有找到其他来源)
-                elif "Password:" in line and not password:
-                    password = line.split(":", 1)[1].strip()
-
-            process.wait()
-
-            if password:
-                # 确保从十六进制还原密码(最准确)
-                if hex_repr:
-                    try:
-                        # 从十六进制字符串还原密码(包含空格)
-                        hex_chars = hex_repr.split()
-                        password_bytes = bytes.fromhex("".join(hex_chars))
-                        password = password_bytes.decode('utf-8', errors='replace')
-                    except:
-                        pass
-
-                self.append_colored_output(f"\n✅ 密码恢复成功!", QColor("lightgreen"))
-
-                # 显示密码(空格显示为[空格])
-                display_password = password.replace(" ", "[空格]")
-                self.append_colored_output(f"恢复的密码: {display_password}", QColor("lightgreen"))
-
-                if hex_repr:
-                    self.append_colored_output(f"十六进制表示: {hex_repr}", QColor("lightgreen"))
-
-                # 密码分析(使用从十六进制还原的密码)
-                self.analyze_password(password)
-            else:
-                self.append_colored_output("\n❌ 无法恢复密码", QColor("red"))
+        jobs = self.resume_jobs(jobs)
 
-        except Exception as e:
-            self.append_colored_output(f"密码恢复过程中出错: {str(e)}", QColor("red"))
+        self.recovery_output = {label: [] for label, _ in jobs}
+        self.append_colored_output("\n正在尝试恢复密码...", QColor("yellow"))
+        self.append_colored_output(f"共 {len(jobs)} 个长度分片，并行进程数: {workers}", QColor("yellow"))
+        for label, command in jobs:
+            self.append_colored_output(f"分片 {label}: {format_command(command)}", QColor("yellow"))
+
+        self.parallel_pool = ProcessPool(jobs, workers, hit_marker="Password", parent=self,
+                                         checkpoint_store=self.checkpoint_store, ledger=self.ledger,
+                                         source="recover")
+        self.parallel_pool.output_signal.connect(self.on_recovery_output)
+        self.parallel_pool.hit_signal.connect(self.on_recovery_hit)
+        self.parallel_pool.job_done_signal.connect(self.on_recovery_job_done)
+        self.parallel_pool.all_done_signal.connect(self.on_recovery_finished)
+        self.parallel_pool.progress_signal.connect(self.update_progress)
+        self.reset_progress()
+        self.parallel_pool.start()
+
+    def on_recovery_output(self, label, lines):
+        self.recovery_output.setdefault(label, []).extend(lines)
+        # 只显示结果行和长度进度，其余输出保留在分片缓存中
+        shown = [line for line in lines if line and ("length" in line or "Password" in line or "as " in line)]
+        if shown:
+            self.append_colored_output("\n".join(f"[{label}] {line}" for line in shown), QColor("yellow"))
+
+    def on_recovery_hit(self, label, line):
+        self.append_colored_output(f"分片 {label} 找到密码，其余分片已取消", QColor("lightgreen"))
+
+    def on_recovery_job_done(self, label, status, elapsed):
+        pool = self.parallel_pool
+        self.append_colored_output(f"分片 {label}: {status}，耗时 {elapsed:.2f} 秒  (进度 {len(pool.results)}/{pool.total})", QColor("yellow"))
+
+    def on_recovery_finished(self):
+        from core.commands import parse_recovery_output
+        winner = self.parallel_pool.winner
+        password, hex_repr = "", ""
+        if winner is not None:
+            password, hex_repr = parse_recovery_output(self.recovery_output.get(winner, []))
+
+        if password:
+            self.append_colored_output(f"\n✅ 密码恢复成功!", QColor("lightgreen"))
+            self.remember_password(self.recovery_keys, password)
+
+            # 显示密码(空格显示为[空格])
+            display_password = password.replace(" ", "[空格]")
+            self.append_colored_output(f"恢复的密码: {display_password}", QColor("lightgreen"))
+
+            if hex_repr:
+                self.append_colored_output(f"十六进制表示: {hex_repr}", QColor("lightgreen"))
+
+            # 密码分析(使用从十六进制还原的密码)
+            self.analyze_password(password)
+        else:
+            self.append_colored_output("\n❌ 无法恢复密码", QColor("red"))
 
     def analyze_password(self, password):
         """Analyze the recovered password and show special characters"""
@@ -776,35 +740,35 @@ class MainWindow(QWidget, Ui_Form):
             self.append_colored_output("请先输入目标文件(-c)", QColor("red"))
             return
 
-        # 1. 首先验证压缩包内容
-        try:
-            with zipfile.ZipFile(self.compressedZipPath, 'r') as zip_ref:
-                # 获取压缩包内实际文件名列表（考虑大小写）
-                real_files = zip_ref.namelist()
-
-                # 查找匹配的文件（不区分大小写）
-                matched_files = [f for f in real_files if f.lower() == target_file.lower()]
-
-                if not matched_files:
-                    self.append_colored_output("\n❌ 压缩包中找不到匹配的文件", QColor("red"))
-                    self.append_colored_output("压缩包实际内容:", QColor("cyan"))
-                    for f in real_files:
-                        self.append_colored_output(f" - {f}", QColor("cyan"))
-                    return
-
-                # 使用压缩包中的实际文件名（保持大小写一致）
-                actual_file = matched_files[0]
-        except Exception as e:
-            self.append_colored_output(f"\n❌ 无法读取压缩包: {str(e)}", QColor("red"))
-            return
-
-        # 2. 准备导出参数
         key_parts = key.strip().split()
         if len(key_parts) != 3:
             self.append_colored_output("密钥格式不正确，应为3个部分", QColor("red"))
             return
 
-        # 3. 获取输出路径（当前目录）
+        self.append_colored_output("正在直接导出文件...", QColor("yellow"))
+        self.job_queue.submit(self._direct_extract_job, self.compressedZipPath, target_file, key_parts,
+                              on_done=self.on_direct_extract_done,
+                              on_error=lambda e: self.append_colored_output(f"\n❌ 无法读取压缩包: {str(e)}", QColor("red")))
+
+    def _direct_extract_job(self, job, zip_path, target_file, key_parts):
+        """后台线程：匹配条目名、选择输出路径并执行 -d 导出"""
+        from core.backend import get_backend
+        from core.inflate import can_inflate, extract_entry_to, inflate_entry_file
+        from core.ledger import RunRecord
+        from core.zipcrypto import decrypt_entry_to, parse_keys, prefer_in_process, verify_entry
+        from core.zipmeta import ENCRYPTION_ZIPCRYPTO, load_index
+        # 1. 首先验证压缩包内容
+        index = load_index(zip_path)
+
+        # 查找匹配的文件（不区分大小写）
+        matched_files = index.find_casefold(target_file)
+        if not matched_files:
+            return {'matched': False, 'real_files': index.names()}
+
+        # 使用压缩包中的实际文件名（保持大小写一致）
+        actual_file = matched_files[0]
+
+        # 2. 获取输出路径（当前目录）
         output_dir = os.path.dirname(os.path.abspath(__file__))
         pure_filename = os.path.basename(actual_file)
         output_path = os.path.join(output_dir, pure_filename)
@@ -816,39 +780,84 @@ class MainWindow(QWidget, Ui_Form):
             output_path = os.path.join(output_dir, f"{base_name}_{counter}{ext}")
             counter += 1
 
-        # 4. 执行导出命令（使用实际文件名）
-        original_dir = os.getcwd()
-        os.chdir(output_dir)
+        # 3. 先在进程内校验密钥，小文件直接在进程内解密
+        i = index.find(actual_file)
+        entry = index.entry(i)
+        keys = parse_keys(key_parts)
+        if entry.encryption == ENCRYPTION_ZIPCRYPTO:
+            record = RunRecord(None, "extract", archive=zip_path, entry=actual_file)
+            if not verify_entry(index, i, keys):
+                self.record_run(record.finish(None, status='failed'))
+                return {'matched': True, 'command': None, 'output_path': output_path, 'key_parts': key_parts,
+                        'stdout': '', 'stderr': '密钥无法通过该条目的加密头校验', 'exported': False}
+            if prefer_in_process(entry.compress_size):
+                # 压缩条目同时流式解压并校验 CRC，得到的就是原始文件
+                try:
+                    if can_inflate(entry.method):
+                        written = extract_entry_to(index, i, keys, output_path)
+                        message = f"已使用内置 ZipCrypto 引擎解密并解压，写入 {written} 字节"
+                    else:
+                        written = decrypt_entry_to(index, i, keys, output_path)
+                        message = f"已使用内置 ZipCrypto 引擎解密，写入 {written} 字节({entry.compression} 压缩数据)"
+                except ValueError as e:
+                    self.record_run(record.finish(None, status='failed'))
+                    return {'matched': True, 'command': None, 'output_path': output_path, 'key_parts': key_parts,
+                            'stdout': '', 'stderr': str(e), 'exported': False}
+                self.record_run(record.finish(0, status='success'))
+                return {'matched': True, 'command': None, 'output_path': output_path, 'key_parts': key_parts,
+                        'stdout': message, 'stderr': '', 'exported': True}
+
+        # 4. 执行导出命令（使用实际文件名，工作目录为输出目录）
+        raw_filename = pure_filename + ".raw" if can_inflate(entry.method) else pure_filename
+        written_path = os.path.join(output_dir, raw_filename)
+        command = get_backend().command("-C", zip_path, "-c", actual_file, "-k", *key_parts, "-d", raw_filename)
+        record = RunRecord(command, "extract")
+        process = job.run(command, text=True, cwd=output_dir)
+
+        # 5. 检查结果；-d 得到的是压缩数据，流式解压到输出文件
+        exported = os.path.exists(written_path)
+        stdout, stderr = process.stdout, process.stderr
+        if exported and can_inflate(entry.method):
+            try:
+                written = inflate_entry_file(entry, written_path, output_path)
+                stdout += f"\n已解压并通过 CRC 校验，写入 {written} 字节"
+            except ValueError as e:
+                stderr += f"\n解压失败: {str(e)}"
+                exported = False
+            finally:
+                os.unlink(written_path)
+        elif exported and written_path != output_path:
+            # 如果文件名与预期不同（大小写问题），重命名
+            os.rename(written_path, output_path)
+        self.record_run(record.finish(process.returncode, job.peak_rss, status='success' if exported else 'failed'))
+        return {'matched': True, 'command': command, 'output_path': output_path, 'key_parts': key_parts,
+                'stdout': stdout, 'stderr': stderr, 'exported': exported}
+
+    def on_direct_extract_done(self, result):
+        from core.backend import format_command
+        if not result['matched']:
+            self.append_colored_output("\n❌ 压缩包中找不到匹配的文件", QColor("red"))
+            self.append_colored_output("压缩包实际内容:", QColor("cyan"))
+            for f in result['real_files']:
+                self.append_colored_output(f" - {f}", QColor("cyan"))
+            return
 
-        try:
-            command = ["bkcrack.exe", "-C", self.compressedZipPath,
-                       "-c", actual_file, "-k", *key_parts, "-d", pure_filename]
-
-            self.append_colored_output("正在直接导出文件...", QColor("yellow"))
-            self.append_colored_output(f"执行命令: {' '.join(command)}", QColor("yellow"))
-            self.append_colored_output(f"文件将导出到: {output_path}", QColor("yellow"))
-
-            process = subprocess.run(command, capture_output=True, text=True, cwd=output_dir)
-
-            # 输出结果
-            self.append_colored_output(process.stdout, QColor("yellow"))
-            if process.stderr:
-                self.append_colored_output(process.stderr, QColor("red"))
-
-            # 5. 检查结果
-            if os.path.exists(pure_filename):
-                # 如果文件名与预期不同（大小写问题），重命名
-                if pure_filename != os.path.basename(output_path):
-                    os.rename(pure_filename, output_path)
-                self.append_colored_output(f"\n✅ 文件已成功导出到: {output_path}", QColor("lightgreen"))
-            else:
-                self.append_colored_output("\n❌ 导出失败！可能原因:", QColor("red"))
-                self.append_colored_output(f"1. 密钥不正确（当前密钥: {' '.join(key_parts)})", QColor("red"))
-                self.append_colored_output("2. 压缩包已损坏,如果是两部分，建议第一部分就使用-d", QColor("red"))
-                self.append_colored_output("3. 文件权限问题", QColor("red"))
+        if result['command']:
+            self.append_colored_output(f"执行命令: {format_command(result['command'])}", QColor("yellow"))
+        self.append_colored_output(f"文件将导出到: {result['output_path']}", QColor("yellow"))
 
-        finally:
-            os.chdir(original_dir)
+        # 输出结果
+        self.append_colored_output(result['stdout'], QColor("yellow"))
+        if result['stderr']:
+            self.append_colored_output(result['stderr'], QColor("red"))
+
+        if result['exported']:
+            self.append_colored_output(f"\n✅ 文件已成功导出到: {result['output_path']}", QColor("lightgreen"))
+        else:
+            self.append_colored_output("\n❌ 导出失败！可能原因:", QColor("red"))
+            self.append_colored_output(f"1. 密钥不正确（当前密钥: {' '.join(result['key_parts'])})", QColor("red"))
+            self.append_colored_output("2. 压缩包已损坏,如果是两部分，建议第一部分就使用-d", QColor("red"))
+            self.append_colored_output("3. 文件权限问题", QColor("red"))
 
     def update_output_and_check(self, text, output_path):
         """更新输出并检查文件是否成功导出"""
@@ -867,10 +876,13 @@ class MainWindow(QWidget, Ui_Form):
         self.CompressedZipInfo.clicked.connect(self.GetCompressedZipInfo)
         self.SelectPlainFile.clicked.connect(self.select_plain_file)
         self.StartAttack.clicked.connect(self.Attack)
+        self.OffsetSweepButton.clicked.connect(self.offset_sweep_attack)
+        self.CalibrateThreadsButton.clicked.connect(self.calibrate_threads)
+        self.SelectMatrixPlainsButton.clicked.connect(self.select_matrix_plains)
+        self.MatrixAttackButton.clicked.connect(self.matrix_attack)
         self.ExportZip.clicked.connect(self.DoExportZip)
         self.ExecuteHexButton.clicked.connect(self.execute_hex_command)
         self.ChangePasswordButton.clicked.connect(self.change_password)
-        self.OutPutArea.setOpenExternalLinks(True)
         self.ReadZipEntriesButton.clicked.connect(self.read_zip_entries)
         self.DirectExtractButton.clicked.connect(self.direct_extract_file)
         self.RecoverPasswordButton.clicked.connect(self.recover_password)
@@ -916,6 +928,7 @@ class MainWindow(QWidget, Ui_Form):
 
         # Direct hex pattern attack button
         self.DirectHexAttackButton.clicked.connect(self.direct_hex_attack)
+        self.NestedZipButton.clicked.connect(self.fill_nested_zip_plain)
 
         # 新增按钮
         self.ClearAllButton.clicked.connect(self.clear_all)
@@ -937,6 +950,54 @@ class MainWindow(QWidget, Ui_Form):
             self.UpdateCompressedFilePath(file_path)
             self.append_colored_output(f"已选择加密压缩包: {file_path}", QColor("yellow"))
             self.get_zip_contents(file_path, is_encrypted=True)
+            self.lookup_cached_key(file_path)
+
+    def _key_store_job(self, job, method, *args):
+        """后台线程：打开密钥缓存(第一次用到时)并调用它的方法，无法打开时返回 None"""
+        key_store = self.key_store
+        return getattr(key_store, method)(*args) if key_store else None
+
+    def lookup_cached_key(self, zip_path):
+        """在后台打开密钥缓存、计算压缩包指纹并查询，命中时直接填入密钥"""
+        self.job_queue.submit(self._key_store_job, "lookup", zip_path,
+                              on_done=lambda cached: self.on_cached_key(zip_path, cached),
+                              on_error=lambda e: print(f"查询密钥缓存失败: {str(e)}"))
+
+    def on_cached_key(self, zip_path, cached):
+        if not cached or zip_path != self.compressedZipPath:
+            return
+        self.cached_keys = cached['keys']
+        self.cached_password = cached['password']
+        self.InputKey.setPlainText(cached['keys'])
+        self.append_colored_output(f"密钥缓存命中，已自动填入密钥: {cached['keys']}", QColor("lightgreen"))
+        if cached['password']:
+            display_password = cached['password'].replace(" ", "[空格]")
+            self.append_colored_output(f"缓存中的密码: {display_password}", QColor("lightgreen"))
+
+    def remember_keys(self, keys):
+        """把攻击得到的密钥写入缓存"""
+        keys = " ".join(keys.split()).lower()
+        zip_path = self.compressedZipPath
+        self.cached_keys = keys
+        if not zip_path:
+            return
+        self.job_queue.submit(self._key_store_job, "save_keys", zip_path, keys,
+                              on_error=lambda e: print(f"写入密钥缓存失败: {str(e)}"))
+
+    def remember_password(self, keys, password):
+        if keys == self.cached_keys:
+            self.cached_password = password
+        self.job_queue.submit(self._key_store_job, "save_password", keys, password,
+                              on_error=lambda e: print(f"写入密码缓存失败: {str(e)}"))
+
+    def attack_already_solved(self):
+        """当前压缩包的密钥已在缓存中且仍在密钥框内时跳过攻击"""
+        key = " ".join(self.InputKey.toPlainText().split()).lower()
+        if self.cached_keys and key == self.cached_keys:
+            self.append_colored_output(f"该压缩包的密钥已在缓存中: {key}，已跳过攻击", QColor("lightgreen"))
+            self.append_colored_output("如需重新攻击，请先清空密钥输入框", QColor("yellow"))
+            return True
+        return False
 
     def select_plain_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "选择明文文件", "", "All Files (*)")
@@ -947,23 +1008,53 @@ class MainWindow(QWidget, Ui_Form):
             self.PlainTextContent.setPlainText(os.path.basename(file_path))
 
     def get_zip_contents(self, zip_path, is_encrypted=False):
+        from core.zipmeta import load_index
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                file_list = zip_ref.namelist()
-                if file_list:
-                    prefix = "加密" if is_encrypted else "明文"
-                    self.append_colored_output(f"{prefix}压缩包内文件列表:", QColor("cyan"))
-                    for file in file_list:
-                        self.append_colored_output(f" - {file}", QColor("cyan"))
-
-                    # 自动填充目标文件下拉框
+            file_list = load_index(zip_path).names()
+            if file_list:
+                prefix = "加密" if is_encrypted else "明文"
+                self.append_colored_output(f"{prefix}压缩包内文件列表:", QColor("cyan"))
+                for file in file_list:
+                    self.append_colored_output(f" - {file}", QColor("cyan"))
+
+                # 自动填充目标文件下拉框
+                if is_encrypted:
+                    self.fill_target_combo(zip_path, file_list)
+                else:
                     self.TargetFileCombo.clear()
                     self.TargetFileCombo.addItems(file_list)
-                    if file_list:
-                        self.append_colored_output(f"已自动填充目标文件列表，当前选择: {file_list[0]}       (友情提醒:在攻击前请注意这个位置的参数部分)", QColor("yellow"))
+                    self.append_colored_output(f"已自动填充目标文件列表，当前选择: {file_list[0]}       (友情提醒:在攻击前请注意这个位置的参数部分)", QColor("yellow"))
         except Exception as e:
             self.append_colored_output(f"无法读取压缩包内容: {str(e)}", QColor("red"))
 
+    def fill_target_combo(self, zip_path, file_list):
+        """按攻击可行性排序填充目标文件下拉框，并预选最适合攻击的条目"""
+        from core.feasibility import format_ranking, rank_entries
+        plain_file = self.ViewPlainFile.toPlainText().strip()
+        extra_plains = [plain_file] if plain_file and os.path.isfile(plain_file) else []
+        try:
+            ranking = rank_entries(zip_path, extra_plains)
+        except Exception as e:
+            print(f"评估攻击可行性失败: {str(e)}")
+            ranking = []
+        ranked = [result['name'] for result in ranking]
+        ranked_set = set(ranked)
+        ordered = ranked + [name for name in file_list if name not in ranked_set]
+
+        self.TargetFileCombo.clear()
+        self.TargetFileCombo.addItems(ordered)
+        if ranking:
+            self.append_colored_output("\n加密条目攻击可行性(从易到难):", QColor("cyan"))
+            for line in format_ranking(ranking):
+                self.append_colored_output(f" {line}", QColor("cyan"))
+        if ranking and ranking[0]['feasible']:
+            best = ranking[0]
+            self.append_colored_output(
+                f"已预选最适合攻击的条目: {best['name']} (建议明文: {best['plain']}，参数 {' '.join(best['args'])})",
+                QColor("yellow"))
+        else:
+            self.append_colored_output(f"已自动填充目标文件列表，当前选择: {ordered[0]}       (友情提醒:在攻击前请注意这个位置的参数部分)", QColor("yellow"))
+
     def read_zip_entries(self):
         """保留此方法以兼容旧代码，但实际功能已整合到get_zip_contents中"""
         zip_path = self.ViewCompressedZip.toPlainText().strip()
@@ -979,167 +1070,62 @@ class MainWindow(QWidget, Ui_Form):
 
         # 清空输出区域
         self.OutPutArea.clear()
+        self.append_colored_output("正在读取压缩包信息...", QColor("yellow"))
+        zip_path = self.compressedZipPath
+        self.job_queue.submit(self._inspect_zip_job, zip_path,
+                              on_done=lambda info: self.show_zip_info(zip_path, info),
+                              on_error=lambda e: self.append_colored_output(f"执行bkcrack命令时出错: {str(e)}", QColor("red")))
+
+    def _inspect_zip_job(self, job, zip_path):
+        """后台线程：运行 bkcrack -L，读取条目列表和创建者信息(文件未变化时直接使用缓存)"""
+        info, _ = self.inspection_cache.get(zip_path, run=job.run)
+        return info
+
+    def show_zip_info(self, zip_path, info):
+        """在界面线程中显示后台读取到的压缩包信息"""
+        if zip_path != self.compressedZipPath:
+            # 读取期间用户已切换压缩包，丢弃过期结果
+            return
 
-        # 第一部分：运行 bkcrack -L 命令获取压缩包信息
+        # 第一部分：bkcrack -L 命令输出的压缩包信息
         self.append_colored_output("\n=== bkcrack 信息 ===\n", QColor("cyan"))
-        command = ["bkcrack.exe", "-L", self.compressedZipPath]
-        try:
-            result = subprocess.run(command,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE,
-                                    text=True,
-                                    encoding='utf-8',
-                                    errors='replace')
-
-            if result.returncode == 0:
-                self.OutPutArea.insertPlainText(result.stdout)
-
-                # 初始化标志变量
-                store_detected = False
-                deflate_detected = False
-
-                # 检查是否包含特定关键词
-                if "Store" in result.stdout:
-                    self.append_colored_output("检测到加密存储模式", QColor("white"))
-                    store_detected = True
-                    self.compression_mode = 'store'
-                if "Deflate" in result.stdout:
-                    self.append_colored_output("检测到加密压缩模式", QColor("white"))
-                    deflate_detected = True
-                    self.compression_mode = 'deflate'
-
-                # 如果两种模式都没有检测到
-                if not store_detected and not deflate_detected:
-                    self.append_colored_output("未检测到加密存储模式和加密压缩模式", QColor("white"))
-                    self.compression_mode = None
-            else:
-                self.append_colored_output(f"bkcrack命令执行失败:\n{result.stderr}", QColor("red"))
-                return
-        except Exception as e:
-            self.append_colored_output(f"执行bkcrack命令时出错: {str(e)}", QColor("red"))
+        if info['returncode'] != 0:
+            self.append_colored_output(f"bkcrack命令执行失败:\n{info['stderr']}", QColor("red"))
             return
+        if info['stdout']:
+            self.append_colored_output(info['stdout'].rstrip('\n'), QColor("white"), DEBUG)
+
+        # 按条目统计压缩方式(每个条目单独处理，不再用一个全局模式代表整个压缩包)
+        methods = collections.Counter(info['compression'].values())
+        if methods['store']:
+            self.append_colored_output(f"检测到加密存储模式 ({methods['store']} 个条目)", QColor("white"))
+        if methods['deflate']:
+            self.append_colored_output(f"检测到加密压缩模式 ({methods['deflate']} 个条目)", QColor("white"))
+        if not methods['store'] and not methods['deflate']:
+            self.append_colored_output("未检测到加密存储模式和加密压缩模式", QColor("white"))
 
         # 第二部分：自动填充目标文件
-        try:
-            with zipfile.ZipFile(self.compressedZipPath, 'r') as zip_ref:
-                file_list = zip_ref.namelist()
-                if file_list:
-                    self.TargetFileCombo.clear()
-                    self.TargetFileCombo.addItems(file_list)
-                    self.append_colored_output(f"\n已自动填充目标文件列表，当前选择: {file_list[0]}     (友情提醒:在攻击前请注意这个位置的参数部分)", QColor("yellow"))
-        except Exception as e:
-            self.append_colored_output(f"\n无法读取压缩包内容: {str(e)}", QColor("red"))
+        if info['list_error']:
+            self.append_colored_output(f"\n无法读取压缩包内容: {info['list_error']}", QColor("red"))
+        elif info['file_list']:
+            self.fill_target_combo(zip_path, info['file_list'])
 
         # 第三部分：显示ZIP创建者信息
         self.append_colored_output("\n=== 压缩包元数据信息 ===\n", QColor("cyan"))
-        try:
-            creator_info = self.detect_zip_creator(self.compressedZipPath)
-            self.OutPutArea.insertPlainText(creator_info)
-        except Exception as e:
-            self.append_colored_output(f"获取元数据失败: {str(e)}", QColor("red"))
+        if info['creator_error']:
+            self.append_colored_output(f"获取元数据失败: {info['creator_error']}", QColor("red"))
+        else:
+            self.append_colored_output(info['creator_info'].rstrip('\n'), QColor("white"))
 
     def detect_zip_creator(self, zip_path):
         """检测ZIP文件的创建者信息"""
-        version_map = {
-            10: "PKZIP 1.0",
-            20: "Bandizip 7.06 / Windows自带",
-            21: "PKZIP 2.0",
-            25: "PKZIP 2.5",
-            27: "PKZIP 2.7",
-            31: "WinRAR 4.20 / WinRAR 5.70 ",
-            45: "PKZIP 4.5",
-            46: "PKZIP 4.6",
-            50: "PKZIP 5.0",
-            62: "PKZIP 6.2",
-            63: "7-Zip / 360压缩"
-        }
-
-        os_map = {
-            0: "MS-DOS和OS/2",
-            1: "Amiga",
-            2: "OpenVMS",
-            3: "UNIX",
-            4: "VM/CMS",
-            5: "Atari ST",
-            6: "OS/2 HPFS",
-            7: "Macintosh",
-            8: "Z-System",
-            9: "CP/M",
-            10: "Windows NTFS",
-            11: "MVS",
-            12: "VSE",
-            13: "Acorn Risc",
-            14: "VFAT",
-            15: "Alternate MVS",
-            16: "BeOS",
-            17: "Tandem",
-            18: "OS/400",
-            19: "OS/X (Darwin)"
-        }
-
-        try:
-            with open(zip_path, 'rb') as f:
-                data = f.read()
-
-            # 查找 Central Directory Header 签名
-            signature = b'\x50\x4B\x01\x02'
-            index = data.find(signature)
-            if index == -1:
-                return "未找到 Central Directory Header"
-
-            # 提取 Version Made By 字段 (2字节)
-            version_bytes = data[index + 4:index + 6]
-            version_value = struct.unpack('<H', version_bytes)[0]
-
-            # 分离高字节(操作系统)和低字节(PKZIP版本)
-            os_id = version_value >> 8
-            version_number = version_value & 0xFF
-
-            # 获取软件和操作系统信息
-            software = version_map.get(version_number, f"未知PKZIP版本 (0x{version_number:02X})")
-            os_name = os_map.get(os_id, f"未知操作系统 (0x{os_id:02X})")
-
-            # 检查是否有ZIP64格式
-            zip64_signature = b'\x50\x4B\x06\x06'
-            is_zip64 = zip64_signature in data
-
-            info = (
-                f"Version Made By: 0x{version_value:04X}\n"
-                f" - 操作系统: {os_name}\n"
-                f" - 压缩软件(可能): {software}\n"
-                f" - ZIP64格式: {'是' if is_zip64 else '否'}\n"
-            )
-            if version_value == 0x001F:
-                info += "\n提示：可以使用左上角工具按钮进行压缩(存储)操作"
-            return info
-        except Exception as e:
-            return f"解析ZIP元数据时出错: {str(e)}"
+        from core.zipmeta import detect_zip_creator
+        return detect_zip_creator(zip_path)
 
     def _get_zip_os_name(self, os_id):
         """获取操作系统名称"""
-        os_map = {
-            0: "MS-DOS和OS/2",
-            1: "Amiga",
-            2: "OpenVMS",
-            3: "UNIX",
-            4: "VM/CMS",
-            5: "Atari ST",
-            6: "OS/2 HPFS",
-            7: "Macintosh",
-            8: "Z-System",
-            9: "CP/M",
-            10: "Windows NTFS",
-            11: "MVS",
-            12: "VSE",
-            13: "Acorn Risc",
-            14: "VFAT",
-            15: "Alternate MVS",
-            16: "BeOS",
-            17: "Tandem",
-            18: "OS/400",
-            19: "OS/X (Darwin)"
-        }
-        return os_map.get(os_id, f"未知系统(0x{os_id:X})")
+        from core.zipmeta import zip_os_name
+        return zip_os_name(os_id)
 
     def select_files_to_compress(self):
         files, _ = QFileDialog.getOpenFileNames(self, "选择要压缩的文件(用于-P)", "", "All Files (*)")
@@ -1197,6 +1183,7 @@ class MainWindow(QWidget, Ui_Form):
             self.append_colored_output(f"压缩过程中出错: {str(e)}", QColor("red"))
 
     def use_plain_zip_for_attack(self):
+        from core.zipmeta import load_index
         plain_zip_path = self.CompressOutputPath.toPlainText()
         if not plain_zip_path:
             self.append_colored_output("请先创建或选择明文压缩包(-P)", QColor("red"))
@@ -1207,50 +1194,29 @@ class MainWindow(QWidget, Ui_Form):
 
         # 自动设置明文文件为压缩包内第一个文件
         try:
-            with zipfile.ZipFile(plain_zip_path, 'r') as zip_ref:
-                file_list = zip_ref.namelist()
-                if file_list:
-                    # 按字母排序选择第一个文件（与压缩时一致）
-                    file_list.sort()
-                    self.PlainTextContent.setPlainText(file_list[0])
-                    self.append_colored_output(f"已自动设置明文文件(-p): {file_list[0]}", QColor("yellow"))
-                    # 自动填充偏移量
-                    self.auto_fill_offset_from_path(file_list[0])
+            file_list = load_index(plain_zip_path).names()
+            if file_list:
+                # 按字母排序选择第一个文件（与压缩时一致）
+                file_list.sort()
+                self.PlainTextContent.setPlainText(file_list[0])
+                self.append_colored_output(f"已自动设置明文文件(-p): {file_list[0]}", QColor("yellow"))
+                # 自动填充偏移量
+                self.auto_fill_offset_from_path(file_list[0])
         except Exception as e:
             self.append_colored_output(f"无法读取压缩包内容: {str(e)}", QColor("red"))
 
     def auto_fill_offset_from_path(self, path):
-        """改进的自动填充偏移量方法，处理带_plain后缀的情况"""
-        # 获取文件名和扩展名
-        filename = os.path.basename(path).lower()
-        base, ext = os.path.splitext(filename)
-        ext = ext[1:]  # 去掉点
-
-        # 检查是否有_plain后缀
-        if '_plain' in base:
-            # 提取主扩展名
-            main_ext = base.split('_plain')[0]
-            # 检查组合扩展名是否在映射表中
-            combined_ext = f"{main_ext}_plain"
-            if combined_ext in self.extension_offset_map:
-                offset = self.extension_offset_map[combined_ext]
-                self.OffsetInput.setPlainText(offset)
-                self.append_colored_output(f"自动填充偏移量(带_plain后缀): {offset}", QColor("yellow"))
-                return
-
-        # 检查普通扩展名
-        if ext in self.extension_offset_map:
-            offset = self.extension_offset_map[ext]
-            self.OffsetInput.setPlainText(offset)
-            self.append_colored_output(f"自动填充偏移量: {offset}", QColor("yellow"))
+        """根据已知明文签名库自动填充偏移量(按明文内容、预制明文文件名或扩展名判断)"""
+        from core.signatures import suggest_offset
+        try:
+            offset, reason = suggest_offset(path)
+        except Exception as e:
+            print(f"读取签名库失败: {str(e)}")
             return
-
-        # 检查文件名中的关键字
-        for keyword, offset in self.extension_offset_map.items():
-            if keyword in filename:
-                self.OffsetInput.setPlainText(offset)
-                self.append_colored_output(f"根据关键字 '{keyword}' 自动填充偏移量: {offset}", QColor("yellow"))
-                return
+        if offset is None:
+            return
+        self.OffsetInput.setPlainText(str(offset))
+        self.append_colored_output(f"自动填充偏移量: {offset} ({reason})", QColor("yellow"))
 
     def UpdatePlainFilePath(self, path):
         self.plainFilePath = path
@@ -1258,78 +1224,326 @@ class MainWindow(QWidget, Ui_Form):
 
     def UpdateCompressedFilePath(self, path):
         self.compressedZipPath = path
+        self.cached_keys = None
+        self.cached_password = None
         self.ViewCompressedZip.setPlainText(path)
 
+    def build_attack_command(self, threads=None):
+        """根据界面输入构建不含偏移量的攻击命令，输入有误时返回 None"""
+        from core.commands import AttackSpecError, build_attack_command
+        try:
+            return build_attack_command(
+                self.compressedZipPath,
+                self.TargetFileCombo.currentText().strip(),  # 从下拉框获取当前选中的文件
+                plain_file=self.ViewPlainFile.toPlainText().strip(),  # 明文文件路径
+                plain_zip=self.plainZipPath,  # 明文压缩包路径
+                plain_entry=self.PlainTextContent.toPlainText().strip(),  # 明文文件内容（通常是文件名）
+                threads=threads)
+        except AttackSpecError as e:
+            self.show_spec_error(e)
+            return None
+
+    def show_spec_error(self, error):
+        self.append_colored_output(str(error), QColor("red"))
+        if error.entries:
+            self.append_colored_output(error.entries_title, QColor("cyan"))
+            for file in error.entries:
+                self.append_colored_output(f" - {file}", QColor("cyan"))
+
     def Attack(self):
-        target_file = self.TargetFileCombo.currentText().strip()  # 从下拉框获取当前选中的文件
-        plain_file_content = self.PlainTextContent.toPlainText().strip()  # 明文文件内容（通常是文件名）
-        plain_file_path = self.ViewPlainFile.toPlainText().strip()  # 明文文件路径
-        plain_zip_path = self.plainZipPath  # 明文压缩包路径
+        from core.backend import format_command
+        if self.attack_already_solved():
+            return
+        threads = self.read_thread_count()
+        if threads is None:
+            return
+        command = self.build_attack_command(threads)
+        if command is None:
+            return
+
+        # 添加偏移量
         offset = self.OffsetInput.toPlainText().strip()
+        if offset:
+            command.extend(["-o", offset])
 
-        if not self.compressedZipPath:
-            self.append_colored_output("请先选择加密压缩包(-C)", QColor("red"))
+        if self.attack_still_stopping():
             return
+        self.OutPutArea.clear()
+        command = self.apply_checkpoint(command)
+        self.append_colored_output("正在执行攻击命令: " + format_command(command), QColor("yellow"))
+        self.append_colored_output("正在进行攻击，请稍等...", QColor("yellow"))
+        self.start_command_runner(command, source="attack")
+
+    def attack_still_stopping(self):
+        """上一次攻击被中断后可能还在输出检查点"""
+        if self.command_thread and self.command_thread.isRunning():
+            self.append_colored_output("上一个攻击仍在运行或正在退出，请稍候", QColor("red"))
+            return True
+        return False
+
+    def apply_checkpoint(self, command):
+        """同一条命令有检查点时询问是否继续，返回实际要执行的命令"""
+        if not self.checkpoint_store:
+            return command
+        resumed, record = self.checkpoint_store.resume_command(command)
+        if not record:
+            return command
+        source = "bkcrack 中断输出" if record['source'] == 'bkcrack' else "按进度保存"
+        reply = QMessageBox.question(
+            self, "发现检查点",
+            f"该攻击上次在 {record['value']} 处中断({source})，是否从检查点继续？\n选择\"否\"将丢弃检查点重新开始。",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply == QMessageBox.Yes:
+            self.append_colored_output(f"从检查点 {record['value']} 继续", QColor("cyan"))
+            return resumed
+        self.checkpoint_store.clear(command)
+        return command
+
+    def resume_jobs(self, jobs):
+        """并行任务中有检查点的分片追加继续参数，返回新的 [(标签, 命令)]"""
+        if not self.checkpoint_store:
+            return jobs
+        resumed_jobs = []
+        for label, command in jobs:
+            command, record = self.checkpoint_store.resume_command(command)
+            if record:
+                self.append_colored_output(f"分片 {label} 从检查点 {record['value']} 继续", QColor("cyan"))
+            resumed_jobs.append((label, command))
+        return resumed_jobs
+
+    def start_command_runner(self, command, temp_file=None, source=None):
+        self.reset_progress()
+        self.command_thread = ProcessRunner(command, checkpoint_store=self.checkpoint_store,
+                                            ledger=self.ledger, source=source)
+        if temp_file:
+            self.command_thread.set_temp_file(temp_file)
+        self.command_thread.output_signal.connect(self.update_output)
+        self.command_thread.progress_signal.connect(self.update_progress)
+        self.command_thread.start()
 
-        # 验证目标文件是否存在于加密压缩包中
+    def offset_sweep_attack(self):
+        """在偏移范围内并行运行多个 bkcrack，任一偏移命中后取消其余进程"""
+        from core.backend import format_command
+        from core.commands import parse_offset_range
+        if self.attack_already_solved():
+            return
+        if self.parallel_pool and self.parallel_pool.is_running():
+            self.append_colored_output("偏移扫描正在进行中，请先停止", QColor("red"))
+            return
+
+        range_text = self.OffsetRangeInput.toPlainText().strip()
+        if not range_text:
+            self.append_colored_output("请输入偏移范围 (如: 0..64 或 0..64:4)", QColor("red"))
+            return
         try:
-            with zipfile.ZipFile(self.compressedZipPath, 'r') as zip_ref:
-                if target_file not in zip_ref.namelist():
-                    self.append_colored_output(f"错误：目标文件 '{target_file}' 不在加密压缩包中", QColor("red"))
-                    self.append_colored_output("加密压缩包内文件列表:", QColor("cyan"))
-                    for file in zip_ref.namelist():
-                        self.append_colored_output(f" - {file}", QColor("cyan"))
-                    return
-        except Exception as e:
-            self.append_colored_output(f"无法验证加密压缩包内容: {str(e)}", QColor("red"))
+            offsets = parse_offset_range(range_text)
+        except ValueError as e:
+            self.append_colored_output(f"偏移范围格式不正确: {str(e)}", QColor("red"))
+            return
+        if not offsets:
+            self.append_colored_output("偏移范围为空", QColor("red"))
             return
 
-        # 构建命令
-        command = ["bkcrack.exe", "-C", self.compressedZipPath, "-c", target_file]
+        workers = self.read_worker_count(self.SweepWorkersInput)
+        if workers is None:
+            return
+        threads = self.read_thread_count(min(workers, len(offsets)))
+        if threads is None:
+            return
 
-        # 处理明文来源
-        if plain_zip_path:
-            # 使用明文压缩包(-P)
-            command.extend(["-P", plain_zip_path])
+        command = self.build_attack_command(threads)
+        if command is None:
+            return
 
-            # 检查明文文件是否在明文压缩包中
-            if plain_file_content:
-                try:
-                    with zipfile.ZipFile(plain_zip_path, 'r') as zip_ref:
-                        if plain_file_content not in zip_ref.namelist():
-                            self.append_colored_output(f"错误：明文文件 '{plain_file_content}' 不在明文压缩包中", QColor("red"))
-                            self.append_colored_output("明文压缩包内文件列表:", QColor("cyan"))
-                            for file in zip_ref.namelist():
-                                self.append_colored_output(f" - {file}", QColor("cyan"))
-                            return
-                except Exception as e:
-                    self.append_colored_output(f"无法验证明文压缩包内容: {str(e)}", QColor("red"))
-                    return
+        jobs = [(str(offset), command + ["-o", str(offset)]) for offset in offsets]
 
-                command.extend(["-p", plain_file_content])
-        elif plain_file_path:
-            # 使用单独的明文文件(-p)
-            if not os.path.exists(plain_file_path):
-                self.append_colored_output(f"错误：明文文件 '{plain_file_path}' 不存在", QColor("red"))
-                return
-            command.extend(["-p", plain_file_path])
-        else:
-            self.append_colored_output("请提供明文文件(-p)或明文压缩包(-P)", QColor("red"))
+        self.OutPutArea.clear()
+        self.append_colored_output("正在执行偏移扫描: " + format_command(command) + " -o <偏移>", QColor("yellow"))
+        self.append_colored_output(f"共 {len(offsets)} 个偏移，并行进程数: {workers}，每个进程 {threads} 线程，请稍等...",
+                                   QColor("yellow"))
+
+        jobs = self.resume_jobs(jobs)
+        self.parallel_pool = ProcessPool(jobs, workers, hit_marker="Keys:", parent=self,
+                                         checkpoint_store=self.checkpoint_store, ledger=self.ledger, source="sweep")
+        self.parallel_pool.hit_signal.connect(self.on_sweep_hit)
+        self.parallel_pool.job_done_signal.connect(self.on_sweep_job_done)
+        self.parallel_pool.all_done_signal.connect(self.on_sweep_finished)
+        self.parallel_pool.progress_signal.connect(self.update_progress)
+        self.reset_progress()
+        self.parallel_pool.start()
+
+    def on_sweep_hit(self, label, line):
+        from core.commands import parse_keys_line
+        key = parse_keys_line(line)
+        self.InputKey.setPlainText(key)
+        self.remember_keys(key)
+        self.OffsetInput.setPlainText(label)
+        self.append_colored_output(f"攻击成功，命中偏移: {label}，密钥为: {key}", QColor("lightgreen"))
+        self.append_colored_output("已自动提取密钥并填入密钥输入框，其余进程已取消", QColor("lightgreen"))
+
+    def on_sweep_job_done(self, label, status, elapsed):
+        if status != "已取消":
+            self.append_colored_output(f"偏移 {label}: {status}，耗时 {elapsed:.2f} 秒", QColor("yellow"))
+
+    def on_sweep_finished(self):
+        pool = self.parallel_pool
+        self.append_colored_output("\n=== 偏移扫描结果 ===", QColor("cyan"))
+        for label, status, elapsed in sorted(pool.results, key=lambda r: int(r[0])):
+            self.append_colored_output(f"偏移 {label:>6}  {status:<12}  {elapsed:8.2f} 秒", QColor("cyan"))
+        if pool.winner is None:
+            self.append_colored_output("所有偏移均未找到密钥", QColor("red"))
+
+    def read_worker_count(self, widget):
+        """读取并行进程数输入框，留空时使用 CPU 核数"""
+        text = widget.toPlainText().strip()
+        try:
+            workers = int(text) if text else (os.cpu_count() or 1)
+        except ValueError:
+            workers = 0
+        if workers <= 0:
+            self.append_colored_output("并行进程数必须为正整数", QColor("red"))
+            return None
+        return workers
+
+    def read_thread_count(self, concurrent=1):
+        """读取线程数输入框；留空时使用测定的最佳线程数，并按同时运行的进程数均分核数"""
+        from core.threads import split_threads
+        text = self.ThreadsInput.toPlainText().strip()
+        if text:
+            try:
+                threads = int(text)
+            except ValueError:
+                threads = 0
+            if threads <= 0:
+                self.append_colored_output("线程数必须为正整数", QColor("red"))
+                return None
+            return split_threads(concurrent, threads)
+        return split_threads(concurrent, self.thread_settings.load())
+
+    def calibrate_threads(self):
+        """在本机上测定吞吐量最高的线程数并保存"""
+        self.append_colored_output("正在测定最佳线程数，每个候选运行约 2 秒...", QColor("yellow"))
+        self.CalibrateThreadsButton.setEnabled(False)
+        self.job_queue.submit(self._calibrate_job, on_done=self.on_calibrate_done, on_error=self.on_calibrate_failed)
+
+    def _calibrate_job(self, job):
+        from core.threads import calibrate
+        def check_cancel(threads, rate):
+            if job.cancelled:
+                raise JobCancelled()
+        best, results = calibrate(on_result=check_cancel)
+        if best:
+            self.thread_settings.save(best, results)
+        return best, results
+
+    def on_calibrate_done(self, result):
+        from core.backend import get_backend
+        best, results = result
+        self.CalibrateThreadsButton.setEnabled(True)
+        for threads, rate in results.items():
+            self.append_colored_output(f" {threads} 线程: {rate:,.0f} /秒", QColor("cyan"))
+        if best is None and not results:
+            self.append_colored_output(f"当前 bkcrack 不支持 -j 参数，无法调整线程数: {get_backend().describe()}",
+                                       QColor("red"))
+            return
+        if best is None:
+            self.append_colored_output("测定失败：bkcrack 没有输出进度，请确认 bkcrack 版本", QColor("red"))
             return
+        self.append_colored_output(f"最佳线程数: {best}，已保存，线程数留空时自动使用", QColor("lightgreen"))
 
-        # 添加偏移量
-        if offset:
-            command.extend(["-o", offset])
+    def on_calibrate_failed(self, error):
+        self.CalibrateThreadsButton.setEnabled(True)
+        self.append_colored_output(f"测定线程数失败: {str(error)}", QColor("red"))
+
+    def select_matrix_plains(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "选择额外的明文文件(矩阵攻击)", "", "All Files (*)")
+        if files:
+            self.MatrixPlainsInput.setPlainText("\n".join(files))
+            self.append_colored_output(f"已选择 {len(files)} 个额外明文文件用于矩阵攻击", QColor("yellow"))
+
+    def matrix_attack(self):
+        """对所有加密条目与 plains 目录及用户明文的组合并行攻击，首个得到密钥的组合胜出"""
+        from core.backend import get_backend
+        from core.commands import build_matrix_jobs
+        if self.attack_already_solved():
+            return
+        if self.parallel_pool and self.parallel_pool.is_running():
+            self.append_colored_output("已有并行攻击正在进行中，请先停止", QColor("red"))
+            return
+        if not self.compressedZipPath:
+            self.append_colored_output("请先选择加密压缩包(-C)", QColor("red"))
+            return
+
+        workers = self.read_worker_count(self.MatrixWorkersInput)
+        if workers is None:
+            return
+
+        extra_plains = [line.strip() for line in self.MatrixPlainsInput.toPlainText().splitlines() if line.strip()]
+        plain_file_path = self.ViewPlainFile.toPlainText().strip()
+        if plain_file_path and plain_file_path not in extra_plains:
+            extra_plains.append(plain_file_path)
+        missing = [path for path in extra_plains if not os.path.isfile(path)]
+        if missing:
+            self.append_colored_output(f"错误：明文文件不存在: {', '.join(missing)}", QColor("red"))
+            return
+
+        try:
+            jobs = build_matrix_jobs(self.compressedZipPath, extra_plains)
+        except Exception as e:
+            self.append_colored_output(f"无法读取压缩包内容: {str(e)}", QColor("red"))
+            return
+        if not jobs:
+            self.append_colored_output("没有可尝试的(条目 × 明文)组合，请补充明文文件", QColor("red"))
+            return
+
+        threads = self.read_thread_count(min(workers, len(jobs)))
+        if threads is None:
+            return
+        self.matrix_entries = {label: entry for label, _, entry, _ in jobs}
 
         self.OutPutArea.clear()
-        self.append_colored_output("正在执行攻击命令: " + " ".join(command), QColor("yellow"))
+        self.append_colored_output(f"矩阵攻击: 共 {len(jobs)} 个组合，并行进程数: {workers}，每个进程 {threads} 线程",
+                                   QColor("yellow"))
+        for label, _, _, known in jobs:
+            self.append_colored_output(f" - {label}  (已知明文 {known} 字节)", QColor("cyan"))
         self.append_colored_output("正在进行攻击，请稍等...", QColor("yellow"))
 
-        self.command_thread = CommandThread(" ".join(command))
-        self.command_thread.output_signal.connect(self.update_output)
-        self.command_thread.start()
+        thread_args = get_backend().thread_args(threads)
+        pool_jobs = self.resume_jobs([(label, command + thread_args) for label, command, _, _ in jobs])
+        self.parallel_pool = ProcessPool(pool_jobs, workers, hit_marker="Keys:", parent=self,
+                                         checkpoint_store=self.checkpoint_store, ledger=self.ledger, source="matrix")
+        self.parallel_pool.hit_signal.connect(self.on_matrix_hit)
+        self.parallel_pool.job_done_signal.connect(self.on_matrix_job_done)
+        self.parallel_pool.all_done_signal.connect(self.on_matrix_finished)
+        self.parallel_pool.progress_signal.connect(self.update_progress)
+        self.reset_progress()
+        self.parallel_pool.start()
+
+    def on_matrix_hit(self, label, line):
+        from core.commands import parse_keys_line
+        key = parse_keys_line(line)
+        entry = self.matrix_entries.get(label, '')
+        self.InputKey.setPlainText(key)
+        self.remember_keys(key)
+        index = self.TargetFileCombo.findText(entry)
+        if index >= 0:
+            self.TargetFileCombo.setCurrentIndex(index)
+        self.append_colored_output(f"攻击成功，命中组合: {label}，密钥为: {key}", QColor("lightgreen"))
+        self.append_colored_output("已自动提取密钥并填入密钥输入框，其余进程已取消", QColor("lightgreen"))
+
+    def on_matrix_job_done(self, label, status, elapsed):
+        if status != "已取消":
+            self.append_colored_output(f"{label}: {status}，耗时 {elapsed:.2f} 秒", QColor("yellow"))
+
+    def on_matrix_finished(self):
+        if self.parallel_pool.winner is None:
+            self.append_colored_output("所有组合均未找到密钥", QColor("red"))
 
     def execute_hex_command(self):
+        from core.backend import format_command, get_backend
+        from core.commands import AttackSpecError, require_option, validate_entry
+        if self.attack_already_solved():
+            return
         target_file = self.TargetFileCombo.currentText()  # 从下拉框获取当前选中的文件
         hex_offset = self.HexOffsetInput.toPlainText()
         hex_pattern = self.HexPatternInput.toPlainText()
@@ -1340,19 +1554,20 @@ class MainWindow(QWidget, Ui_Form):
 
         # 验证目标文件是否存在于压缩包中
         try:
-            with zipfile.ZipFile(self.compressedZipPath, 'r') as zip_ref:
-                if target_file not in zip_ref.namelist():
-                    self.append_colored_output(f"错误：目标文件 '{target_file}' 不在压缩包中", QColor("red"))
-                    self.append_colored_output("压缩包内文件列表:", QColor("cyan"))
-                    for file in zip_ref.namelist():
-                        self.append_colored_output(f" - {file}", QColor("cyan"))
-                    return
-        except Exception as e:
-            self.append_colored_output(f"无法验证压缩包内容: {str(e)}", QColor("red"))
+            validate_entry(self.compressedZipPath, target_file)
+        except AttackSpecError as e:
+            self.show_spec_error(e)
             return
 
-        command = ["bkcrack.exe", "-C", self.compressedZipPath,
-                   "-c", target_file, "-x", hex_offset, hex_pattern]
+        temp_file = None
+        plain_index = None
+        backend = get_backend()
+        try:
+            require_option(backend, "-x")
+        except AttackSpecError as e:
+            self.show_spec_error(e)
+            return
+        command = backend.command("-C", self.compressedZipPath, "-c", target_file, "-x", hex_offset, hex_pattern)
 
         plain_file_path = self.ViewPlainFile.toPlainText()
         plain_zip_path = self.plainZipPath
@@ -1367,14 +1582,8 @@ class MainWindow(QWidget, Ui_Form):
         elif plain_file_path:
             command.extend(["-p", plain_file_path])
         elif plain_file_content:
-            try:
-                with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
-                    tmp.write(plain_file_content)
-                    temp_file = tmp.name
-                command.extend(["-p", temp_file])
-            except Exception as e:
-                self.append_colored_output(f"创建临时明文文件失败: {str(e)}", QColor("red"))
-                return
+            # 明文内容写入临时文件，文件在全部校验通过后才创建
+            plain_index = len(command)
         else:
             self.append_colored_output("请提供明文文件(-p)或明文压缩包(-P)", QColor("red"))
             return
@@ -1384,18 +1593,40 @@ class MainWindow(QWidget, Ui_Form):
         if offset.strip():
             command.extend(["-o", offset.strip()])
 
-        self.OutPutArea.clear()
-        self.append_colored_output("正在执行攻击命令: " + " ".join(command), QColor("yellow"))
-        self.append_colored_output("正在执行(-x)情况下攻击，请稍等...", QColor("yellow"))
+        threads = self.read_thread_count()
+        if threads is None:
+            return
+        command.extend(backend.thread_args(threads))
 
-        self.command_thread = CommandThread(" ".join(command))
-        if 'temp_file' in locals():
-            self.command_thread.set_temp_file(temp_file)
-        self.command_thread.output_signal.connect(self.update_output)
-        self.command_thread.start()
+        if self.attack_still_stopping():
+            return
+        try:
+            if plain_index is not None:
+                try:
+                    with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
+                        temp_file = tmp.name
+                        tmp.write(plain_file_content)
+                except Exception as e:
+                    self.append_colored_output(f"创建临时明文文件失败: {str(e)}", QColor("red"))
+                    return
+                command[plain_index:plain_index] = ["-p", temp_file]
+            self.OutPutArea.clear()
+            command = self.apply_checkpoint(command)
+            self.append_colored_output("正在执行攻击命令: " + format_command(command), QColor("yellow"))
+            self.append_colored_output("正在执行(-x)情况下攻击，请稍等...", QColor("yellow"))
+            self.start_command_runner(command, temp_file, source="hex")
+            # 临时文件已交给 ProcessRunner，进程结束后由它删除
+            temp_file = None
+        finally:
+            if temp_file and os.path.exists(temp_file):
+                os.unlink(temp_file)
 
     def direct_hex_attack(self):
         """直接执行 bkcrack -C attachment.zip -c flag.zip -x 172 504B05060000000001000100 模式的攻击"""
+        from core.backend import format_command
+        from core.commands import AttackSpecError, build_attack_command
+        if self.attack_already_solved():
+            return
         if not self.compressedZipPath:
             self.append_colored_output("请先选择加密压缩包(-C)", QColor("red"))
             return
@@ -1419,20 +1650,65 @@ class MainWindow(QWidget, Ui_Form):
             self.append_colored_output("偏移地址和已知明文值的数量不匹配", QColor("red"))
             return
 
-        # 构建基本命令
-        command = ["bkcrack.exe", "-C", self.compressedZipPath, "-c", target_file]
+        threads = self.read_thread_count()
+        if threads is None:
+            return
 
-        # 添加多个-x参数
-        for offset, pattern in zip(offsets, patterns):
-            command.extend(["-x", offset.strip(), pattern.strip()])
+        # 构建命令(多个-x参数)
+        try:
+            command = build_attack_command(self.compressedZipPath, target_file, extra=list(zip(offsets, patterns)),
+                                           threads=threads)
+        except AttackSpecError as e:
+            self.show_spec_error(e)
+            return
 
+        if self.attack_still_stopping():
+            return
         self.OutPutArea.clear()
-        self.append_colored_output("正在执行(-x)攻击命令: " + " ".join(command), QColor("yellow"))
+        command = self.apply_checkpoint(command)
+        self.append_colored_output("正在执行(-x)攻击命令: " + format_command(command), QColor("yellow"))
         self.append_colored_output("正在进行攻击，请稍等...", QColor("yellow"))
+        self.start_command_runner(command, source="direct_hex")
 
-        self.command_thread = CommandThread(" ".join(command))
-        self.command_thread.output_signal.connect(self.update_output)
-        self.command_thread.start()
+    def fill_nested_zip_plain(self):
+        """目标文件为存储方式的内层 ZIP 时，推算其结构中的已知字节并填入 -x 参数"""
+        from core.nested import guess_inner_names, is_nested_zip, nested_zip_fragments
+        from core.signatures import longest_run
+        from core.zipmeta import load_index
+        if not self.compressedZipPath:
+            self.append_colored_output("请先选择加密压缩包(-C)", QColor("red"))
+            return
+        target_file = self.TargetFileCombo.currentText().strip()
+        try:
+            index = load_index(self.compressedZipPath)
+        except Exception as e:
+            self.append_colored_output(f"无法读取压缩包内容: {str(e)}", QColor("red"))
+            return
+        i = index.find(target_file)
+        if i < 0:
+            self.append_colored_output("请选择目标文件(-c)", QColor("red"))
+            return
+        entry = index.entry(i)
+        if not is_nested_zip(entry):
+            self.append_colored_output(f"{target_file} 不是以存储方式保存的 ZIP，无法推算内层结构", QColor("red"))
+            return
+
+        names = [name.strip() for name in self.NestedNamesInput.toPlainText().split(';') if name.strip()]
+        if not names:
+            names = guess_inner_names(target_file)
+            self.append_colored_output(f"未填写内层文件名，按外层文件名猜测为: {'; '.join(names)}", QColor("yellow"))
+        profile = self.NestedProfileCombo.currentData()
+        size = entry.compress_size - 12 if entry.encrypted else entry.file_size
+        fragments = nested_zip_fragments(size, names, profile=profile)
+        if not fragments:
+            self.append_colored_output("内层 ZIP 过小，与假设的结构不符", QColor("red"))
+            return
+
+        self.DirectHexOffsetInput.setPlainText(";".join(str(offset) for offset, _ in fragments))
+        self.DirectHexPatternInput.setPlainText(";".join(data.hex().upper() for _, data in fragments))
+        self.append_colored_output(
+            f"已推算内层 ZIP ({size} 字节) 的 {len(fragments)} 段已知明文，共 {sum(len(data) for _, data in fragments)} 字节，"
+            f"最长连续 {longest_run(fragments)} 字节", QColor("yellow"))
 
     def convert_to_hex(self):
         """将输入内容转换为16进制表示"""
@@ -1456,17 +1732,53 @@ class MainWindow(QWidget, Ui_Form):
         except Exception as e:
             self.append_colored_output(f"转换失败: {str(e)}", QColor("red"))
 
-    def update_output(self, text):
-        if "Keys:" in text:
-            key = text.split(":", 1)[1].strip()
-            self.InputKey.setPlainText(key)
-            self.append_colored_output(f"攻击成功，密钥为: {key}", QColor("lightgreen"))
-            self.append_colored_output("已自动提取密钥并填入密钥输入框！", QColor("lightgreen"))
-            self.command_thread.terminate()
+    def update_output(self, lines):
+        """批量显示子进程输出，一批输出只刷新一次输出区域"""
+        from core.commands import parse_keys_line
+        if isinstance(lines, str):
+            lines = [lines]
+        plain_lines = []
+        for text in lines:
+            key = parse_keys_line(text)
+            if key is not None:
+                if plain_lines:
+                    self.OutPutArea.log_lines(plain_lines, DEBUG, PROCESS_COLOR)
+                self.InputKey.setPlainText(key)
+                self.remember_keys(key)
+                self.append_colored_output(f"攻击成功，密钥为: {key}", QColor("lightgreen"))
+                self.append_colored_output("已自动提取密钥并填入密钥输入框！", QColor("lightgreen"))
+                if self.command_thread:
+                    self.command_thread.stop()
+                return
+            plain_lines.append(text)
+        if plain_lines:
+            # 每行一条记录，输出区域的容量按行计算
+            self.OutPutArea.log_lines(plain_lines, DEBUG, PROCESS_COLOR)
+
+    def reset_progress(self):
+        self.AttackProgressBar.setValue(0)
+        self.ProgressLabel.setText("")
+
+    def update_progress(self, *args):
+        """显示最新的进度快照；并行任务会额外传入任务标签"""
+        from core.progress import format_eta
+        label, progress = (args[0], args[1]) if len(args) == 2 else (None, args[0])
+        if progress['stage'] in ('keys_found', 'password_found'):
+            self.AttackProgressBar.setValue(1000)
+            self.ProgressLabel.setText(progress['description'])
             return
-        self.append_colored_output(text, QColor("yellow"))
+        self.AttackProgressBar.setValue(int(progress['percent'] * 10))
+        text = progress['description'] or "运行中"
+        if label is not None:
+            text = f"[{label}] {text}"
+        if progress['total']:
+            text += f"  {progress['percent']:.1f}% ({progress['done']}/{progress['total']})"
+        if progress['rate']:
+            text += f"  {progress['rate']:.0f}/秒  剩余 {format_eta(progress['eta'])}"
+        self.ProgressLabel.setText(text)
 
     def DoExportZip(self):
+        from core.backend import get_backend
         key = self.InputKey.toPlainText()
         if not key:
             self.append_colored_output("请先输入密钥", QColor("red"))
@@ -1483,19 +1795,65 @@ class MainWindow(QWidget, Ui_Form):
             return
 
         output_path = os.path.splitext(self.compressedZipPath)[0] + "_NO_PASS.zip"
-        command = ["bkcrack.exe", "-C", self.compressedZipPath,
-                   "-c", target_file, "-k", *key_parts, "-D", output_path]
+        command = get_backend().command("-C", self.compressedZipPath, "-c", target_file, "-k", *key_parts,
+                                        "-D", output_path)
 
         self.append_colored_output("正在导出无密码压缩包...", QColor("yellow"))
-        result = subprocess.run(" ".join(command), shell=True, capture_output=True, text=True)
-        self.append_colored_output(result.stdout, QColor("yellow"))
+        self.job_queue.submit(self._export_decrypted_job, self.compressedZipPath, key_parts, command, output_path,
+                              on_done=self.on_export_zip_done,
+                              on_error=lambda e: self.append_colored_output(f"导出过程中出错: {str(e)}", QColor("red")))
+
+    def _export_decrypted_job(self, job, zip_path, key_parts, command, output_path):
+        """后台线程：加密数据不大时在进程内生成无密码副本，否则执行 bkcrack -D"""
+        from core.ledger import RunRecord
+        from core.zipcrypto import parse_keys, prefer_in_process, write_decrypted_archive
+        from core.zipmeta import ENCRYPTION_ZIPCRYPTO, load_index
+        index = load_index(zip_path)
+        encrypted_size = sum(entry.compress_size for entry in index if entry.encryption == ENCRYPTION_ZIPCRYPTO)
+        if not index.zip64 and prefer_in_process(encrypted_size):
+            record = RunRecord(None, "export", archive=zip_path, output=output_path)
+            decrypted, rejected = write_decrypted_archive(zip_path, parse_keys(key_parts), output_path)
+            self.record_run(record.finish(0, status='success' if decrypted else 'failed'))
+            # 加密头校验碰巧通过但 CRC 不一致的条目保持加密，需要提示用户
+            note = f"\n{len(rejected)} 个条目 CRC 校验失败，保持加密: {', '.join(rejected)}" if rejected else ""
+            if not decrypted:
+                os.unlink(output_path)
+                return "密钥无法解密任何条目" + note, False, output_path
+            return f"已使用内置 ZipCrypto 引擎解密 {decrypted} 个条目" + note, True, output_path
+        return self._run_export_job(job, command, output_path)
+
+    def _run_export_job(self, job, command, output_path, source="export"):
+        """后台线程：执行导出类命令，返回 (命令输出, 输出文件是否存在)"""
+        from core.ledger import RunRecord
+        record = RunRecord(command, source)
+        result = job.run(command, text=True)
+        exported = os.path.exists(output_path)
+        self.record_run(record.finish(result.returncode, job.peak_rss, status='success' if exported else 'failed'))
+        return result.stdout, exported, output_path
+
+    def on_backend_probed(self, backend):
+        if backend.available:
+            self.append_colored_output(f"使用 {backend.describe()}", QColor("gray"), DEBUG)
+        else:
+            self.append_colored_output("未找到 bkcrack，请将其放在程序目录、PATH 中，或用环境变量 BKCRACK_PATH 指定路径",
+                                       QColor("orange"))
+
+    def record_run(self, record):
+        """追加一条运行记录(可在后台线程中调用)"""
+        if self.ledger:
+            self.ledger.append(record)
 
-        if os.path.exists(output_path):
+    def on_export_zip_done(self, result):
+        stdout, exported, output_path = result
+        self.append_colored_output(stdout, QColor("yellow"))
+
+        if exported:
             self.append_colored_output(f"导出成功！无密码压缩包路径：{output_path}", QColor("lightgreen"))
         else:
             self.append_colored_output("导出失败，请检查输出信息", QColor("red"))
 
     def change_password(self):
+        from core.backend import get_backend
         key = self.InputKey.toPlainText()
         if not key:
             self.append_colored_output("请先输入密钥", QColor("red"))
@@ -1523,40 +1881,60 @@ class MainWindow(QWidget, Ui_Form):
 
         output_zip = os.path.abspath(output_zip)
 
-        command = ["bkcrack.exe", "-C", self.compressedZipPath,
-                   "-c", target_file, "-k", *key_parts, "-U", output_zip, new_password]
+        command = get_backend().command("-C", self.compressedZipPath, "-c", target_file, "-k", *key_parts,
+                                        "-U", output_zip, new_password)
 
         self.OutPutArea.clear()
         self.append_colored_output("正在修改密码并导出压缩包...", QColor("yellow"))
-        result = subprocess.run(" ".join(command), shell=True, capture_output=True, text=True)
-        self.append_colored_output(result.stdout, QColor("yellow"))
+        self.job_queue.submit(self._run_export_job, command, output_zip, "change_password",
+                              on_done=lambda result: self.on_change_password_done(result, new_password),
+                              on_error=lambda e: self.append_colored_output(f"修改密码过程中出错: {str(e)}", QColor("red")))
+
+    def on_change_password_done(self, result, new_password):
+        stdout, exported, output_zip = result
+        self.append_colored_output(stdout, QColor("yellow"))
 
-        if os.path.exists(output_zip):
+        if exported:
             abs_path = os.path.abspath(output_zip)
-            self.append_colored_output("\n✅ <b>导出成功！</b>", QColor("lightgreen"))
-            self.append_colored_output(f"<b>新密码：</b><span style='color:lightgreen'>{new_password}</span>", QColor("lightgreen"))
-            self.append_colored_output(f"<b>导出位置：</b><span style='color:cyan'>{abs_path}</span>", QColor("lightgreen"))
+            self.append_colored_output("\n✅ 导出成功！", QColor("lightgreen"))
+            self.append_colored_output(f"新密码：{new_password}", QColor("lightgreen"))
+            self.append_colored_output(f"导出位置：{abs_path}", QColor("cyan"))
         else:
-            self.append_colored_output("\n❌ <b>导出失败！</b>", QColor("red"))
+            self.append_colored_output("\n❌ 导出失败！", QColor("red"))
             self.append_colored_output("请检查以下可能的问题：", QColor("red"))
             self.append_colored_output("1. 密钥是否正确", QColor("red"))
             self.append_colored_output("2. 目标文件路径是否正确", QColor("red"))
             self.append_colored_output("3. 输出路径是否有写入权限", QColor("red"))
             self.append_colored_output("4. 查看上方命令输出获取更多信息", QColor("red"))
 
-    def append_colored_output(self, text, color):
-        self.OutPutArea.setTextColor(color)
-        self.OutPutArea.append(text)
-        self.OutPutArea.setTextColor(QColor("yellow"))
+    def append_colored_output(self, text, color, level=None):
+        """写入输出区域；未指定级别时按颜色推断(红色为错误，绿色为成功)"""
+        name = color.name() if isinstance(color, QColor) else str(color)
+        if level is None:
+            level = COLOR_LEVELS.get(name, INFO)
+        self.OutPutArea.log(text, level, name)
 
     def append_output(self, text):
-        self.OutPutArea.append(f"<span style='color:white;'>{text}</span>")
+        self.OutPutArea.log(text, INFO, "white")
+
+
+def report_startup(window, imported, created):
+    """BKCRACK_GUI_STARTUP_BENCH 设置时，在第一次事件循环中输出各阶段耗时(JSON)并退出"""
+    shown = time.perf_counter()
+    print(json.dumps({'imports': round(imported - STARTED, 4), 'window': round(created - imported, 4),
+                      'shown': round(shown - created, 4), 'total': round(shown - STARTED, 4)}), flush=True)
+    window.close()
+    QApplication.quit()
 
 
 if __name__ == "__main__":
+    imported = time.perf_counter()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.resize(1200, 800)
     window.setWindowTitle("bkcrack-gui v0.92  Author: 星辰不及阁下")
+    created = time.perf_counter()
     window.show()
+    if os.environ.get("BKCRACK_GUI_STARTUP_BENCH"):
+        QtCore.QTimer.singleShot(0, lambda: report_startup(window, imported, created))
     sys.exit(app.exec())
\ No newline at end of file
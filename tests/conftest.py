@@ -0,0 +1,59 @@
+"""测试公用的路径和夹具
+
+tests/data 下的压缩包由 Info-ZIP 3.0 生成(密码均为 bench!)：
+  zipcrypto.zip  notes.txt(Deflate) 和 raw.bin(Store)，ZipCrypto 加密，带数据描述符
+  zip64.zip      同一个 notes.txt，zip -fz 强制 ZIP64
+  inner.zip      未加密的 notes.txt 和 raw.bin，保留 Info-ZIP 的扩展字段
+notes.txt 和 raw.bin 是打包前的原始文件。
+"""
+import os
+import sys
+import zipfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DATA_DIR = os.path.join(ROOT, "tests", "data")
+EXAMPLE_DIR = os.path.join(ROOT, "example")
+PASSWORD = "bench!"
+
+
+def data_path(name):
+    return os.path.join(DATA_DIR, name)
+
+
+def example_path(name):
+    return os.path.join(EXAMPLE_DIR, name)
+
+
+def read_data(name):
+    with open(data_path(name), 'rb') as f:
+        return f.read()
+
+
+def read_member(zip_path, suffix):
+    """读取示例压缩包中以 suffix 结尾的未加密条目"""
+    with zipfile.ZipFile(zip_path) as archive:
+        name = next(name for name in archive.namelist() if name.endswith(suffix))
+        return archive.read(name)
+
+
+@pytest.fixture
+def inner_zip_copy(tmp_path):
+    """测试题1 中未加密的内层 1.zip，写到临时文件"""
+    path = tmp_path / "1.zip"
+    path.write_bytes(read_member(example_path("测试题1.zip"), "/1.zip"))
+    return str(path)
+
+
+@pytest.fixture
+def stdlib_zip(tmp_path):
+    """Python zipfile 生成的压缩包(不写扩展字段)"""
+    path = tmp_path / "stdlib.zip"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("flag.txt", b"flag{stdlib}\n")
+        archive.writestr("readme.md", b"# readme\n" * 20, compress_type=zipfile.ZIP_DEFLATED)
+    return str(path)
@@ -0,0 +1,29 @@
+import threading
+
+import core.backend as backend
+
+
+def test_get_backend_probes_outside_lock(monkeypatch, tmp_path):
+    """探测期间其他线程仍可查询已探测过的路径，同一路径只发布一个结果"""
+    slow, fast = str(tmp_path / "slow-bkcrack"), str(tmp_path / "fast-bkcrack")
+    started, release = threading.Event(), threading.Event()
+
+    def probe(path, cache=None):
+        assert not backend._lock.locked()
+        if path == slow:
+            started.set()
+            release.wait(5)
+        return backend.Backend(path)
+
+    monkeypatch.setattr(backend, "probe", probe)
+    monkeypatch.setattr(backend, "_backends", {})
+    results = []
+    thread = threading.Thread(target=lambda: results.append(backend.get_backend(slow)))
+    thread.start()
+    assert started.wait(5)
+    # 慢探测尚未结束时，其他路径的查询不会被阻塞
+    assert backend.get_backend(fast).path == fast
+    release.set()
+    thread.join(5)
+    assert results == [backend.get_backend(slow)]
+    assert backend.get_backend(slow) is results[0]
@@ -0,0 +1,59 @@
+import pytest
+
+from core.commands import parse_offset_range, parse_recovery_output, plan_recovery_shards
+
+
+def test_parse_offset_range():
+    assert parse_offset_range("0..4") == [0, 1, 2, 3, 4]
+    assert parse_offset_range("0..64:16") == [0, 16, 32, 48, 64]
+    assert parse_offset_range("0，6, 64") == [0, 6, 64]
+    # 重复的偏移只保留第一次出现的位置
+    assert parse_offset_range("6,0..8:2,64") == [6, 0, 2, 4, 8, 64]
+    assert parse_offset_range("") == []
+
+
+@pytest.mark.parametrize("text", ["0..8:0", "0..8:-2", "a..b", "1.5"])
+def test_parse_offset_range_rejects_bad_input(text):
+    with pytest.raises(ValueError):
+        parse_offset_range(text)
+
+
+def test_plan_recovery_shards():
+    assert plan_recovery_shards("..10") == [("0..6", "0..6"), ("7", "7..7"), ("8", "8..8"), ("9", "9..9"),
+                                            ("10", "10..10")]
+    assert plan_recovery_shards("8..9") == [("8", "8..8"), ("9", "9..9")]
+    assert plan_recovery_shards("4") == [("0..4", "0..4")]
+    assert plan_recovery_shards(" 5.. ") == [("5..", "5..")]
+
+
+@pytest.mark.parametrize("text", ["9..8", "-1..4", "x"])
+def test_plan_recovery_shards_rejects_bad_range(text):
+    with pytest.raises(ValueError):
+        plan_recovery_shards(text)
+
+
+def test_parse_recovery_output():
+    # bkcrack 1.7 -r 的输出
+    lines = ["[17:44:19] Recovering password",
+             "length 0-6...",
+             "length 7...",
+             "length 8...",
+             "length 9...",
+             "length 10...",
+             "length 11...",
+             "length 12...",
+             "[17:45:21] Password",
+             "as bytes: 57 34 73 46 30 72 67 6f 74 74 65 6e",
+             "as text: W4sF0rgotten"]
+    assert parse_recovery_output(lines) == ("W4sF0rgotten", "57 34 73 46 30 72 67 6f 74 74 65 6e")
+
+
+def test_parse_recovery_output_prefers_bytes():
+    # 以字节为准，保留首尾空格
+    lines = ["as bytes: 20 61 20", "as text:  a "]
+    assert parse_recovery_output(lines) == (" a ", "20 61 20")
+
+
+def test_parse_recovery_output_old_format():
+    assert parse_recovery_output(["Password: secret"]) == ("secret", "")
+    assert parse_recovery_output(["Could not recover password"]) == ("", "")
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import data_path, read_data
+from core.hexview import LineIndex, MappedFile, hex_rows
+
+
+def test_line_index_matches_splitlines():
+    text = read_data("notes.txt")
+    with MappedFile(data_path("notes.txt")) as mapped:
+        index = LineIndex(mapped, block=256)
+        lines = text.decode('utf-8').splitlines()
+        assert index.count == len(lines)
+        assert index.lines(0, len(lines)) == lines
+        # 任意一行的起始偏移都能换算回行号
+        for n in (0, 1, len(lines) // 2, len(lines) - 1):
+            assert index.line_of(index.line_start(n)) == n
+
+
+def test_line_index_cancelled():
+    with MappedFile(data_path("notes.txt")) as mapped:
+        with pytest.raises(InterruptedError):
+            LineIndex(mapped, block=256, cancelled=lambda: True)
+        assert LineIndex(mapped, block=256, cancelled=lambda: False).count > 0
+
+
+def test_hex_rows():
+    with MappedFile(data_path("raw.bin")) as mapped:
+        rows = hex_rows(mapped, 0, 2)
+    data = read_data("raw.bin")
+    assert rows[0].startswith("0000000000  " + data[:8].hex(' ') + "  " + data[8:16].hex(' '))
+    assert rows[1].startswith("0000000010  ")
@@ -0,0 +1,69 @@
+import zlib
+
+import pytest
+
+from conftest import PASSWORD, data_path, read_data
+from core.inflate import extract_entry_to, inflate_entry_file, iter_inflated
+from core.zipcrypto import keys_from_password
+from core.zipmeta import load_index
+
+
+def raw_entry(path, name):
+    """条目的原始压缩数据(未加密的压缩包)"""
+    index = load_index(path)
+    i = index.find(name)
+    with open(path, 'rb') as f:
+        f.seek(index.data_offset(i))
+        return index.entry(i), f.read(index.entry(i).compress_size)
+
+
+def chunks(data, size=97):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_inflate_real_deflate_entry():
+    entry, data = raw_entry(data_path("inner.zip"), "notes.txt")
+    out = b"".join(iter_inflated(chunks(data), entry.method, entry.crc, entry.file_size, chunk_size=64))
+    assert out == read_data("notes.txt")
+
+
+def test_crc_mismatch():
+    entry, data = raw_entry(data_path("inner.zip"), "notes.txt")
+    with pytest.raises(ValueError, match="CRC"):
+        list(iter_inflated([data], entry.method, entry.crc ^ 1, entry.file_size))
+
+
+def test_size_mismatch():
+    entry, data = raw_entry(data_path("inner.zip"), "raw.bin")
+    with pytest.raises(ValueError, match="大小"):
+        list(iter_inflated([data], entry.method, entry.crc, entry.file_size + 1))
+
+
+def test_truncated_deflate():
+    entry, data = raw_entry(data_path("inner.zip"), "notes.txt")
+    with pytest.raises(ValueError, match="不完整"):
+        list(iter_inflated([data[:len(data) // 2]], entry.method))
+
+
+def test_unsupported_method():
+    with pytest.raises(ValueError):
+        list(iter_inflated([b""], 14))
+
+
+def test_inflate_entry_file_leaves_no_output_on_crc_error(tmp_path):
+    entry, data = raw_entry(data_path("inner.zip"), "notes.txt")
+    raw_path = tmp_path / "notes.raw"
+    raw_path.write_bytes(data[:-1] + bytes([data[-1] ^ 0xFF]))
+    output = tmp_path / "notes.txt"
+    with pytest.raises((ValueError, zlib.error)):
+        inflate_entry_file(entry, str(raw_path), str(output))
+    assert not output.exists()
+    assert not (tmp_path / "notes.txt.part").exists()
+
+
+def test_extract_encrypted_entry(tmp_path):
+    index = load_index(data_path("zipcrypto.zip"))
+    output = tmp_path / "notes.txt"
+    written = extract_entry_to(index, index.find("notes.txt"), keys_from_password(PASSWORD), str(output))
+    assert written == len(read_data("notes.txt"))
+    assert output.read_bytes() == read_data("notes.txt")
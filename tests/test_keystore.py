@@ -0,0 +1,53 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import data_path
+from core.keystore import KeyStore, archive_fingerprint
+
+KEYS = "c4490e28 b414a23d 91404b31"
+
+
+def test_keys_and_password_round_trip(tmp_path):
+    store = KeyStore(str(tmp_path / "keys.sqlite3"))
+    zip_path = data_path("zipcrypto.zip")
+    assert store.lookup(zip_path) is None
+    store.save_keys(zip_path, KEYS)
+    assert store.lookup(zip_path) == {'keys': KEYS, 'password': None}
+    store.save_password(KEYS, "W4sF0rgotten")
+    assert store.lookup(zip_path) == {'keys': KEYS, 'password': "W4sF0rgotten"}
+    assert store.password_for_keys(KEYS) == "W4sF0rgotten"
+    # 另一个实例读到同一份数据(已提交)
+    assert KeyStore(store.path).lookup(zip_path)['keys'] == KEYS
+
+
+def test_fingerprint_follows_content(tmp_path):
+    copy = tmp_path / "renamed.zip"
+    shutil.copyfile(data_path("zipcrypto.zip"), copy)
+    assert archive_fingerprint(str(copy)) == archive_fingerprint(data_path("zipcrypto.zip"))
+    assert archive_fingerprint(str(copy)) != archive_fingerprint(data_path("inner.zip"))
+
+
+def test_connections_are_closed(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+    store = KeyStore(str(tmp_path / "keys.sqlite3"))
+    store.save_keys(data_path("zipcrypto.zip"), KEYS)
+    with pytest.raises(ValueError):
+        with store._connect() as conn:
+            conn.execute("UPDATE archives SET password = 'x'")
+            raise ValueError()
+    # 出错时回滚
+    assert store.password_for_keys(KEYS) is None
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
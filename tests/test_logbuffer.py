@@ -0,0 +1,31 @@
+from core.logbuffer import DEBUG, ERROR, LogBuffer
+
+
+def test_capacity_counts_lines():
+    buffer = LogBuffer(capacity=5)
+    buffer.extend([f"line {i}" for i in range(4)], DEBUG)
+    buffer.append("a\nb\nc", ERROR, "red")
+    assert [record.text for record in buffer.records] == ["line 2", "line 3", "a", "b", "c"]
+    assert buffer.dropped == 2
+    assert [record.level for record in buffer.filtered(ERROR)] == [ERROR] * 3
+    # 待显示的记录不受容量限制，全部写入日志文件
+    assert len(buffer.flush()) == 7
+    assert buffer.flush() == []
+
+
+def test_large_batch_keeps_last_lines():
+    buffer = LogBuffer(capacity=100)
+    last = buffer.extend([str(i) for i in range(2000)])
+    assert last.text == "1999"
+    assert len(buffer.records) == 100
+    assert buffer.records[0].text == "1900"
+    assert buffer.extend([]) is None
+
+
+def test_log_file(tmp_path):
+    path = tmp_path / "logs" / "output.log"
+    buffer = LogBuffer(capacity=2, path=str(path))
+    buffer.extend(["one", "two", "three"], DEBUG)
+    buffer.close()
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [line.split(" ", 3)[2:] for line in lines] == [["DEBUG", "one"], ["DEBUG", "two"], ["DEBUG", "three"]]
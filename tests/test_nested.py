@@ -0,0 +1,73 @@
+import zipfile
+
+import pytest
+
+from conftest import data_path
+from core.nested import guess_inner_names, is_nested_zip, nested_zip_fragments
+from core.zipmeta import load_index
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def consistent(path, profile):
+    """按 profile 推算的片段是否都与真实的压缩包字节一致"""
+    data = read_bytes(path)
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+    fragments = nested_zip_fragments(len(data), names, profile=profile)
+    return fragments, all(data[offset:offset + len(part)] == part for offset, part in fragments)
+
+
+def known(fragments):
+    return sum(len(part) for _, part in fragments)
+
+
+def test_infozip_profile_matches_infozip_archive():
+    fragments, ok = consistent(data_path("inner.zip"), 'infozip')
+    assert ok
+    # 推算出中央目录后，已知字节远多于不做假设时
+    assert known(fragments) > known(consistent(data_path("inner.zip"), 'unknown')[0])
+    # 生成工具假设错误时，片段与真实字节不一致
+    assert not consistent(data_path("inner.zip"), 'zipfile')[1]
+
+
+def test_zipfile_profile_matches_stdlib_archive(stdlib_zip):
+    assert consistent(stdlib_zip, 'zipfile')[1]
+    assert not consistent(stdlib_zip, 'infozip')[1]
+
+
+def test_unknown_profile_matches_example_archive(inner_zip_copy):
+    # 测试题1 中的内层压缩包由未知工具生成，只有不做假设的推算成立
+    fragments, ok = consistent(inner_zip_copy, 'unknown')
+    assert ok
+    assert fragments[0] == (0, b"PK\x03\x04")
+
+
+def test_count_without_names():
+    fragments = nested_zip_fragments(100, count=2)
+    assert fragments == [(0, b"PK\x03\x04"), (78, b"PK\x05\x06\x00\x00\x00\x00\x02\x00\x02\x00"),
+                         (98, b"\x00\x00")]
+
+
+def test_too_small_or_unknown_profile():
+    assert nested_zip_fragments(40, ["flag.txt"]) == []
+    with pytest.raises(ValueError):
+        nested_zip_fragments(1000, ["flag.txt"], profile='winrar')
+
+
+def test_guess_inner_names():
+    assert guess_inner_names("dir/flag.ZIP") == ["flag.txt"]
+    assert guess_inner_names("readme") == ["readme.txt"]
+    assert guess_inner_names(".zip") == []
+
+
+def test_is_nested_zip():
+    index = load_index(data_path("zipcrypto.zip"))
+    assert not is_nested_zip(index.get("raw.bin"))
+    assert not is_nested_zip(index.get("notes.txt"))
+    # 已知开头为 ZIP 本地文件头的存储条目
+    assert is_nested_zip(index.get("raw.bin"), [b"PK\x03\x04\x14\x00"])
+    assert not is_nested_zip(index.get("notes.txt"), [b"PK\x03\x04\x14\x00"])
@@ -0,0 +1,64 @@
+from core.progress import ProgressParser, ProgressTracker, format_eta
+
+# bkcrack README 中教程攻击的输出，进度行以 \r 刷新
+ATTACK_OUTPUT = (b"bkcrack 1.7.0 - 2024-05-26\r\n"
+                 b"[17:42:41] Z reduction using 1048569 bytes of known plaintext\r\n"
+                 b"0.0 % (0 / 1048569)\r50.0 % (524284 / 1048569)\r100.0 % (1048569 / 1048569)\r\n"
+                 b"[17:42:43] Attack on 542 Z values at index 6\r\n"
+                 b"Keys: c4490e28 b414a23d 91404b31\r\n"
+                 b"33.9 % (184 / 542)\r\n"
+                 b"Found a solution. Stopping.\r\n"
+                 b"You may resume the attack with the option: --continue-attack 184\r\n"
+                 b"[17:42:44] Keys\r\n"
+                 b"c4490e28 b414a23d 91404b31\r\n")
+
+
+def test_parse_attack_output():
+    events = ProgressParser().feed(ATTACK_OUTPUT)
+    stages = [event[1] for event in events if event[0] == 'stage']
+    assert stages == ['z_reduction', 'attack', 'keys_found']
+    progress = [event[1:] for event in events if event[0] == 'progress']
+    assert progress == [(0, 1048569), (524284, 1048569), (1048569, 1048569), (184, 542)]
+    lines = [event[1] for event in events if event[0] == 'line']
+    assert lines[-1] == "c4490e28 b414a23d 91404b31"
+    assert not any('%' in line for line in lines)
+
+
+def test_feed_keeps_partial_lines():
+    parser = ProgressParser()
+    events = []
+    # 逐字节喂入，结果与一次喂入相同
+    for i in range(len(ATTACK_OUTPUT)):
+        events.extend(parser.feed(ATTACK_OUTPUT[i:i + 1]))
+    events.extend(parser.flush())
+    assert events == ProgressParser().feed(ATTACK_OUTPUT)
+
+
+def test_flush_returns_last_line():
+    parser = ProgressParser()
+    assert parser.feed(b"Password: W4sF0rgotten") == []
+    assert parser.flush() == [('stage', 'password_found', "找到密码", "Password: W4sF0rgotten"),
+                              ('line', "Password: W4sF0rgotten")]
+    assert parser.flush() == []
+
+
+def test_invalid_utf8_is_replaced():
+    assert ProgressParser().feed(b"\xff\xfe abc\n") == [('line', "�� abc")]
+
+
+def test_tracker_estimates_remaining_time():
+    tracker = ProgressTracker(min_interval=0)
+    for event in ProgressParser().feed(b"Attack on 542 Z values at index 6\n"):
+        tracker.apply(event, now=0.0)
+    tracker.update(0, 100, now=0.0)
+    tracker.update(50, 100, now=10.0)
+    snapshot = tracker.snapshot()
+    assert snapshot['stage'] == 'attack'
+    assert snapshot['done'] == 50 and snapshot['total'] == 100
+    assert snapshot['eta'] == 10.0
+
+
+def test_format_eta():
+    assert format_eta(None) == "--:--"
+    assert format_eta(59.9) == "00:59"
+    assert format_eta(3725) == "1:02:05"
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from conftest import ROOT, data_path, example_path
+from core.commands import PLAINS_DIR, plain_candidates
+from core.signatures import SignatureDB, SignatureError, load_signatures, suggest_offset
+from core.zipmeta import load_index
+
+SIGNATURES_PATH = os.path.join(ROOT, "plains", "signatures.json")
+
+
+@pytest.fixture(scope="module")
+def db():
+    return SignatureDB.from_file(SIGNATURES_PATH)
+
+
+def test_signature_ids_unique(db):
+    ids = [signature.id for signature in db]
+    assert len(ids) == len(set(ids))
+    assert all(signature.magic for signature in db if signature.id in ('png', 'pe', 'xml'))
+
+
+def test_plain_files_match_fragments(db):
+    """签名库登记的预制明文文件与签名片段在相应偏移处一致"""
+    with_plain = [signature for signature in db if signature.plain]
+    assert with_plain
+    for signature in with_plain:
+        name, plain_offset = signature.plain
+        with open(os.path.join(PLAINS_DIR, name), 'rb') as f:
+            plain = f.read()
+        overlapping = 0
+        for offset, data in signature.fragments:
+            start = offset - plain_offset
+            if offset < 0 or start < 0 or start >= len(plain):
+                continue
+            length = min(len(data), len(plain) - start)
+            assert plain[start:start + length] == data[:length], signature.id
+            overlapping += 1
+        assert overlapping, signature.id
+
+
+def test_match_entry_on_example_archives(db):
+    # 测试题7 的 LICENSE.txt 按条目名匹配 GPL 许可证
+    index = load_index(example_path("测试题7.zip"))
+    entry = index.get("LICENSE.txt")
+    matches = db.match_entry(entry.name, entry.compress_size - 12)
+    assert [match['signature'].id for match in matches][:1] == ['gpl-license']
+    assert matches[0]['contiguous'] >= 12
+
+
+def test_match_entry_png(db):
+    matches = db.match_entry("flag.png", 1000)
+    assert matches[0]['signature'].id == 'png'
+    assert matches[0]['fragments'] == [(0, bytes.fromhex("89504E470D0A1A0A0000000D49484452")),
+                                       (988, bytes.fromhex("0000000049454E44AE426082"))]
+    assert matches[0]['args'][:3] == ["-x", "0", "89504e470d0a1a0a0000000d49484452"]
+    # 大小未知时丢弃相对末尾的片段
+    assert db.match_entry("flag.png")[0]['fragments'] == [(0, bytes.fromhex("89504E470D0A1A0A0000000D49484452"))]
+    assert db.match_entry("flag.unknown-ext", 1000) == []
+
+
+def test_locate_plain(db):
+    with open(os.path.join(PLAINS_DIR, "exe_plain"), 'rb') as f:
+        head = f.read(64)
+    assert (db.get('pe'), 64) in db.locate_plain(head)
+    assert suggest_offset(os.path.join(PLAINS_DIR, "exe_plain"), db)[0] == 64
+    assert suggest_offset(os.path.join(PLAINS_DIR, "png_plain"), db)[0] == 0
+
+
+def test_for_content(db):
+    assert db.get('png') in db.for_content(bytes.fromhex("89504E470D0A1A0A0000"))
+    assert db.for_content(b"\x00\x01\x02\x03") == []
+
+
+def test_match_entry_by_known_head(db):
+    """条目名匹配不到时，按已知开头字节的魔数匹配签名"""
+    assert db.match_entry("raw.bin", 1000) == []
+    matches = db.match_entry("raw.bin", 1000, [bytes.fromhex("89504E470D0A1A0A0000")])
+    assert [match['signature'].id for match in matches] == ['png']
+    # 条目名和魔数匹配到同一个签名时不重复
+    assert len(db.match_entry("flag.png", 1000, [bytes.fromhex("89504E470D0A1A0A0000")])) == 1
+
+
+def test_plain_candidates_use_plain_head(db, tmp_path):
+    index = load_index(data_path("zipcrypto.zip"))
+    png_plain = tmp_path / "head.bin"
+    png_plain.write_bytes(bytes.fromhex("89504E470D0A1A0A0000000D49484452"))
+    labels = [candidate['label'] for candidate in plain_candidates(index.get("raw.bin"), db, [str(png_plain)])]
+    assert 'png' in labels and 'head.bin' in labels
+    assert 'png' not in [candidate['label'] for candidate in plain_candidates(index.get("raw.bin"), db)]
+    # 压缩条目中是压缩后的数据，不按魔数匹配
+    assert 'png' not in [candidate['label']
+                         for candidate in plain_candidates(index.get("notes.txt"), db, [str(png_plain)])]
+    # 明文以 ZIP 本地文件头开头时按内层 ZIP 推算
+    zip_plain = tmp_path / "inner.bin"
+    zip_plain.write_bytes(b"PK\x03\x04\x14\x00\x00\x00\x00\x00")
+    labels = [candidate['label'] for candidate in plain_candidates(index.get("raw.bin"), db, [str(zip_plain)])]
+    assert 'nested-zip-1' in labels
+
+
+def test_load_signatures_missing_file(tmp_path):
+    assert len(load_signatures(str(tmp_path / "missing.json"))) == 0
+
+
+def test_bad_signature_file(tmp_path):
+    path = tmp_path / "signatures.json"
+    path.write_text('{"version": 1, "signatures": [{"id": "x", "fragments": []}]}', encoding='utf-8')
+    with pytest.raises(SignatureError):
+        SignatureDB.from_file(str(path))
+    path.write_text('{"version": 99, "signatures": []}', encoding='utf-8')
+    with pytest.raises(SignatureError):
+        SignatureDB.from_file(str(path))
@@ -0,0 +1,21 @@
+import core.threads as threads
+from core.backend import Backend
+
+
+def test_split_threads_by_concurrent_processes():
+    assert threads.split_threads(1, cores=8) == 8
+    assert threads.split_threads(4, cores=8) == 2
+    assert threads.split_threads(16, cores=8) == 1
+    # 不超过单个进程的最佳线程数
+    assert threads.split_threads(1, 6, cores=8) == 6
+
+
+def test_assign_threads_uses_actual_concurrency(monkeypatch):
+    """workers 很大但只有两个尝试时，每个进程分到一半的核"""
+    monkeypatch.setattr(threads, "cpu_count", lambda: 8)
+    attempts = [("a", ["bkcrack", "-C", "x.zip"]), ("b", ["bkcrack", "-C", "y.zip"])]
+    assigned = threads.assign_threads(attempts, min(32, len(attempts)), bkcrack=Backend("bkcrack"))
+    assert assigned == [("a", ["bkcrack", "-C", "x.zip", "-j", "4"]),
+                        ("b", ["bkcrack", "-C", "y.zip", "-j", "4"])]
+    # 原命令不被修改
+    assert attempts[0][1] == ["bkcrack", "-C", "x.zip"]
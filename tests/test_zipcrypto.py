@@ -0,0 +1,179 @@
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from conftest import PASSWORD, data_path, example_path, read_data
+from core.zipcrypto import (HEADER_SIZE, CRC_TABLE, check_byte, check_entry, check_header, iter_decrypted,
+                            keys_from_password, parse_keys, read_header, verify_candidates, verify_keys,
+                            write_decrypted_archive)
+from core.zipmeta import load_index
+
+
+def encrypt(data, keys):
+    """ZipCrypto 加密(与解密使用同一套密钥更新，只是用明文更新)，只用于构造测试数据"""
+    k0, k1, k2 = keys
+    out = bytearray()
+    for p in data:
+        t = (k2 & 0xFFFF) | 2
+        out.append(p ^ (((t * (t ^ 1)) >> 8) & 0xFF))
+        k0 = (k0 >> 8) ^ CRC_TABLE[(k0 ^ p) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ CRC_TABLE[(k2 ^ (k1 >> 24)) & 0xFF]
+    return bytes(out)
+
+
+def write_crc_checked_zip(path, name, data, password):
+    """写一个不带数据描述符的 ZipCrypto 压缩包(校验字节为 CRC 高字节)，与示例测试题相同"""
+    crc = zlib.crc32(data)
+    header = bytes(range(1, HEADER_SIZE)) + bytes([crc >> 24])
+    payload = encrypt(header + data, keys_from_password(password))
+    encoded = name.encode()
+    local = struct.pack('<4s5H3L2H', b'PK\x03\x04', 20, 1, 0, 0, 0, crc, len(payload), len(data), len(encoded), 0)
+    central = struct.pack('<4s6H3L5H2L', b'PK\x01\x02', 0x031E, 20, 1, 0, 0, 0, crc, len(payload), len(data),
+                          len(encoded), 0, 0, 0, 0, 0, 0)
+    cd_offset = len(local) + len(encoded) + len(payload)
+    eocd = struct.pack('<4s4H2LH', b'PK\x05\x06', 0, 0, 1, 1, len(central) + len(encoded), cd_offset, 0)
+    with open(path, 'wb') as f:
+        f.write(local + encoded + payload + central + encoded + eocd)
+
+
+def test_keys_from_password_matches_bkcrack():
+    # bkcrack 教程中 secrets.zip 的内部密钥，恢复出的密码为 W4sF0rgotten
+    assert keys_from_password("W4sF0rgotten") == parse_keys("c4490e28 b414a23d 91404b31")
+    assert keys_from_password("") == (0x12345678, 0x23456789, 0x34567890)
+    assert keys_from_password(PASSWORD) == keys_from_password(PASSWORD.encode())
+
+
+def test_parse_keys_rejects_wrong_count():
+    with pytest.raises(ValueError):
+        parse_keys("c4490e28 b414a23d")
+
+
+def test_verify_keys_on_infozip_archive():
+    index = load_index(data_path("zipcrypto.zip"))
+    assert verify_keys(index, keys_from_password(PASSWORD)) == {0: True, 1: True}
+    assert verify_keys(index, keys_from_password("wrong"), indices=[0]) == {0: False}
+
+
+def test_verify_keys_on_example_archives():
+    # 只有加密条目参与校验；未加密的外层压缩包没有可校验的条目
+    keys = keys_from_password(PASSWORD)
+    index = load_index(example_path("测试题7.zip"))
+    assert sorted(verify_keys(index, keys)) == [0, 1]
+    assert verify_keys(load_index(example_path("测试题1.zip")), keys) == {}
+
+
+def test_verify_candidates():
+    index = load_index(data_path("zipcrypto.zip"))
+    entry = index.entry(1)
+    with open(index.path, 'rb') as f:
+        f.seek(index.data_offset(1))
+        header = f.read(HEADER_SIZE)
+    expected = (entry.mod_time >> 8) & 0xFF
+    right, wrong = keys_from_password(PASSWORD), keys_from_password("wrong")
+    assert verify_candidates(header, expected, [wrong, right]) == [False, True]
+    assert verify_candidates(header, expected, []) == []
+
+
+def test_iter_decrypted_matches_zipfile():
+    index = load_index(data_path("zipcrypto.zip"))
+    keys = keys_from_password(PASSWORD)
+    # Store 条目解密后就是原文件
+    stored = index.find("raw.bin")
+    assert b"".join(iter_decrypted(index, stored, keys, chunk_size=1000)) == read_data("raw.bin")
+    # Deflate 条目解密后是压缩数据(与 bkcrack -d 相同)，解压后与原文件一致
+    deflated = b"".join(iter_decrypted(index, index.find("notes.txt"), keys))
+    assert len(deflated) == index.get("notes.txt").compress_size - HEADER_SIZE
+    assert zlib.decompress(deflated, -zlib.MAX_WBITS) == read_data("notes.txt")
+    with zipfile.ZipFile(data_path("zipcrypto.zip")) as archive:
+        assert archive.read("notes.txt", pwd=PASSWORD.encode()) == read_data("notes.txt")
+
+
+def test_iter_decrypted_rejects_wrong_keys():
+    index = load_index(data_path("zipcrypto.zip"))
+    with pytest.raises(ValueError):
+        list(iter_decrypted(index, 0, keys_from_password("wrong")))
+
+
+def test_iter_decrypted_rejects_unencrypted_entry():
+    index = load_index(data_path("inner.zip"))
+    with pytest.raises(ValueError):
+        list(iter_decrypted(index, 0, keys_from_password(PASSWORD)))
+
+
+def test_crc_check_byte(tmp_path):
+    path = str(tmp_path / "crc.zip")
+    data = b"flag{crc-check-byte}\n" * 3
+    write_crc_checked_zip(path, "flag.txt", data, PASSWORD)
+    # 先用 zipfile 确认构造的压缩包本身正确
+    with zipfile.ZipFile(path) as archive:
+        assert archive.read("flag.txt", pwd=PASSWORD.encode()) == data
+    index = load_index(path)
+    assert verify_keys(index, keys_from_password(PASSWORD)) == {0: True}
+    assert b"".join(iter_decrypted(index, 0, keys_from_password(PASSWORD))) == data
+
+
+def test_write_decrypted_archive(tmp_path):
+    output = str(tmp_path / "decrypted.zip")
+    assert write_decrypted_archive(data_path("zipcrypto.zip"), keys_from_password(PASSWORD), output) == (2, [])
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+        assert not any(info.flag_bits & 0x1 for info in archive.infolist())
+        assert archive.read("notes.txt") == read_data("notes.txt")
+        assert archive.read("raw.bin") == read_data("raw.bin")
+
+
+def test_write_decrypted_archive_with_wrong_keys_copies_entries(tmp_path):
+    output = str(tmp_path / "copy.zip")
+    assert write_decrypted_archive(data_path("zipcrypto.zip"), keys_from_password("wrong"), output) == (0, [])
+    with zipfile.ZipFile(output) as archive:
+        assert archive.read("raw.bin", pwd=PASSWORD.encode()) == read_data("raw.bin")
+
+
+def lucky_wrong_keys(index, i):
+    """找一组错误但碰巧能通过加密头校验(约 1/256 的概率)的密钥"""
+    header = read_header(index, i)
+    expected = check_byte(index.entry(i))
+    for n in range(100000):
+        keys = keys_from_password(f"wrong{n}")
+        if check_header(keys, header, expected):
+            return keys
+    raise AssertionError("没有找到通过加密头校验的错误密钥")
+
+
+def test_crc_rejects_keys_passing_check_byte(tmp_path):
+    path = str(tmp_path / "crc.zip")
+    data = b"flag{crc-check-byte}\n" * 3
+    write_crc_checked_zip(path, "flag.txt", data, PASSWORD)
+    index = load_index(path)
+    keys = lucky_wrong_keys(index, 0)
+    assert verify_keys(index, keys) == {0: True}
+    assert verify_keys(index, keys, check_crc=True) == {0: False}
+    assert not check_entry(index, 0, keys)
+    assert check_entry(index, 0, keys_from_password(PASSWORD))
+    assert verify_keys(index, keys_from_password(PASSWORD), check_crc=True) == {0: True}
+
+    # 导出时 CRC 不一致的条目保持加密原样复制
+    output = str(tmp_path / "decrypted.zip")
+    assert write_decrypted_archive(path, keys, output) == (0, ["flag.txt"])
+    with zipfile.ZipFile(output) as archive:
+        assert archive.read("flag.txt", pwd=PASSWORD.encode()) == data
+
+
+def test_write_decrypted_archive_rejects_deflate_entry_failing_crc(tmp_path):
+    index = load_index(data_path("zipcrypto.zip"))
+    keys = lucky_wrong_keys(index, index.find("notes.txt"))
+    output = str(tmp_path / "decrypted.zip")
+    assert write_decrypted_archive(data_path("zipcrypto.zip"), keys, output)[1] == ["notes.txt"]
+    with zipfile.ZipFile(output) as archive:
+        assert archive.read("notes.txt", pwd=PASSWORD.encode()) == read_data("notes.txt")
+        assert archive.read("raw.bin", pwd=PASSWORD.encode()) == read_data("raw.bin")
+
+
+def test_write_decrypted_archive_refuses_zip64(tmp_path):
+    output = str(tmp_path / "zip64.zip")
+    with pytest.raises(ValueError):
+        write_decrypted_archive(data_path("zip64.zip"), keys_from_password(PASSWORD), output)
+    assert not (tmp_path / "zip64.zip").exists()
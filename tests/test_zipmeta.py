@@ -0,0 +1,87 @@
+import glob
+import struct
+import zipfile
+
+import pytest
+
+from conftest import EXAMPLE_DIR, data_path, example_path
+from core.zipmeta import detect_zip_creator, load_index
+
+ARCHIVES = sorted(glob.glob(f"{EXAMPLE_DIR}/*.zip")) + [data_path("zipcrypto.zip"), data_path("inner.zip")]
+
+
+@pytest.mark.parametrize("path", ARCHIVES)
+def test_load_index_matches_zipfile(path):
+    index = load_index(path)
+    with zipfile.ZipFile(path) as archive:
+        infos = archive.infolist()
+        assert index.names() == [info.orig_filename for info in infos]
+        for i, info in enumerate(infos):
+            entry = index.entry(i)
+            assert (entry.method, entry.crc, entry.compress_size, entry.file_size, entry.flag_bits) == \
+                (info.compress_type, info.CRC, info.compress_size, info.file_size, info.flag_bits)
+            assert entry.header_offset == info.header_offset
+            assert entry.encrypted == bool(info.flag_bits & 0x1)
+            # 数据起始位置：本地文件头 + 文件名 + 本地扩展字段
+            with open(path, 'rb') as f:
+                f.seek(info.header_offset)
+                local = f.read(30)
+            name_length, extra_length = struct.unpack('<HH', local[26:30])
+            assert index.data_offset(i) == info.header_offset + 30 + name_length + extra_length
+
+
+def test_lookup():
+    index = load_index(example_path("测试题2.zip"))
+    assert index.find("md.txt") == 2
+    assert index.find("missing.txt") == -1
+    assert "guessinteger" in index
+    assert index.get("md.txt").compression == 'store'
+    assert index.get("md.txt").encryption_name == 'zipcrypto'
+    assert index.find_casefold("MD.TXT") == ["md.txt"]
+
+
+def test_zip64_detected():
+    assert load_index(data_path("zip64.zip")).zip64
+    assert not load_index(data_path("zipcrypto.zip")).zip64
+
+
+def test_load_index_rejects_non_zip(tmp_path):
+    path = tmp_path / "not.zip"
+    path.write_bytes(b"not a zip file" * 10)
+    with pytest.raises(ValueError):
+        load_index(str(path))
+
+
+def test_load_index_reloads_changed_file(tmp_path):
+    path = tmp_path / "a.zip"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("a.txt", b"a")
+    assert load_index(str(path)).names() == ["a.txt"]
+    with zipfile.ZipFile(path, 'a') as archive:
+        archive.writestr("b.txt", b"bb")
+    assert load_index(str(path)).names() == ["a.txt", "b.txt"]
+
+
+def test_detect_zip_creator_7zip():
+    info = detect_zip_creator(example_path("测试题2.zip"))
+    assert "Version Made By: 0x003F" in info
+    assert "7-Zip" in info
+    assert "ZIP64格式: 否" in info
+    assert " - md.txt: 0x003F" in info
+
+
+def test_detect_zip_creator_infozip():
+    info = detect_zip_creator(data_path("inner.zip"))
+    assert "Version Made By: 0x031E" in info
+    assert "UNIX" in info
+
+
+def test_detect_zip_creator_summarizes_large_archives():
+    info = detect_zip_creator(example_path("测试题2.zip"), max_listed=1)
+    assert "0x003F (MS-DOS和OS/2, 7-Zip / 360压缩): 3 个条目" in info
+
+
+def test_detect_zip_creator_reports_errors(tmp_path):
+    path = tmp_path / "broken.zip"
+    path.write_bytes(b"PK")
+    assert detect_zip_creator(str(path)).startswith("解析ZIP元数据时出错")
@@ -3,9 +3,10 @@
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QWidget, QLabel, QHBoxLayout, QVBoxLayout, QPushButton,
-    QTextBrowser, QPlainTextEdit, QScrollArea, QGroupBox, QComboBox
+    QTextBrowser, QPlainTextEdit, QScrollArea, QGroupBox, QComboBox, QProgressBar
 )
 from qfluentwidgets import PushButton, TextBrowser, PlainTextEdit
+from ui.logview import LogView
 
 
 class Ui_Form(object):
@@ -70,7 +71,7 @@ class Ui_Form(object):
                 background-color: rgb(167, 0, 79);
             }
 
-            QTextBrowser {
+            QTextBrowser, LogView {
                 background-color: rgb(35, 35, 35);
                 color: rgb(255, 255, 127);
                 border: 2px solid rgb(255, 170, 255);
@@ -221,6 +222,70 @@ class Ui_Form(object):
         self.OffsetInput.setMinimumHeight(35)
         control_layout.addWidget(self.OffsetInput)
 
+        label = QLabel("线程数(-j 留空使用测定值或CPU核数，多个进程并行时自动均分)")
+        control_layout.addWidget(label)
+        threads_layout = QHBoxLayout()
+        self.ThreadsInput = PlainTextEdit()
+        self.ThreadsInput.setMinimumHeight(35)
+        self.ThreadsInput.setPlaceholderText("自动")
+        self.CalibrateThreadsButton = QPushButton("测定最佳线程数")
+        self.CalibrateThreadsButton.setProperty("execButton", True)
+        self.CalibrateThreadsButton.setMinimumHeight(35)
+        threads_layout.addWidget(self.ThreadsInput)
+        threads_layout.addWidget(self.CalibrateThreadsButton)
+        control_layout.addLayout(threads_layout)
+
+        # 偏移扫描：明文在目标文件中的位置未知时使用
+        sweep_group = QGroupBox("偏移扫描(-o 未知时并行尝试)")
+        sweep_layout = QVBoxLayout(sweep_group)
+        sweep_input_layout = QHBoxLayout()
+        self.OffsetRangeInput = PlainTextEdit()
+        self.OffsetRangeInput.setMinimumHeight(35)
+        self.OffsetRangeInput.setPlaceholderText("0..64 或 0..64:4 或 0,6,64")
+        self.SweepWorkersInput = PlainTextEdit()
+        self.SweepWorkersInput.setMaximumWidth(100)
+        self.SweepWorkersInput.setMinimumHeight(35)
+        self.SweepWorkersInput.setPlaceholderText("CPU核数")
+        sweep_input_layout.addWidget(QLabel("偏移范围"))
+        sweep_input_layout.addWidget(self.OffsetRangeInput)
+        sweep_input_layout.addWidget(QLabel("并行进程数"))
+        sweep_input_layout.addWidget(self.SweepWorkersInput)
+        sweep_layout.addLayout(sweep_input_layout)
+
+        self.OffsetSweepButton = QPushButton("并行扫描偏移")
+        self.OffsetSweepButton.setProperty("execButton", True)
+        self.OffsetSweepButton.setMinimumHeight(35)
+        sweep_layout.addWidget(self.OffsetSweepButton)
+        control_layout.addWidget(sweep_group)
+
+        # 矩阵攻击：所有加密条目 × plains 预制明文及额外明文
+        matrix_group = QGroupBox("矩阵攻击(全部条目 × 全部明文)")
+        matrix_layout = QVBoxLayout(matrix_group)
+        matrix_plain_layout = QHBoxLayout()
+        self.SelectMatrixPlainsButton = PushButton("额外明文")
+        self.SelectMatrixPlainsButton.setMinimumHeight(35)
+        self.SelectMatrixPlainsButton.setProperty("execButton", True)
+        self.MatrixPlainsInput = PlainTextEdit()
+        self.MatrixPlainsInput.setMinimumHeight(35)
+        self.MatrixPlainsInput.setPlaceholderText("每行一个明文文件路径(可选)")
+        matrix_plain_layout.addWidget(self.SelectMatrixPlainsButton)
+        matrix_plain_layout.addWidget(self.MatrixPlainsInput)
+        matrix_layout.addLayout(matrix_plain_layout)
+
+        matrix_run_layout = QHBoxLayout()
+        self.MatrixWorkersInput = PlainTextEdit()
+        self.MatrixWorkersInput.setMaximumWidth(100)
+        self.MatrixWorkersInput.setMinimumHeight(35)
+        self.MatrixWorkersInput.setPlaceholderText("CPU核数")
+        self.MatrixAttackButton = QPushButton("开始矩阵攻击")
+        self.MatrixAttackButton.setProperty("execButton", True)
+        self.MatrixAttackButton.setMinimumHeight(35)
+        matrix_run_layout.addWidget(QLabel("并行进程数"))
+        matrix_run_layout.addWidget(self.MatrixWorkersInput)
+        matrix_run_layout.addWidget(self.MatrixAttackButton)
+        matrix_layout.addLayout(matrix_run_layout)
+        control_layout.addWidget(matrix_group)
+
         label = QLabel(" -p 参数的内容(自动添加）")
         control_layout.addWidget(label)
         self.PlainTextContent = PlainTextEdit()
@@ -242,6 +307,26 @@ class Ui_Form(object):
         hex_conversion_layout.addWidget(self.ConvertToHexButton)
         direct_hex_layout.addLayout(hex_conversion_layout)
 
+        # 目标为存储方式的内层 ZIP 时，根据内层文件名自动推算偏移和已知明文
+        nested_layout = QHBoxLayout()
+        self.NestedNamesInput = PlainTextEdit()
+        self.NestedNamesInput.setMinimumHeight(35)
+        self.NestedNamesInput.setPlaceholderText("内层ZIP中的文件名(以;分割，留空则按外层文件名猜测)")
+        nested_layout.addWidget(self.NestedNamesInput)
+        self.NestedProfileCombo = QComboBox()
+        self.NestedProfileCombo.setMinimumHeight(35)
+        self.NestedProfileCombo.setStyleSheet(
+            "QComboBox { background-color: rgb(35,35,35); color: rgb(255,255,127); font-size: 10pt; }")
+        self.NestedProfileCombo.addItem("生成工具未知", "unknown")
+        self.NestedProfileCombo.addItem("Python zipfile/资源管理器", "zipfile")
+        self.NestedProfileCombo.addItem("Linux zip (Info-ZIP)", "infozip")
+        nested_layout.addWidget(self.NestedProfileCombo)
+        self.NestedZipButton = QPushButton("推算内层ZIP明文")
+        self.NestedZipButton.setProperty("execButton", True)
+        self.NestedZipButton.setMinimumHeight(35)
+        nested_layout.addWidget(self.NestedZipButton)
+        direct_hex_layout.addLayout(nested_layout)
+
         label = QLabel("目标文件偏移地址")
         direct_hex_layout.addWidget(label)
         self.DirectHexOffsetInput = PlainTextEdit()
@@ -301,6 +386,16 @@ class Ui_Form(object):
         self.PasswordLengthInput.setMinimumHeight(35)
         recovery_layout.addWidget(self.PasswordLengthInput)
 
+        recovery_workers_layout = QHBoxLayout()
+        self.RecoveryWorkersInput = PlainTextEdit()
+        self.RecoveryWorkersInput.setMaximumWidth(100)
+        self.RecoveryWorkersInput.setMinimumHeight(35)
+        self.RecoveryWorkersInput.setPlaceholderText("CPU核数")
+        recovery_workers_layout.addWidget(QLabel("并行进程数"))
+        recovery_workers_layout.addWidget(self.RecoveryWorkersInput)
+        recovery_workers_layout.addStretch()
+        recovery_layout.addLayout(recovery_workers_layout)
+
         self.RecoverPasswordButton = QPushButton("恢复密码")
         self.RecoverPasswordButton.setProperty("execButton", True)
         self.RecoverPasswordButton.setMinimumHeight(35)
@@ -368,9 +463,42 @@ class Ui_Form(object):
 
         output_panel = QWidget()
         output_layout = QVBoxLayout(output_panel)
-        self.OutPutArea = QTextBrowser()
+        # 输出区域上方：按级别过滤显示的记录(完整日志写入日志文件)
+        log_filter_layout = QHBoxLayout()
+        log_filter_layout.addWidget(QLabel("显示:"))
+        self.LogLevelCombo = QComboBox()
+        self.LogLevelCombo.setStyleSheet(
+            "QComboBox { background-color: rgb(35,35,35); color: rgb(255,255,127); font-size: 10pt; }")
+        log_filter_layout.addWidget(self.LogLevelCombo)
+        log_filter_layout.addStretch()
+        output_layout.addLayout(log_filter_layout)
+        self.OutPutArea = LogView()
         output_layout.addWidget(self.OutPutArea)
 
+        # 攻击进度(阶段、速度和剩余时间)
+        progress_layout = QHBoxLayout()
+        self.AttackProgressBar = QProgressBar()
+        self.AttackProgressBar.setRange(0, 1000)
+        self.AttackProgressBar.setValue(0)
+        self.AttackProgressBar.setTextVisible(False)
+        self.AttackProgressBar.setMaximumHeight(12)
+        self.AttackProgressBar.setStyleSheet("""
+            QProgressBar {
+                background-color: rgb(35, 35, 35);
+                border: 1px solid rgb(255, 170, 255);
+                border-radius: 5px;
+            }
+            QProgressBar::chunk {
+                background-color: rgb(197, 0, 99);
+                border-radius: 5px;
+            }
+        """)
+        self.ProgressLabel = QLabel("")
+        self.ProgressLabel.setMinimumWidth(360)
+        progress_layout.addWidget(self.AttackProgressBar)
+        progress_layout.addWidget(self.ProgressLabel)
+        output_layout.addLayout(progress_layout)
+
         main_layout.addWidget(scroll, 40)
         main_layout.addWidget(output_panel, 60)
 
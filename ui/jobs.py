@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""界面使用的后台任务队列：任务在线程池中执行，结果通过信号回到界面线程"""
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6 import QtCore
+from PySide6.QtCore import Signal
+
+from core.ledger import communicate_child
+
+
+class JobCancelled(Exception):
+    """后台任务被取消"""
+
+
+class Job:
+    """后台任务句柄，任务函数通过它启动可被取消的子进程"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self._cancel_event = threading.Event()
+        self._process = None
+        self._lock = threading.Lock()
+        self.peak_rss = None  # 最近一次 run() 的子进程峰值内存
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self, command, **kwargs):
+        """与 subprocess.run(capture_output=True) 相同，但可以被 cancel() 终止"""
+        with self._lock:
+            if self.cancelled:
+                raise JobCancelled()
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+            self._process = process
+        try:
+            stdout, stderr, _, self.peak_rss = communicate_child(process)
+        finally:
+            with self._lock:
+                self._process = None
+        if self.cancelled:
+            raise JobCancelled()
+        return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+    def cancel(self):
+        with self._lock:
+            self._cancel_event.set()
+            if self._process:
+                try:
+                    self._process.terminate()
+                except:
+                    pass
+
+
+class JobQueue(QtCore.QObject):
+    """后台任务队列
+
+    任务函数在线程池中执行，签名为 fn(job, *args)，不能访问界面控件；
+    完成回调 on_done(result) / on_error(exception) 通过信号回到界面线程执行。
+    已取消任务的回调不会被调用。
+    """
+    _done_signal = Signal(int, object, object)
+
+    def __init__(self, max_workers=None, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                                            thread_name_prefix="bkcrack-job")
+        self._jobs = {}  # 任务ID -> (Job, on_done, on_error)
+        self._next_id = 1
+        self._done_signal.connect(self._dispatch)
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        job = Job(self._next_id)
+        self._next_id += 1
+        self._jobs[job.id] = (job, on_done, on_error)
+        self._executor.submit(self._run, job, fn, args)
+        return job.id
+
+    def _run(self, job, fn, args):
+        result, error = None, None
+        try:
+            if job.cancelled:
+                raise JobCancelled()
+            result = fn(job, *args)
+        except Exception as e:
+            error = e
+        self._done_signal.emit(job.id, result, error)
+
+    def _dispatch(self, job_id, result, error):
+        job, on_done, on_error = self._jobs.pop(job_id, (None, None, None))
+        if job is None or job.cancelled or isinstance(error, JobCancelled):
+            return
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                print(f"后台任务 #{job_id} 出错: {str(error)}")
+        elif on_done:
+            on_done(result)
+
+    def cancel(self, job_id):
+        entry = self._jobs.get(job_id)
+        if entry:
+            entry[0].cancel()
+
+    def cancel_all(self):
+        for job, _, _ in list(self._jobs.values()):
+            job.cancel()
+        return len(self._jobs)
+
+    def active_count(self):
+        return len(self._jobs)
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QColor, QTextCharFormat, QTextCursor
+from PySide6.QtWidgets import QPlainTextEdit
+
+from core.logbuffer import CAPACITY, DEBUG, INFO, LogBuffer
+
+
+class LogView(QPlainTextEdit):
+    """输出区域：纯文本、行数有上限，新记录每 FLUSH_INTERVAL 毫秒批量绘制一次"""
+    FLUSH_INTERVAL = 100
+    DEFAULT_COLOR = "yellow"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.buffer = LogBuffer()
+        self.setMaximumBlockCount(CAPACITY)
+        self.min_level = DEBUG
+        self._formats = {}
+        self._has_text = False
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start(self.FLUSH_INTERVAL)
+
+    def set_buffer(self, buffer):
+        self.buffer.close()
+        self.buffer = buffer
+        self.setMaximumBlockCount(buffer.records.maxlen)
+        self.render_all()
+
+    def log(self, text, level=INFO, color=None):
+        self.buffer.append(text, level, color)
+
+    def log_lines(self, lines, level=INFO, color=None):
+        self.buffer.extend(lines, level, color)
+
+    def _format(self, color):
+        color = color or self.DEFAULT_COLOR
+        text_format = self._formats.get(color)
+        if text_format is None:
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            self._formats[color] = text_format
+        return text_format
+
+    def _insert(self, records):
+        records = [record for record in records if record.level >= self.min_level]
+        if not records:
+            return
+        bar = self.verticalScrollBar()
+        # 用户向上翻看时不自动滚动到底部
+        follow = bar.value() >= bar.maximum() - 2
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for record in records:
+            if self._has_text:
+                cursor.insertBlock()
+            cursor.insertText(record.text, self._format(record.color))
+            self._has_text = True
+        cursor.endEditBlock()
+        if follow:
+            bar.setValue(bar.maximum())
+
+    def flush(self):
+        """绘制新记录(同时写入日志文件)；一批超过行数上限时只绘制最后的部分"""
+        self._insert(self.buffer.flush()[-self.maximumBlockCount():])
+
+    def render_all(self):
+        self.buffer.flush()
+        super().clear()
+        self._has_text = False
+        self._insert(self.buffer.records)
+
+    def set_min_level(self, level):
+        """只显示不低于 level 的记录，从缓冲中重新绘制"""
+        self.min_level = level
+        self.render_all()
+
+    def clear(self):
+        self.buffer.clear()
+        super().clear()
+        self._has_text = False
+
+    def close_log(self):
+        self._timer.stop()
+        self.flush()
+        self.buffer.close()
@@ -0,0 +1,587 @@
+# -*- coding: utf-8 -*-
+"""文件预览窗口
+
+只在第一次预览文件时由主窗口导入，程序启动时不需要加载这些窗口和它们的样式。
+"""
+import os
+import shutil
+import zipfile
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QAction, QColor, QFont, QGuiApplication, QImageReader, QPainter, QPixmap
+from PySide6.QtWidgets import (QAbstractScrollArea, QDialog, QHBoxLayout, QLabel, QLineEdit, QListWidget,
+                               QListWidgetItem, QMenu, QPushButton, QScrollArea, QVBoxLayout, QWidget)
+
+from core.backend import get_backend
+from core.hexview import (HEX_WIDTH, LineIndex, MappedFile, hex_row_count, hex_rows, looks_like_text,
+                          parse_offset, parse_pattern)
+from core.inflate import can_inflate, extract_entry_to, inflate_entry_file
+from core.zipcrypto import parse_keys, prefer_in_process
+from core.zipmeta import ENCRYPTION_NONE, ENCRYPTION_ZIPCRYPTO, load_index
+from ui.jobs import JobQueue
+
+
+class PreviewSource:
+    """多文件预览的数据来源：按需把条目解密并解压到临时目录
+
+    未加密的条目直接用 zipfile 读取；ZipCrypto 条目小文件在进程内解密，其余用 bkcrack -d 解密，
+    压缩条目的数据随后流式解压并校验 CRC。AES 等其他加密方式不支持预览。
+    load() 在后台线程中执行，返回临时文件路径。
+    """
+
+    def __init__(self, zip_path, key, temp_dir):
+        self.zip_path = zip_path
+        self.key_parts = key.split()
+        if self.key_parts and len(self.key_parts) != 3:
+            raise ValueError("密钥格式不正确，应为三个 32 位十六进制数")
+        self.temp_dir = temp_dir
+        self.index = load_index(zip_path)
+        self.entries = [entry for entry in self.index if not entry.is_dir]
+
+    def names(self):
+        return [entry.name for entry in self.entries]
+
+    def load(self, job, name):
+        entry = self.index.get(name)
+        # 按条目序号分目录，避免不同目录下的同名文件互相覆盖
+        out_dir = os.path.join(self.temp_dir, str(entry.index))
+        os.makedirs(out_dir, exist_ok=True)
+        temp_path = os.path.join(out_dir, os.path.basename(entry.name))
+        if entry.encryption == ENCRYPTION_NONE:
+            # 未加密的条目不论是否填写了密钥都直接读取
+            try:
+                with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+                    with zip_ref.open(entry.name) as src, open(temp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+            except NotImplementedError:
+                raise ValueError(f"不支持预览 {entry.compression} 压缩方式的条目")
+            return temp_path
+        if entry.encryption != ENCRYPTION_ZIPCRYPTO:
+            raise ValueError(f"条目使用 {entry.encryption_name} 加密，只能预览 ZipCrypto 加密的条目")
+        if not self.key_parts:
+            raise ValueError("条目已加密，请先填写密钥")
+        if not can_inflate(entry.method):
+            raise ValueError(f"不支持预览 {entry.compression} 压缩方式的条目")
+        if prefer_in_process(entry.compress_size):
+            # 小文件在进程内解密，省去启动 bkcrack 和中间文件
+            extract_entry_to(self.index, entry.index, parse_keys(self.key_parts), temp_path)
+        else:
+            raw_path = temp_path + ".raw"
+            command = get_backend().command("-C", self.zip_path, "-c", entry.name, "-k", *self.key_parts,
+                                            "-d", raw_path)
+            result = job.run(command, text=True)
+            if result.returncode != 0 or not os.path.exists(raw_path):
+                raise RuntimeError(f"解密失败: {(result.stderr or result.stdout).strip()}")
+            try:
+                inflate_entry_file(entry, raw_path, temp_path)
+            finally:
+                os.unlink(raw_path)
+        return temp_path
+
+
+def build_line_index(job, mapped):
+    """后台线程：为文本模式建立行索引"""
+    return LineIndex(mapped, cancelled=lambda: job.cancelled)
+
+
+class HexView(QAbstractScrollArea):
+    """基于 mmap 的虚拟滚动查看器，只绘制可见的行，可浏览任意大小的文件
+
+    mode 为 'hex' 时每行 16 字节；为 'text' 时按换行符分行(稀疏行索引)。
+    大文件的行索引在后台建立，建好之前按十六进制显示。
+    """
+    MAX_SCROLL = 0x7FFFFFFF
+    # 不超过此大小的文件直接在界面线程中建立行索引(只需几毫秒)
+    SYNC_INDEX_LIMIT = 4 * 1024 * 1024
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mapped = None
+        self.line_index = None
+        self.mode = 'hex'
+        self.wanted_mode = 'hex'
+        self.index_job = None
+        self.job_queue = JobQueue(max_workers=1, parent=self)
+        self.highlight_row = None
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPointSize(10)
+        self.setFont(font)
+        self.viewport().setStyleSheet("background-color: rgb(45, 45, 45);")
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def set_file(self, path, mode='hex'):
+        self.close_file()
+        self.mapped = MappedFile(path)
+        self.mode = 'hex'
+        self.verticalScrollBar().setValue(0)
+        self.set_mode(mode)
+
+    def close_file(self):
+        if self.index_job is not None:
+            self.job_queue.cancel(self.index_job)
+            self.index_job = None
+        if self.mapped:
+            self.mapped.close()
+        self.mapped = None
+        self.line_index = None
+        self.highlight_row = None
+        self.viewport().update()
+
+    def set_mode(self, mode):
+        if not self.mapped:
+            return
+        self.wanted_mode = mode
+        if mode == 'text' and self.line_index is None:
+            # 只统计换行符数量，但 GB 级文件也要顺序读一遍，放到后台进行
+            if self.mapped.size <= self.SYNC_INDEX_LIMIT:
+                self.line_index = LineIndex(self.mapped)
+            else:
+                if self.index_job is None:
+                    mapped = self.mapped
+                    self.index_job = self.job_queue.submit(
+                        build_line_index, mapped,
+                        on_done=lambda index: self.on_line_index(mapped, index),
+                        on_error=lambda e: self.on_line_index(mapped, None))
+                mode = 'hex'
+        offset = self.current_offset()
+        self.mode = mode
+        self.highlight_row = None
+        self.update_scrollbar()
+        self.scroll_to_offset(offset)
+
+    def on_line_index(self, mapped, index):
+        """行索引建好(或失败，index 为 None)后，仍需要文本模式时切换过去"""
+        if mapped is not self.mapped:
+            return
+        self.index_job = None
+        if index is None:
+            return
+        self.line_index = index
+        if self.wanted_mode == 'text':
+            self.set_mode('text')
+
+    def row_count(self):
+        if not self.mapped:
+            return 0
+        return self.line_index.count if self.mode == 'text' else hex_row_count(self.mapped.size)
+
+    def row_height(self):
+        return self.fontMetrics().lineSpacing()
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.row_height())
+
+    def update_scrollbar(self):
+        bar = self.verticalScrollBar()
+        bar.setRange(0, min(self.MAX_SCROLL, max(0, self.row_count() - self.visible_rows())))
+        bar.setPageStep(self.visible_rows())
+
+    def row_of_offset(self, offset):
+        if self.mode == 'text':
+            return self.line_index.line_of(offset)
+        return offset // HEX_WIDTH
+
+    def current_offset(self):
+        if not self.mapped:
+            return 0
+        row = self.verticalScrollBar().value()
+        return self.line_index.line_start(row) if self.mode == 'text' else row * HEX_WIDTH
+
+    def scroll_to_offset(self, offset, highlight=False):
+        row = self.row_of_offset(max(0, min(offset, self.mapped.size)))
+        self.highlight_row = row if highlight else None
+        # 目标行放在可见区域靠上的位置
+        self.verticalScrollBar().setValue(max(0, row - 2))
+        self.viewport().update()
+
+    def rows(self, first, count):
+        if not self.mapped:
+            return []
+        if self.mode == 'text':
+            return self.line_index.lines(first, count)
+        return hex_rows(self.mapped, first, count)
+
+    def visible_text(self):
+        return "\n".join(self.rows(self.verticalScrollBar().value(), self.visible_rows()))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbar()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        height = self.row_height()
+        ascent = self.fontMetrics().ascent()
+        first = self.verticalScrollBar().value()
+        for i, row in enumerate(self.rows(first, self.visible_rows() + 1)):
+            y = i * height
+            if first + i == self.highlight_row:
+                painter.fillRect(0, y, self.viewport().width(), height, QColor(255, 105, 180, 90))
+            painter.setPen(QColor("white"))
+            painter.drawText(6, y + ascent, row)
+        painter.end()
+
+
+class FilePreviewWindow(QDialog):
+    """文件预览窗口：图片直接显示，其余文件用 HexView 以文本或十六进制浏览"""
+    # 超过此大小的图片不解码，改用十六进制查看
+    IMAGE_LIMIT = 10 * 1024 * 1024
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("文件预览")
+        self.setMinimumSize(600, 500)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: rgb(35, 35, 35);
+            }
+            QLabel {
+                color: white;
+                font-family: Arial;
+                font-size: 12pt;
+            }
+            QLineEdit {
+                background-color: rgb(45, 45, 45);
+                color: white;
+                border: 1px solid rgb(100, 100, 100);
+                padding: 3px;
+            }
+        """)
+
+        self.layout = QVBoxLayout(self)
+        self.current_image = None  # 用于保存当前预览的图像
+
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self.layout.addWidget(self.status_label)
+
+        # 查看器工具栏：切换模式、跳转偏移、查找字节串
+        self.toolbar = QWidget()
+        toolbar_layout = QHBoxLayout(self.toolbar)
+        toolbar_layout.setContentsMargins(0, 0, 0, 0)
+        self.hex_mode_button = QPushButton("十六进制")
+        self.hex_mode_button.clicked.connect(lambda: self.viewer.set_mode('hex'))
+        toolbar_layout.addWidget(self.hex_mode_button)
+        self.text_mode_button = QPushButton("文本")
+        self.text_mode_button.clicked.connect(lambda: self.viewer.set_mode('text'))
+        toolbar_layout.addWidget(self.text_mode_button)
+        self.offset_input = QLineEdit()
+        self.offset_input.setPlaceholderText("偏移(十进制或0x)")
+        self.offset_input.returnPressed.connect(self.goto_offset)
+        toolbar_layout.addWidget(self.offset_input)
+        goto_button = QPushButton("跳转")
+        goto_button.clicked.connect(self.goto_offset)
+        toolbar_layout.addWidget(goto_button)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('查找: 十六进制如 504B0304，文本用引号 "flag"')
+        self.search_input.returnPressed.connect(self.find_next)
+        toolbar_layout.addWidget(self.search_input, 2)
+        find_button = QPushButton("查找下一个")
+        find_button.clicked.connect(self.find_next)
+        toolbar_layout.addWidget(find_button)
+        self.layout.addWidget(self.toolbar)
+        self.last_match = -1
+
+        self.viewer = HexView()
+        self.layout.addWidget(self.viewer)
+
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
+
+        # 图像预览标签
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.setStyleSheet("QLabel { padding: 20px; }")
+        self.scroll_area.setWidget(self.image_label)
+        self.layout.addWidget(self.scroll_area)
+
+        # 设置右键菜单
+        self.setup_context_menus()
+
+    def setup_context_menus(self):
+        # 查看器的右键菜单
+        self.viewer.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.viewer.customContextMenuRequested.connect(self.show_viewer_context_menu)
+
+        # 图像标签的右键菜单
+        self.image_label.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.image_label.customContextMenuRequested.connect(self.show_image_context_menu)
+
+    def show_viewer_context_menu(self, pos):
+        if not self.viewer.mapped:
+            return
+        menu = QMenu()
+        copy_action = QAction("复制可见内容", self)
+        copy_action.triggered.connect(lambda: QGuiApplication.clipboard().setText(self.viewer.visible_text()))
+        menu.addAction(copy_action)
+        offset_action = QAction("复制当前偏移", self)
+        offset_action.triggered.connect(
+            lambda: QGuiApplication.clipboard().setText(str(self.viewer.current_offset())))
+        menu.addAction(offset_action)
+        menu.exec(self.viewer.mapToGlobal(pos))
+
+    def show_image_context_menu(self, pos):
+        if not self.current_image:
+            return
+
+        menu = QMenu()
+        copy_action = QAction("复制图片", self)
+        copy_action.triggered.connect(self.copy_image_to_clipboard)
+        menu.addAction(copy_action)
+        menu.exec(self.image_label.mapToGlobal(pos))
+
+    def copy_image_to_clipboard(self):
+        if self.current_image:
+            clipboard = QGuiApplication.clipboard()
+            clipboard.setImage(self.current_image)
+
+    def show_viewer(self, visible):
+        self.toolbar.setVisible(visible)
+        self.viewer.setVisible(visible)
+        self.scroll_area.setVisible(not visible)
+
+    def preview_file(self, file_path):
+        try:
+            self.viewer.close_file()
+            self.image_label.clear()
+            self.status_label.clear()
+            self.current_image = None
+            self.last_match = -1
+
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"文件不存在: {file_path}")
+
+            file_size = os.path.getsize(file_path)
+            ext = os.path.splitext(file_path)[1].lower()
+            supported_image = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+
+            if ext in supported_image and file_size <= self.IMAGE_LIMIT and self.preview_image(file_path):
+                self.show_viewer(False)
+                return
+
+            # 其余文件(以及无法解码的图片)用查看器浏览，文本默认按行显示
+            with open(file_path, 'rb') as f:
+                head = f.read(4096)
+            mode = 'text' if looks_like_text(head) else 'hex'
+            self.viewer.set_file(file_path, mode)
+            self.show_viewer(True)
+            self.status_label.setText(
+                f"正在预览: {os.path.basename(file_path)} | {'文本' if mode == 'text' else '二进制'} | 大小: {file_size} 字节")
+            self.status_label.setStyleSheet("color: cyan;")
+
+        except Exception as e:
+            self.show_error(f"预览失败: {str(e)}")
+
+    def preview_image(self, file_path):
+        """显示图片，无法解码时返回 False"""
+        reader = QImageReader(file_path)
+        reader.setAutoTransform(True)
+
+        max_size = 1600
+        if reader.size().width() > max_size or reader.size().height() > max_size:
+            reader.setScaledSize(reader.size().scaled(
+                max_size, max_size, Qt.KeepAspectRatio))
+
+        self.current_image = reader.read()
+        if self.current_image.isNull():
+            self.current_image = None
+            return False
+
+        pixmap = QPixmap.fromImage(self.current_image)
+        self.image_label.setPixmap(pixmap)
+        self.image_label.adjustSize()
+
+        info = f"尺寸: {self.current_image.width()}x{self.current_image.height()} 格式: {reader.format()}"
+        self.status_label.setText(info)
+        self.status_label.setStyleSheet("color: cyan;")
+        return True
+
+    def goto_offset(self):
+        if not self.viewer.mapped:
+            return
+        try:
+            offset = parse_offset(self.offset_input.text())
+        except ValueError:
+            self.status_label.setText("偏移格式不正确")
+            self.status_label.setStyleSheet("color: red;")
+            return
+        self.viewer.scroll_to_offset(offset, highlight=True)
+
+    def find_next(self):
+        """从上次命中之后查找字节串，到末尾后从头继续"""
+        if not self.viewer.mapped:
+            return
+        pattern = parse_pattern(self.search_input.text())
+        if not pattern:
+            return
+        found = self.viewer.mapped.find(pattern, self.last_match + 1)
+        if found < 0 and self.last_match >= 0:
+            found = self.viewer.mapped.find(pattern)
+        if found < 0:
+            self.status_label.setText(f"未找到: {pattern.hex(' ')}")
+            self.status_label.setStyleSheet("color: red;")
+            return
+        self.last_match = found
+        self.viewer.scroll_to_offset(found, highlight=True)
+        self.status_label.setText(f"找到于偏移 {found} (0x{found:x})")
+        self.status_label.setStyleSheet("color: cyan;")
+
+    def show_error(self, message):
+        self.viewer.close_file()
+        self.status_label.setText(message)
+        self.status_label.setStyleSheet("color: red;")
+
+    def done(self, result):
+        # 释放映射，否则 Windows 上无法删除临时文件
+        self.viewer.close_file()
+        super().done(result)
+
+
+class MultiFilePreviewWindow(QDialog):
+    """多文件预览窗口
+
+    窗口打开时只显示条目列表，选中条目时才在后台解密，并预取前后相邻的条目，
+    打开速度与压缩包中的文件数量无关。
+    """
+    # 后台解密的并发数，以及选中条目前后预取的条目数
+    WORKERS = 3
+    PREFETCH = 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("文件预览窗口")
+        self.setMinimumSize(1000, 700)
+        self.job_queue = JobQueue(max_workers=self.WORKERS, parent=self)
+        self.source = None
+        self.paths = {}  # 条目名 -> 已解密的临时文件
+        self.errors = {}  # 条目名 -> 失败原因
+        self.pending = {}  # 条目名 -> 任务ID
+
+        # 主布局
+        self.main_layout = QHBoxLayout(self)
+
+        # 左侧文件列表
+        self.file_list = QListWidget()
+        self.file_list.setFixedWidth(250)
+        self.file_list.currentItemChanged.connect(lambda current, previous: self.on_file_selected(current))
+        self.main_layout.addWidget(self.file_list)
+
+        # 右侧预览区域（使用独立的FilePreviewWindow）
+        self.preview_window = FilePreviewWindow()  # 创建独立的预览窗口实例
+        self.preview_window.setMinimumWidth(750)
+        self.main_layout.addWidget(self.preview_window)  # 直接添加整个窗口
+
+        # 状态栏
+        self.status_bar = QLabel()
+        self.status_bar.setAlignment(Qt.AlignCenter)
+        self.main_layout.addWidget(self.status_bar)
+
+        # 设置样式
+        self.setStyleSheet("""
+            QDialog {
+                background-color: rgb(35, 35, 35);
+            }
+            QListWidget {
+                background-color: rgb(45, 45, 45);
+                color: white;
+                border: 1px solid rgb(100, 100, 100);
+                font-size: 11pt;
+            }
+            QListWidget::item {
+                padding: 8px;
+                border-bottom: 1px solid rgb(70, 70, 70);
+            }
+            QListWidget::item:hover {
+                background-color: rgb(60, 60, 60);
+            }
+            QListWidget::item:selected {
+                background-color: rgb(255, 105, 180);
+                color: white;
+            }
+            QLabel#status_bar {
+                border-top: 1px solid gray;
+                padding: 5px;
+                color: white;
+            }
+        """)
+        self.status_bar.setObjectName("status_bar")
+
+    def set_source(self, source):
+        """设置按需解密的数据来源(PreviewSource)，立即显示条目列表"""
+        self.source = source
+        self.file_list.clear()
+        for name in source.names():
+            item = QListWidgetItem(os.path.basename(name))
+            item.setData(Qt.UserRole, name)
+            item.setToolTip(name)
+            self.file_list.addItem(item)
+
+        if self.file_list.count() > 0:
+            self.file_list.setCurrentRow(0)
+
+    def on_file_selected(self, item):
+        """当选择文件时更新预览，尚未解密的条目先在后台解密"""
+        if item is None:
+            return
+        self.show_entry(item.data(Qt.UserRole))
+        self.prefetch(self.file_list.row(item))
+
+    def show_entry(self, name):
+        if name in self.paths:
+            try:
+                self.preview_window.preview_file(self.paths[name])
+                self.status_bar.setText("")
+            except Exception as e:
+                self.status_bar.setText(f"预览失败: {str(e)}")
+                self.status_bar.setStyleSheet("color: red;")
+        elif name in self.errors:
+            self.preview_window.show_error(f"{os.path.basename(name)}: {self.errors[name]}")
+        else:
+            self.preview_window.show_error("")
+            self.preview_window.status_label.setText(f"正在解密: {os.path.basename(name)} ...")
+            self.preview_window.status_label.setStyleSheet("color: cyan;")
+            self.request(name)
+
+    def request(self, name):
+        """提交条目的后台解密任务(已完成或已提交的不重复提交)"""
+        if not self.source or name in self.paths or name in self.errors or name in self.pending:
+            return
+        self.pending[name] = self.job_queue.submit(
+            self.source.load, name,
+            on_done=lambda path, name=name: self.on_entry_loaded(name, path),
+            on_error=lambda e, name=name: self.on_entry_failed(name, str(e)))
+
+    def prefetch(self, row):
+        """预取选中条目前后的条目；已离开预取范围且未开始的任务被取消，不会排在当前条目前面"""
+        if not self.source:
+            return
+        rows = range(max(0, row - self.PREFETCH), min(self.file_list.count(), row + self.PREFETCH + 1))
+        names = [self.file_list.item(r).data(Qt.UserRole) for r in rows]
+        for name, job_id in list(self.pending.items()):
+            if name not in names:
+                self.job_queue.cancel(job_id)
+                del self.pending[name]
+        for name in names:
+            self.request(name)
+
+    def on_entry_loaded(self, name, path):
+        self.pending.pop(name, None)
+        self.paths[name] = path
+        self.refresh_current(name)
+
+    def on_entry_failed(self, name, message):
+        self.pending.pop(name, None)
+        self.errors[name] = message
+        self.refresh_current(name)
+
+    def refresh_current(self, name):
+        item = self.file_list.currentItem()
+        if item is not None and item.data(Qt.UserRole) == name:
+            self.show_entry(item.data(Qt.UserRole))
+
+    def done(self, result):
+        # 关闭窗口时取消未完成的解密，并等待正在写入临时目录的任务结束
+        self.job_queue.shutdown(wait=True)
+        self.preview_window.viewer.close_file()
+        super().done(result)